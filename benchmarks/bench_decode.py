@@ -0,0 +1,46 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: single-pass JWTDecoder.parse_token vs the PyJWT decode path
+"""
+import argparse
+import os
+import sys
+import timeit
+
+import jwt
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jwt_decoder import JWTDecoder
+
+
+def pyjwt_decode(token: str):
+    # The decode path used before parse_token existed
+    header = jwt.get_unverified_header(token)
+    payload = jwt.decode(token, options={"verify_signature": False})
+    return header, payload, header.get('alg', 'none')
+
+
+def make_token(claims: int) -> str:
+    payload = {"sub": "user123", "name": "John Doe", "admin": False, "iat": 1700000000}
+    payload.update({f"claim_{i}": f"value_{i}" for i in range(claims)})
+    return jwt.encode(payload, "secret", algorithm="HS256")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("-n", "--number", type=int, default=20000, help="Decodes per measurement")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Measurements per case (best is reported)")
+    args = parser.parse_args()
+
+    print(f"{'claims':>8} {'pyjwt ops/s':>14} {'parse_token ops/s':>18} {'speedup':>8}")
+    for claims in (0, 10, 100, 1000):
+        token = make_token(claims)
+        number = max(args.number // max(claims // 10, 1), 100)
+        baseline = min(timeit.repeat(lambda: pyjwt_decode(token), number=number, repeat=args.repeat))
+        fast = min(timeit.repeat(lambda: JWTDecoder.decode_without_verification(token),
+                                 number=number, repeat=args.repeat))
+        print(f"{claims:>8} {number / baseline:>14,.0f} {number / fast:>18,.0f} {baseline / fast:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
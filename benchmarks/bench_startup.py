@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: wall time of jwt_modifier.py subcommands vs the interactive import set
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# none-alg token so no signature work is involved
+TOKEN = "eyJhbGciOiJub25lIiwidHlwIjoiSldUIn0.eyJzdWIiOiJ1c2VyMTIzIiwiYWRtaW4iOmZhbHNlfQ."
+
+CASES = {
+    # Everything the entry point imported up front before subcommands existed
+    "interactive imports": [sys.executable, "-c",
+                            "import pyperclip, jwt, cryptography.hazmat.primitives.serialization, "
+                            "jwt_decoder, jwt_encoder, input_handler, ui_formatter"],
+    "decode": [sys.executable, "jwt_modifier.py", "decode", TOKEN],
+    "modify (none)": [sys.executable, "jwt_modifier.py", "modify", TOKEN, "--set", "admin=true"],
+    "verify (HS256)": [sys.executable, "jwt_modifier.py", "verify",
+                       "eyJhbGciOiJIUzI1NiIsInR5cCI6IkpXVCJ9.e30.ZRrHA1JJJW8opsbCGfG_HACGpVUMN_a9IV7pAx_Zmeo",
+                       "-s", "secret"],
+    "python -c pass": [sys.executable, "-c", "pass"],
+}
+
+
+def measure(command, runs: int) -> list:
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=REPO, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False)
+        timings.append((time.perf_counter() - start) * 1000)
+    return timings
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip())
+    parser.add_argument("-n", "--runs", type=int, default=20, help="Process launches per case")
+    args = parser.parse_args()
+
+    print(f"{'case':<22} {'median ms':>10} {'min ms':>8}")
+    for name, command in CASES.items():
+        timings = measure(command, args.runs)
+        print(f"{name:<22} {statistics.median(timings):>10.1f} {min(timings):>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
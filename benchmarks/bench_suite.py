@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for decode, verify and sign across algorithms, key sizes and payload sizes.
+
+Results are written as JSON so runs can be diffed to catch regressions:
+
+    python benchmarks/bench_suite.py -o before.json
+    python benchmarks/bench_suite.py --quick --filter verify
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jwt_decoder import JWTDecoder
+from jwt_encoder import JWTEncoder
+
+PAYLOAD_SIZES = [100, 1_000, 10_000, 100_000, 1_000_000]
+KEY_SIZES = [2048, 3072, 4096]
+HS_SECRET = "benchmark-secret-with-enough-entropy-for-hs512"
+
+
+def make_payload(size: int) -> Dict[str, Any]:
+    """
+    Payload whose compact JSON encoding is approximately size bytes
+    """
+    payload: Dict[str, Any] = {"sub": "user123", "admin": False, "iat": 1700000000}
+    overhead = len(json.dumps({**payload, "data": ""}, separators=(",", ":")))
+    payload["data"] = "x" * max(size - overhead, 0)
+    return payload
+
+
+def generate_rsa_keys(bits: int) -> Dict[str, str]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=bits)
+    return {
+        "private": private_key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()).decode(),
+        "public": private_key.public_key().public_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PublicFormat.SubjectPublicKeyInfo).decode(),
+    }
+
+
+def run_case(operation: Callable[[], Any], min_time: float, max_iterations: int) -> Dict[str, Any]:
+    """
+    Time individual calls until min_time elapses, then sample peak memory separately
+    """
+    operation()  # warm-up: first-call caches and imports
+    latencies: List[int] = []
+    deadline = time.perf_counter() + min_time
+    while len(latencies) < max_iterations and (time.perf_counter() < deadline or len(latencies) < 5):
+        start = time.perf_counter_ns()
+        operation()
+        latencies.append(time.perf_counter_ns() - start)
+
+    # tracemalloc slows allocation, so memory is measured outside the timed loop
+    tracemalloc.start()
+    operation()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    latencies.sort()
+    total = sum(latencies)
+
+    def percentile(fraction: float) -> float:
+        return latencies[min(int(len(latencies) * fraction), len(latencies) - 1)] / 1000
+
+    return {
+        "iterations": len(latencies),
+        "ops_per_sec": len(latencies) / (total / 1e9) if total else 0.0,
+        "latency_us": {
+            "mean": statistics.fmean(latencies) / 1000,
+            "p50": percentile(0.50),
+            "p90": percentile(0.90),
+            "p99": percentile(0.99),
+            "max": latencies[-1] / 1000,
+        },
+        "peak_memory_bytes": peak,
+    }
+
+
+def build_cases(payload_sizes: List[int], key_sizes: List[int]) -> List[Dict[str, Any]]:
+    cases = []
+    rsa_keys = {bits: generate_rsa_keys(bits) for bits in key_sizes}
+
+    for size in payload_sizes:
+        payload = make_payload(size)
+
+        none_token = JWTEncoder.create_token_none_alg({}, payload)
+        hs_token = JWTEncoder.create_token_hs({}, payload, HS_SECRET, "HS256")
+
+        cases += [
+            {"operation": "decode_without_verification", "alg": "none", "payload_bytes": size,
+             "fn": lambda t=none_token: JWTDecoder.decode_without_verification(t)},
+            {"operation": "pyjwt_decode_baseline", "alg": "none", "payload_bytes": size,
+             "fn": lambda t=none_token: (jwt.get_unverified_header(t),
+                                         jwt.decode(t, options={"verify_signature": False}))},
+            {"operation": "create_token_none_alg", "alg": "none", "payload_bytes": size,
+             "fn": lambda p=payload: JWTEncoder.create_token_none_alg({}, p)},
+        ]
+
+        for algorithm in ("HS256", "HS384", "HS512"):
+            token = JWTEncoder.create_token_hs({}, payload, HS_SECRET, algorithm)
+            cases += [
+                {"operation": "verify_hs_token", "alg": algorithm, "payload_bytes": size,
+                 "fn": lambda t=token: JWTDecoder.verify_hs_token(t, HS_SECRET)},
+                {"operation": "create_token_hs", "alg": algorithm, "payload_bytes": size,
+                 "fn": lambda p=payload, a=algorithm: JWTEncoder.create_token_hs({}, p, HS_SECRET, a)},
+            ]
+        cases.append({"operation": "decode_without_verification", "alg": "HS256", "payload_bytes": size,
+                      "fn": lambda t=hs_token: JWTDecoder.decode_without_verification(t)})
+
+        for bits, keys in rsa_keys.items():
+            for algorithm in ("RS256", "RS384", "RS512"):
+                token = JWTEncoder.create_token_rs({}, payload, keys["private"], algorithm)
+                cases += [
+                    {"operation": "verify_rs_token", "alg": algorithm, "key_bits": bits, "payload_bytes": size,
+                     "fn": lambda t=token, k=keys["public"]: JWTDecoder.verify_rs_token(t, k)},
+                    {"operation": "create_token_rs", "alg": algorithm, "key_bits": bits, "payload_bytes": size,
+                     "fn": lambda p=payload, k=keys["private"], a=algorithm: JWTEncoder.create_token_rs({}, p, k, a)},
+                ]
+    return cases
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="JWT decode/verify/sign benchmark suite (JSON output)")
+    parser.add_argument("-o", "--output", default="-", help="JSON results file (default: stdout)")
+    parser.add_argument("--quick", action="store_true", help="Small matrix: 100 B/10 KB payloads, 2048-bit keys")
+    parser.add_argument("--payload-sizes", type=lambda v: [int(x) for x in v.split(',')],
+                        help="Comma-separated payload sizes in bytes")
+    parser.add_argument("--key-sizes", type=lambda v: [int(x) for x in v.split(',')],
+                        help="Comma-separated RSA key sizes in bits")
+    parser.add_argument("--filter", default="", help="Only run operations containing this substring")
+    parser.add_argument("--min-time", type=float, default=0.5, help="Seconds spent timing each case")
+    parser.add_argument("--max-iterations", type=int, default=100_000, help="Timed calls per case at most")
+    args = parser.parse_args()
+
+    payload_sizes = args.payload_sizes or ([100, 10_000] if args.quick else PAYLOAD_SIZES)
+    key_sizes = args.key_sizes or ([2048] if args.quick else KEY_SIZES)
+
+    results = []
+    for case in build_cases(payload_sizes, key_sizes):
+        if args.filter not in case["operation"]:
+            continue
+        operation = case.pop("fn")
+        case.update(run_case(operation, args.min_time, args.max_iterations))
+        results.append(case)
+        print(f"{case['operation']:<30} {case['alg']:<6} {case.get('key_bits', ''):>5} "
+              f"{case['payload_bytes']:>8} B {case['ops_per_sec']:>12,.0f} ops/s", file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "pyjwt": jwt.__version__,
+            "min_time": args.min_time,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
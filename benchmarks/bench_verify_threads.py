@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Scaling benchmark for JWTDecoder.verify_many: verification throughput of RS, PS, ES
+and EdDSA tokens at 1, 2, 4, ... threads up to the core count, with the speedup over
+one thread. Linear scaling shows up as a speedup close to the thread count.
+
+    python benchmarks/bench_verify_threads.py
+    python benchmarks/bench_verify_threads.py --algorithms RS256,ES256 -n 5000 -o scaling.json
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from typing import Any, Dict, List
+
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jwt_decoder import JWTDecoder
+from jwt_encoder import TokenMinter
+
+ALGORITHMS = ["RS256", "PS256", "ES256", "ES384", "EdDSA"]
+CURVES = {"ES256": ec.SECP256R1(), "ES384": ec.SECP384R1(), "ES512": ec.SECP521R1()}
+
+
+def generate_key(algorithm: str) -> Any:
+    if algorithm[:2] in ("RS", "PS"):
+        return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    if algorithm in CURVES:
+        return ec.generate_private_key(CURVES[algorithm])
+    return ed25519.Ed25519PrivateKey.generate()
+
+
+def thread_counts(maximum: int) -> List[int]:
+    counts = []
+    count = 1
+    while count < maximum:
+        counts.append(count)
+        count *= 2
+    return counts + [maximum]
+
+
+def measure(tokens: List[str], public_key: Any, threads: int, rounds: int) -> float:
+    """
+    Best tokens/s over several rounds
+    """
+    best = 0.0
+    for _ in range(rounds):
+        start = time.perf_counter()
+        valid = sum(JWTDecoder.verify_many(tokens, public_key, threads))
+        elapsed = time.perf_counter() - start
+        if valid != len(tokens):
+            raise RuntimeError(f"{len(tokens) - valid} tokens failed to verify")
+        best = max(best, len(tokens) / elapsed)
+    return best
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Thread scaling of batch signature verification")
+    parser.add_argument("-o", "--output", default="-", help="JSON results file (default: stdout)")
+    parser.add_argument("--algorithms", default=",".join(ALGORITHMS), help="Comma-separated algorithms")
+    parser.add_argument("-n", "--tokens", type=int, default=2000, help="Tokens verified per run")
+    parser.add_argument("--max-threads", type=int, default=os.cpu_count() or 1, help="Largest thread count")
+    parser.add_argument("--rounds", type=int, default=3, help="Runs per thread count; the best is kept")
+    args = parser.parse_args()
+
+    results: List[Dict[str, Any]] = []
+    for algorithm in [name.strip() for name in args.algorithms.split(',') if name.strip()]:
+        private_key = generate_key(algorithm)
+        minter = TokenMinter({}, {"iss": "bench"}, private_key, algorithm)
+        tokens = [minter.mint({"sub": f"user{i}"}) for i in range(args.tokens)]
+
+        baseline = None
+        for threads in thread_counts(args.max_threads):
+            rate = measure(tokens, private_key.public_key(), threads, args.rounds)
+            baseline = baseline or rate
+            results.append({"alg": algorithm, "threads": threads, "tokens_per_sec": round(rate, 1),
+                            "speedup": round(rate / baseline, 2)})
+            print(f"{algorithm:<6} {threads:>3} threads {rate:>12,.0f} tokens/s {rate / baseline:>6.2f}x",
+                  file=sys.stderr)
+
+    report = {
+        "meta": {
+            "timestamp": int(time.time()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "tokens": args.tokens,
+        },
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output == '-':
+        print(output)
+    else:
+        with open(args.output, 'w') as f:
+            f.write(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
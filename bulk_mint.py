@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+import argparse
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from jwt_encoder import JWTEncoder
+
+
+def parse_range(value: str) -> Tuple[int, int]:
+    """
+    Parse a 'MIN:MAX' range of integers
+    """
+    try:
+        low, high = (int(part) for part in value.split(':', 1))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected MIN:MAX, got '{value}'")
+    if low > high:
+        raise argparse.ArgumentTypeError(f"Range minimum exceeds maximum in '{value}'")
+    return low, high
+
+
+def generate_claims(count: int, sub_template: Optional[str] = None,
+                    exp_range: Optional[Tuple[int, int]] = None,
+                    roles: Optional[List[str]] = None, role_claim: str = "role",
+                    extra: Optional[Dict[str, str]] = None,
+                    seed: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Yield per-token claim overrides: templated sub, exp offsets from now and cycled roles
+    """
+    rng = random.Random(seed)
+    now = int(time.time())
+    role_cycle = itertools.cycle(roles) if roles else None
+
+    for i in range(count):
+        claims: Dict[str, Any] = {}
+        if sub_template:
+            claims["sub"] = sub_template.format(i=i)
+        if exp_range:
+            claims["iat"] = now
+            claims["exp"] = now + rng.randint(*exp_range)
+        if role_cycle:
+            claims[role_claim] = next(role_cycle)
+        if extra:
+            for name, template in extra.items():
+                claims[name] = template.format(i=i)
+        yield claims
+
+
+def mint_from_token(token: Any, header: Dict[str, Any], payload: Dict[str, Any],
+                    claims: Iterable[Dict[str, Any]], key: Any, algorithm: str) -> Iterator[str]:
+    """
+    Stream re-signed copies of an existing token with each set of claim overrides applied
+    """
+    from jwt_encoder import IncrementalEncoder
+    try:
+        encoder = IncrementalEncoder(token, key, algorithm)
+    except Exception as e:
+        raise ValueError(f"Error creating JWT: {str(e)}")
+    for claim_set in claims:
+        yield encoder.encode({**payload, **claim_set}, header_claims=header)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mint large sets of signed JWTs from a template")
+    parser.add_argument("-n", "--count", type=int, required=True, help="Number of tokens to mint")
+    parser.add_argument("-a", "--algorithm",
+                        help="Signing algorithm (default: HS256, or the alg of --from-token)")
+    parser.add_argument("-s", "--secret", help="Secret for HS algorithms")
+    parser.add_argument("-k", "--private-key", help="Private key file for asymmetric algorithms")
+    parser.add_argument("--key-pool", metavar="DIR",
+                        help="Sign with a key drawn from this keystore (see generate_keys.py --pool)")
+    parser.add_argument("--header", default="{}", help="Extra header fields as JSON")
+    parser.add_argument("--payload", default="{}", help="Payload template as JSON")
+    parser.add_argument("--from-token", metavar="JWT",
+                        help="Mint variants of this token: only edited claims are re-encoded, "
+                             "every other byte of the original is kept")
+    parser.add_argument("--sub", dest="sub_template", help="Template for sub, e.g. 'user{i}'")
+    parser.add_argument("--exp-range", type=parse_range,
+                        help="exp as a random offset in seconds from now, e.g. '60:86400'")
+    parser.add_argument("--roles", help="Comma-separated roles cycled across tokens")
+    parser.add_argument("--role-claim", default="role", help="Claim name for --roles (default: role)")
+    parser.add_argument("--claim", action="append", default=[], metavar="NAME=TEMPLATE",
+                        help="Extra templated claim, may be repeated")
+    parser.add_argument("--seed", type=int, help="Random seed for reproducible output")
+    parser.add_argument("-w", "--workers", type=int, default=1,
+                        help="Worker processes for asymmetric signing (0 for all cores)")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    args = parser.parse_args(argv)
+
+    try:
+        header = json.loads(args.header)
+        payload = json.loads(args.payload)
+        extra = dict(item.split('=', 1) for item in args.claim)
+    except (json.JSONDecodeError, ValueError) as e:
+        parser.error(f"invalid template: {e}")
+
+    base_token = None
+    if args.from_token:
+        from jwt_token import Token
+        try:
+            base_token = Token(args.from_token).decode()
+        except ValueError as e:
+            parser.error(str(e))
+    if not args.algorithm:
+        args.algorithm = base_token.algorithm if base_token else "HS256"
+
+    if args.algorithm.startswith('HS'):
+        if args.secret is None:
+            parser.error(f"{args.algorithm} requires --secret")
+        key: Any = args.secret
+    elif args.algorithm.lower() == 'none':
+        key = None
+        args.algorithm = 'none'
+    elif args.key_pool:
+        from key_pool import KeyPool
+        pool = KeyPool(args.key_pool)
+        try:
+            entry = pool.draw(args.algorithm)
+        except ValueError as e:
+            parser.error(str(e))
+        header["kid"] = entry["kid"]
+        with open(os.path.join(pool.directory, entry["private"]), 'rb') as f:
+            key = f.read()
+    else:
+        if args.private_key is None:
+            parser.error(f"{args.algorithm} requires --private-key or --key-pool")
+        with open(args.private_key, 'rb') as f:
+            key = f.read()
+
+    claims = generate_claims(args.count, args.sub_template, args.exp_range,
+                             args.roles.split(',') if args.roles else None,
+                             args.role_claim, extra, args.seed)
+    workers = args.workers or os.cpu_count() or 1
+
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w')
+    start = time.perf_counter()
+    minted = 0
+    try:
+        if base_token is not None:
+            tokens = mint_from_token(base_token, header, payload, claims, key, args.algorithm)
+        else:
+            tokens = JWTEncoder.mint_tokens(header, payload, claims, key, args.algorithm, workers)
+        for token in tokens:
+            sink.write(token)
+            sink.write("\n")
+            minted += 1
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    rate = minted / elapsed if elapsed > 0 else 0.0
+    print(f"Minted {minted:,} tokens in {elapsed:.1f}s ({rate:,.0f}/s)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
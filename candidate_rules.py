@@ -0,0 +1,302 @@
+import datetime
+import os
+import sys
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+# Positions in hashcat rules: 0-9 then A-Z for 10-35
+_POSITIONS = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZ"
+
+# Bloom filter sizing: candidates remembered and bits spent on each. At 64 bits roughly
+# 1 in 15,000 new candidates is wrongly taken for a repeat and skipped, as long as no
+# more than the capacity is inserted. The default is used when the wordlist size is
+# unknown (stdin); estimates from a wordlist file are capped at the maximum (400 MB).
+DEFAULT_DEDUPE_CAPACITY = 10_000_000
+MAX_DEDUPE_CAPACITY = 50_000_000
+MIN_DEDUPE_CAPACITY = 1024
+DEFAULT_BITS_PER_CANDIDATE = 64
+
+Rule = Callable[[bytes], bytes]
+
+
+class RuleSyntaxError(ValueError):
+    pass
+
+
+def _position(rule: str, index: int) -> int:
+    if index >= len(rule) or rule[index] not in _POSITIONS:
+        raise RuleSyntaxError(f"Expected a position (0-9, A-Z) at offset {index} in rule '{rule}'")
+    return _POSITIONS.index(rule[index])
+
+
+def _char(rule: str, index: int) -> bytes:
+    if index >= len(rule):
+        raise RuleSyntaxError(f"Expected a character at offset {index} in rule '{rule}'")
+    return rule[index].encode('latin-1')
+
+
+def _toggle_at(word: bytes, n: int) -> bytes:
+    if n >= len(word):
+        return word
+    return word[:n] + word[n:n + 1].swapcase() + word[n + 1:]
+
+
+def _title(word: bytes) -> bytes:
+    return b" ".join(part[:1].upper() + part[1:] for part in word.lower().split(b" "))
+
+
+# Functions without arguments
+_SIMPLE: Dict[str, Rule] = {
+    ":": lambda w: w,
+    "l": bytes.lower,
+    "u": bytes.upper,
+    "c": lambda w: w[:1].upper() + w[1:].lower(),
+    "C": lambda w: w[:1].lower() + w[1:].upper(),
+    "t": bytes.swapcase,
+    "r": lambda w: w[::-1],
+    "d": lambda w: w + w,
+    "f": lambda w: w + w[::-1],
+    "{": lambda w: w[1:] + w[:1],
+    "}": lambda w: w[-1:] + w[:-1],
+    "[": lambda w: w[1:],
+    "]": lambda w: w[:-1],
+    "q": lambda w: bytes(b for b in w for _ in (0, 1)),
+    "E": _title,
+}
+
+
+def _compile_function(rule: str, index: int) -> Tuple[Rule, int]:
+    """
+    Compile the rule function starting at index
+    Returns: (function, index after it)
+    """
+    op = rule[index]
+    if op in _SIMPLE:
+        return _SIMPLE[op], index + 1
+    if op == "$":
+        suffix = _char(rule, index + 1)
+        return (lambda w: w + suffix), index + 2
+    if op == "^":
+        prefix = _char(rule, index + 1)
+        return (lambda w: prefix + w), index + 2
+    if op == "s":
+        old, new = _char(rule, index + 1), _char(rule, index + 2)
+        return (lambda w: w.replace(old, new)), index + 3
+    if op == "@":
+        purged = _char(rule, index + 1)
+        return (lambda w: w.replace(purged, b"")), index + 2
+    if op == "T":
+        n = _position(rule, index + 1)
+        return (lambda w: _toggle_at(w, n)), index + 2
+    if op == "D":
+        n = _position(rule, index + 1)
+        return (lambda w: w[:n] + w[n + 1:]), index + 2
+    if op == "'":
+        n = _position(rule, index + 1)
+        return (lambda w: w[:n]), index + 2
+    if op == "p":
+        n = _position(rule, index + 1)
+        return (lambda w: w * (n + 1)), index + 2
+    if op == "z":
+        n = _position(rule, index + 1)
+        return (lambda w: w[:1] * n + w), index + 2
+    if op == "Z":
+        n = _position(rule, index + 1)
+        return (lambda w: w + w[-1:] * n), index + 2
+    if op == "i":
+        n, char = _position(rule, index + 1), _char(rule, index + 2)
+        return (lambda w: w[:n] + char + w[n:] if n <= len(w) else w), index + 3
+    if op == "o":
+        n, char = _position(rule, index + 1), _char(rule, index + 2)
+        return (lambda w: w[:n] + char + w[n + 1:] if n < len(w) else w), index + 3
+    if op == "x":
+        n, m = _position(rule, index + 1), _position(rule, index + 2)
+        return (lambda w: w[n:n + m] if n < len(w) else w), index + 3
+    if op == "O":
+        n, m = _position(rule, index + 1), _position(rule, index + 2)
+        return (lambda w: w[:n] + w[n + m:] if n < len(w) else w), index + 3
+    raise RuleSyntaxError(f"Unknown rule function '{op}' in rule '{rule}'")
+
+
+def compile_rule(rule: str) -> Rule:
+    """
+    Compile one hashcat-style rule line into a function over candidate bytes
+    """
+    functions = []
+    index = 0
+    while index < len(rule):
+        if rule[index] == " ":
+            index += 1
+            continue
+        function, index = _compile_function(rule, index)
+        functions.append(function)
+
+    if not functions:
+        raise RuleSyntaxError("Empty rule")
+    if len(functions) == 1:
+        return functions[0]
+
+    def apply(word: bytes) -> bytes:
+        for function in functions:
+            word = function(word)
+        return word
+    return apply
+
+
+def _append(text: str) -> str:
+    return "".join(f"${char}" for char in text)
+
+
+def _prepend(text: str) -> str:
+    return "".join(f"^{char}" for char in reversed(text))
+
+
+def _builtin_rulesets() -> Dict[str, List[str]]:
+    this_year = datetime.date.today().year
+    years = [str(year) for year in range(1970, this_year + 2)]
+    leet = ["sa@", "sa4", "se3", "si1", "si!", "so0", "ss$", "ss5", "st7", "sl1",
+            "sa@se3", "sa@so0", "se3so0", "sa@se3so0", "sa4se3si1so0", "sa@se3si1so0ss$"]
+    suffixes = ["!", "!!", "?", ".", "@", "#", "$", "*", "1!", "123", "1234", "12345", "123!", "69", "007"]
+    prefixes = ["1", "!", "@", "#", "123"]
+
+    rulesets = {
+        "case": [":", "l", "u", "c", "C", "t", "E"],
+        "leet": leet,
+        "digits": ([_append(str(digit)) for digit in range(10)]
+                   + [_append(f"{number:02d}") for number in range(100)]),
+        "years": [_append(year) for year in years] + [_append(year[2:]) for year in years],
+        "affix": [_append(suffix) for suffix in suffixes] + [_prepend(prefix) for prefix in prefixes],
+    }
+    # Capitalized variants of the most common suffix mangles
+    rulesets["combo"] = [f"c {rule}" for rule in rulesets["digits"][:10] + rulesets["affix"]
+                         + [_append(year) for year in years[-15:]]]
+    rulesets["default"] = [rule for name in ("case", "leet", "digits", "years", "affix", "combo")
+                           for rule in rulesets[name]]
+    return rulesets
+
+
+BUILTIN_RULESETS = _builtin_rulesets()
+
+
+def load_rules(specs: Iterable[str]) -> List[str]:
+    """
+    Rules from built-in set names or hashcat .rule files; blank lines and '#' comments are skipped
+    """
+    rules: List[str] = []
+    for spec in specs:
+        if spec in BUILTIN_RULESETS:
+            rules.extend(BUILTIN_RULESETS[spec])
+            continue
+        if not os.path.exists(spec):
+            raise RuleSyntaxError(f"Unknown rule set '{spec}', expected a file or one of {', '.join(BUILTIN_RULESETS)}")
+        with open(spec, 'r', encoding='latin-1') as f:
+            for line in f:
+                line = line.rstrip("\r\n")
+                if line.strip() and not line.startswith("#"):
+                    rules.append(line)
+    return rules
+
+
+# Two bit positions (6 bits each) per 12-bit slice of a hash
+_BIT_PAIRS = [(1 << (value & 63)) | (1 << (value >> 6)) for value in range(4096)]
+
+
+class BloomFilter:
+    def __init__(self, capacity: int = DEFAULT_DEDUPE_CAPACITY,
+                 bits_per_item: int = DEFAULT_BITS_PER_CANDIDATE):
+        """
+        Blocked Bloom filter of fixed size: each item sets up to 6 bits in one 64-bit word
+        """
+        self.blocks = max(1, capacity * bits_per_item // 64)
+        self._words = memoryview(bytearray(self.blocks * 8)).cast('Q')
+
+    def add(self, item: bytes) -> bool:
+        """
+        Record an item; False when it was (probably) seen before
+        """
+        # The built-in hash is per-process salted, which is fine for an in-memory filter.
+        # Its low 36 bits pick the bits within a word, the rest pick the word.
+        h = hash(item)
+        mask = _BIT_PAIRS[h & 0xFFF] | _BIT_PAIRS[(h >> 12) & 0xFFF] | _BIT_PAIRS[(h >> 24) & 0xFFF]
+        index = (h >> 36) % self.blocks
+        word = self._words[index]
+        if word & mask == mask:
+            return False
+        self._words[index] = word | mask
+        return True
+
+    @property
+    def size_bytes(self) -> int:
+        return self.blocks * 8
+
+
+class RuleEngine:
+    def __init__(self, rules: Iterable[str], dedupe: bool = False,
+                 capacity: Optional[int] = None):
+        """
+        Apply mangling rules to a wordlist as a lazy candidate stream, optionally deduplicated
+        """
+        self.rules = list(rules) or [":"]
+        self._compiled = [compile_rule(rule) for rule in self.rules]
+        self.dedupe = dedupe
+        self.capacity = capacity
+        self.duplicates = 0
+        self.saturated = False
+
+    def dedupe_capacity(self, word_count: Optional[int]) -> int:
+        """
+        Filter capacity for a wordlist of word_count entries (None when unknown)
+        """
+        if word_count is None:
+            return DEFAULT_DEDUPE_CAPACITY
+        return max(MIN_DEDUPE_CAPACITY, min(self.keyspace(word_count), MAX_DEDUPE_CAPACITY))
+
+    def candidates(self, words: Iterable[bytes]) -> Iterator[bytes]:
+        """
+        Yield every rule applied to every word, word by word, skipping repeats if dedupe is set
+        """
+        compiled = self._compiled
+        if not self.dedupe:
+            for word in words:
+                for rule in compiled:
+                    yield rule(word)
+            return
+
+        capacity = self.capacity or DEFAULT_DEDUPE_CAPACITY
+        seen: Optional[BloomFilter] = BloomFilter(capacity)
+        add = seen.add
+        remaining = capacity
+        for word in words:
+            # Most repeats come from rules agreeing on the same word (':' and 'l' on a
+            # lowercase word), so drop those exactly before consulting the filter
+            produced = [rule(word) for rule in compiled]
+            unique = dict.fromkeys(produced)
+            self.duplicates += len(produced) - len(unique)
+            if seen is None:
+                yield from unique
+                continue
+            for candidate in unique:
+                if add(candidate):
+                    remaining -= 1
+                    yield candidate
+                else:
+                    self.duplicates += 1
+            if remaining <= 0:
+                # Past its capacity the filter's false positive rate climbs quickly and
+                # would skip real candidates, so only exact per-word repeats are dropped
+                print(f"Warning: duplicate filter full after {capacity:,} candidates, "
+                      f"no longer skipping repeats across words", file=sys.stderr)
+                self.saturated = True
+                seen = None
+
+    def keyspace(self, word_count: int) -> int:
+        """
+        Upper bound on candidates for a wordlist of word_count entries
+        """
+        return word_count * len(self.rules)
+
+
+def parse_rule_specs(values: Optional[List[str]]) -> List[str]:
+    """
+    Split repeated/comma-separated --rules values into individual specs
+    """
+    return [spec.strip() for value in values or [] for spec in value.split(",") if spec.strip()]
@@ -0,0 +1,494 @@
+#!/usr/bin/env python3
+import argparse
+import base64
+import json
+import re
+import sys
+import time
+from array import array
+from json.encoder import encode_basestring
+from bisect import bisect_left, bisect_right
+from collections import Counter
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Set, Tuple
+from jwt_token import Token
+
+INDEX_FORMAT = "jwt-claim-index"
+INDEX_VERSION = 1
+
+# Operators that compare numerically
+RANGE_OPERATORS = ("<", "<=", ">", ">=")
+
+_CONDITION = re.compile(r'^\s*(?P<path>[^=!<>~]+?)\s*(?P<op>!=|<=|>=|=|<|>|~)\s*(?P<value>.*?)\s*$')
+_OPERATOR_CHARS = re.compile(r'[=!<>~]')
+_NOW = re.compile(r'^now(?:\s*([+-])\s*(\d+)\s*([smhd]?))?$', re.IGNORECASE)
+_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+# Marks a document without a value in a column
+_MISSING = -1
+
+
+class Condition(NamedTuple):
+    path: str
+    op: str
+    value: Any = None
+
+
+def normalize_path(path: str) -> str:
+    """
+    Claim paths are 'header.<name>' or 'payload.<name>'; a bare name is a payload claim
+    """
+    path = path.strip()
+    if path.startswith(("header.", "payload.")):
+        return path
+    return f"payload.{path}"
+
+
+def parse_value(text: str) -> Any:
+    """
+    A JSON value, a string, or 'now', 'now+3600', 'now-1h' as a Unix timestamp
+    """
+    match = _NOW.match(text.strip())
+    if match:
+        sign, amount, unit = match.groups()
+        offset = int(amount) * _UNITS[unit.lower()] if amount else 0
+        return int(time.time()) + (offset if sign != "-" else -offset)
+    from input_handler import InputHandler
+    return InputHandler.parse_field_value(text)
+
+
+def parse_condition(text: str) -> Condition:
+    """
+    'admin=true', 'exp<now+1h', 'header.kid!=k1', 'iss~example', 'jti' (present), '!jti' (absent)
+    """
+    match = _CONDITION.match(text)
+    if match is None:
+        text = text.strip()
+        negated = text.startswith("!")
+        name = text[1:].strip() if negated else text
+        if not name:
+            raise ValueError("Empty condition")
+        if _OPERATOR_CHARS.search(name):
+            if negated:
+                raise ValueError(f"Invalid condition '{text}': '!' only marks a claim as absent, "
+                                 f"use '!=' to compare")
+            raise ValueError(f"Invalid condition '{text}'")
+        return Condition(normalize_path(name), "missing" if negated else "exists")
+
+    op, value = match.group("op"), match.group("value")
+    if op == "~":
+        try:
+            return Condition(normalize_path(match.group("path")), op, re.compile(value))
+        except re.error as e:
+            raise ValueError(f"Invalid pattern '{value}': {str(e)}")
+    parsed = parse_value(value)
+    if op in RANGE_OPERATORS and not _is_number(parsed):
+        raise ValueError(f"'{op}' needs a number or a 'now' expression, got '{value}'")
+    return Condition(normalize_path(match.group("path")), op, parsed)
+
+
+def _is_number(value: Any) -> bool:
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+def _key(value: Any) -> str:
+    # Canonical JSON keeps 1, 1.0, true and "1" apart; scalars skip json.dumps,
+    # which would otherwise dominate the time spent building an index
+    kind = type(value)
+    if kind is str:
+        return encode_basestring(value)
+    if kind is int:
+        return int.__repr__(value)
+    if value is True:
+        return "true"
+    if value is False:
+        return "false"
+    if value is None:
+        return "null"
+    return json.dumps(value, separators=(",", ":"), sort_keys=True, ensure_ascii=False)
+
+
+def flatten(document: Dict[str, Any], prefix: str, listed: bool = False) -> Iterator[Tuple[str, Any, bool]]:
+    """
+    (path, value, whether it came from a list) for every leaf; list elements share
+    their list's path, so a claim such as roles=["admin", "user"] is found by both
+    roles=admin and roles=user
+    """
+    for name, value in document.items():
+        path = f"{prefix}.{name}"
+        if isinstance(value, dict) and value:
+            yield from flatten(value, path, listed)
+        elif isinstance(value, list) and value:
+            for element in value:
+                if isinstance(element, dict) and element:
+                    yield from flatten(element, path, True)
+                else:
+                    yield path, element, True
+        else:
+            yield path, value, listed
+
+
+def _pack(values: array) -> str:
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return base64.b64encode(values.tobytes()).decode('ascii')
+
+
+def _unpack(typecode: str, data: str) -> array:
+    values = array(typecode, base64.b64decode(data))
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class _Column:
+    __slots__ = ("keys", "key_ids", "ids", "postings", "_numbers")
+
+    def __init__(self):
+        """
+        One claim path: a dictionary-encoded value per document plus an inverted
+        index from each value (or list element) to the documents holding it
+        """
+        self.keys: List[str] = []
+        self.key_ids: Dict[str, int] = {}
+        self.ids = array('i')
+        self.postings: Dict[str, array] = {}
+        self._numbers: Optional[Tuple[List[float], List[str]]] = None
+
+    def add(self, doc: int, values: List[Any], listed: bool = False) -> None:
+        """
+        Record a document's values for this path; listed when they came from a list,
+        which is then kept as the document's value even with a single element
+        """
+        if len(self.ids) < doc:
+            self.ids.extend([_MISSING] * (doc - len(self.ids)))
+        element_keys = [_key(value) for value in values]
+        whole = element_keys[0] if len(values) == 1 and not listed else _key(values)
+        key_id = self.key_ids.get(whole)
+        if key_id is None:
+            key_id = self.key_ids[whole] = len(self.keys)
+            self.keys.append(whole)
+        self.ids.append(key_id)
+
+        for key in element_keys:
+            docs = self.postings.get(key)
+            if docs is None:
+                self.postings[key] = array('I', (doc,))
+            elif docs[-1] != doc:
+                docs.append(doc)
+        self._numbers = None
+
+    def padded(self, size: int) -> array:
+        """
+        Value ids for documents 0..size-1, with trailing documents marked missing
+        """
+        if len(self.ids) < size:
+            self.ids.extend([_MISSING] * (size - len(self.ids)))
+        return self.ids
+
+    def value_key(self, doc: int) -> Optional[str]:
+        key_id = self.ids[doc] if doc < len(self.ids) else _MISSING
+        return None if key_id == _MISSING else self.keys[key_id]
+
+    def present(self) -> Set[int]:
+        return {doc for doc, key_id in enumerate(self.ids) if key_id != _MISSING}
+
+    def equal(self, value: Any) -> Set[int]:
+        if _is_number(value):
+            # 1 and 1.0 are the same number even though their keys differ
+            return self.between(value, True, value, True)
+        return set(self.postings.get(_key(value), ()))
+
+    def between(self, low: Optional[float], low_inclusive: bool,
+                high: Optional[float], high_inclusive: bool) -> Set[int]:
+        numbers, keys = self._numeric()
+        start = 0 if low is None else (bisect_left if low_inclusive else bisect_right)(numbers, low)
+        end = len(numbers) if high is None else (bisect_right if high_inclusive else bisect_left)(numbers, high)
+        docs: Set[int] = set()
+        for key in keys[start:end]:
+            docs.update(self.postings[key])
+        return docs
+
+    def matching(self, pattern: Any) -> Set[int]:
+        docs: Set[int] = set()
+        for key, postings in self.postings.items():
+            if key.startswith('"') and pattern.search(key[1:-1] if '\\' not in key else json.loads(key)):
+                docs.update(postings)
+        return docs
+
+    def _numeric(self) -> Tuple[List[float], List[str]]:
+        """
+        Distinct numeric values in order with their keys, built on the first range query
+        """
+        if self._numbers is None:
+            pairs = []
+            for key in self.postings:
+                if key[0] in "-0123456789":
+                    pairs.append((int(key) if key.lstrip("-").isdigit() else float(key), key))
+            pairs.sort()
+            self._numbers = ([value for value, _ in pairs], [key for _, key in pairs])
+        return self._numbers
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"keys": self.keys, "ids": _pack(self.ids),
+                "postings": {key: _pack(docs) for key, docs in self.postings.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "_Column":
+        column = cls()
+        column.keys = data["keys"]
+        column.key_ids = {key: key_id for key_id, key in enumerate(column.keys)}
+        column.ids = _unpack('i', data["ids"])
+        column.postings = {key: _unpack('I', docs) for key, docs in data["postings"].items()}
+        return column
+
+
+class ClaimIndex:
+    def __init__(self):
+        """
+        Columnar store of decoded headers and payloads with an inverted index per
+        claim path, so filters and group-bys never touch the raw tokens again
+        """
+        self.tokens: List[Optional[str]] = []
+        self.columns: Dict[str, _Column] = {}
+        self.errors = 0
+
+    def __len__(self) -> int:
+        return len(self.tokens)
+
+    def add(self, header: Dict[str, Any], payload: Dict[str, Any], token: Optional[str] = None) -> int:
+        doc = len(self.tokens)
+        self.tokens.append(token)
+        values: Dict[str, List[Any]] = {}
+        listed: Set[str] = set()
+        for prefix, document in (("header", header), ("payload", payload)):
+            for path, value, from_list in flatten(document, prefix):
+                values.setdefault(path, []).append(value)
+                if from_list:
+                    listed.add(path)
+        for path, path_values in values.items():
+            column = self.columns.get(path)
+            if column is None:
+                column = self.columns[path] = _Column()
+            column.add(doc, path_values, path in listed)
+        return doc
+
+    def add_token(self, token: Any) -> Optional[int]:
+        try:
+            parsed = Token.coerce(token)
+            return self.add(parsed.header, parsed.payload, str(parsed))
+        except ValueError:
+            self.errors += 1
+            return None
+
+    def ingest(self, lines: Iterable[str]) -> int:
+        """
+        Add tokens, one per line, or the NDJSON records of the batch processor
+        (run it with --with-token to keep the tokens); returns the number added
+        """
+        added = 0
+        for line in lines:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    record = {}
+                header, payload = record.get("header"), record.get("payload")
+                if not isinstance(header, dict) or not isinstance(payload, dict):
+                    self.errors += 1
+                    continue
+                self.add(header, payload, record.get("token"))
+            elif self.add_token(line) is None:
+                continue
+            added += 1
+        return added
+
+    def paths(self) -> Dict[str, int]:
+        """
+        Documents holding each claim path
+        """
+        return {path: len(column.present()) for path, column in sorted(self.columns.items())}
+
+    def _match(self, condition: Condition) -> Set[int]:
+        column = self.columns.get(condition.path)
+        op, value = condition.op, condition.value
+        if column is None:
+            return set(range(len(self))) if op in ("missing", "!=") else set()
+        if op == "exists":
+            return column.present()
+        if op == "missing":
+            return set(range(len(self))) - column.present()
+        if op == "=":
+            return column.equal(value)
+        if op == "!=":
+            return set(range(len(self))) - column.equal(value)
+        if op == "~":
+            return column.matching(value)
+        if op == "<":
+            return column.between(None, False, value, False)
+        if op == "<=":
+            return column.between(None, False, value, True)
+        if op == ">":
+            return column.between(value, False, None, False)
+        if op == ">=":
+            return column.between(value, True, None, False)
+        raise ValueError(f"Unknown operator: {op}")
+
+    def select(self, conditions: Iterable[Condition] = ()) -> List[int]:
+        """
+        Documents matching every condition, in insertion order
+        """
+        matches: Optional[Set[int]] = None
+        for docs in sorted((self._match(condition) for condition in conditions), key=len):
+            matches = docs if matches is None else matches & docs
+            if not matches:
+                return []
+        if matches is None:
+            return list(range(len(self)))
+        return sorted(matches)
+
+    def value(self, doc: int, path: str) -> Any:
+        column = self.columns.get(normalize_path(path))
+        key = column.value_key(doc) if column is not None else None
+        return None if key is None else json.loads(key)
+
+    def group_by(self, paths: List[str], docs: Optional[Iterable[int]] = None) -> List[Tuple[Tuple[Any, ...], int]]:
+        """
+        Distinct value combinations of the paths with their document counts, most common first
+        """
+        columns = [self.columns.get(normalize_path(path)) or _Column() for path in paths]
+        id_arrays = [column.padded(len(self)) for column in columns]
+        if docs is None:
+            counts = Counter(zip(*id_arrays))
+        else:
+            docs = list(docs)
+            # Counted on value ids; each distinct combination is decoded once at the end
+            counts = Counter(zip(*(map(ids.__getitem__, docs) for ids in id_arrays)))
+        return [(tuple(None if key_id == _MISSING else json.loads(column.keys[key_id])
+                       for column, key_id in zip(columns, key_ids)), count)
+                for key_ids, count in counts.most_common()]
+
+    def save(self, path: str) -> None:
+        document = {
+            "format": INDEX_FORMAT,
+            "version": INDEX_VERSION,
+            "errors": self.errors,
+            "tokens": self.tokens,
+            "columns": {name: column.to_dict() for name, column in self.columns.items()},
+        }
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(document, f, separators=(",", ":"), ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path: str) -> "ClaimIndex":
+        with open(path, 'r', encoding='utf-8') as f:
+            try:
+                document = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"{path} is not a claim index: {str(e)}")
+        if not isinstance(document, dict) or document.get("format") != INDEX_FORMAT:
+            raise ValueError(f"{path} is not a claim index")
+        if document.get("version") != INDEX_VERSION:
+            raise ValueError(f"Unsupported claim index version: {document.get('version')}")
+        index = cls()
+        index.errors = document["errors"]
+        index.tokens = document["tokens"]
+        index.columns = {name: _Column.from_dict(data) for name, data in document["columns"].items()}
+        return index
+
+
+def _read_lines(paths: List[str]) -> Iterator[str]:
+    for path in paths:
+        stream = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+        try:
+            yield from stream
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+
+def cmd_build(args: argparse.Namespace) -> int:
+    start = time.perf_counter()
+    index = ClaimIndex()
+    index.ingest(_read_lines(args.inputs))
+    index.save(args.output)
+    print(f"Indexed {len(index):,} tokens ({len(index.columns):,} claim paths, {index.errors:,} skipped) "
+          f"in {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 0 if len(index) else 1
+
+
+def cmd_query(args: argparse.Namespace) -> int:
+    index = ClaimIndex.load(args.index)
+    if args.paths:
+        for path, count in index.paths().items():
+            print(f"{count:8d}  {path}")
+        return 0
+
+    conditions = [parse_condition(text) for text in args.where]
+    start = time.perf_counter()
+    docs = index.select(conditions)
+    if args.count:
+        print(len(docs))
+    elif args.group_by:
+        paths = [normalize_path(path) for path in args.group_by.split(',') if path.strip()]
+        for values, count in index.group_by(paths, docs)[:args.limit]:
+            print(json.dumps({**dict(zip(paths, values)), "count": count}, ensure_ascii=False))
+    else:
+        fields = [normalize_path(path) for path in args.fields.split(',') if path.strip()] if args.fields else \
+            list(dict.fromkeys(condition.path for condition in conditions))
+        for doc in docs[:args.limit]:
+            if args.tokens_only:
+                if index.tokens[doc] is not None:
+                    print(index.tokens[doc])
+                continue
+            record = {"id": doc, "token": index.tokens[doc]}
+            record.update((path, index.value(doc, path)) for path in fields)
+            print(json.dumps(record, ensure_ascii=False))
+    print(f"{len(docs):,} of {len(index):,} tokens matched in {(time.perf_counter() - start) * 1000:.1f} ms",
+          file=sys.stderr)
+    return 0 if docs else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Index the claims of a token corpus and query them")
+    subparsers = parser.add_subparsers(dest="command", metavar="command", required=True)
+
+    build = subparsers.add_parser("build", help="Decode tokens once and write a claim index")
+    build.add_argument("inputs", nargs="+",
+                       help="Files with one token per line or batch NDJSON records ('-' for stdin)")
+    build.add_argument("-o", "--output", required=True, help="Index file to write")
+    build.set_defaults(handler=cmd_build)
+
+    query = subparsers.add_parser(
+        "query", help="Filter, count or group the indexed tokens",
+        epilog="Conditions: PATH=VALUE, PATH!=VALUE, PATH<N (also <=, >, >=), PATH~REGEX, PATH (present), "
+               "!PATH (absent). Bare names are payload claims, e.g. admin=true, header.alg=RS256, "
+               "exp<now+1h, roles=admin. Values are JSON or strings; 'now', 'now+30m', 'now-7d' are timestamps.")
+    query.add_argument("index", help="Index file written by 'build'")
+    query.add_argument("-w", "--where", action="append", default=[], metavar="CONDITION",
+                       help="Keep tokens matching this condition, may be repeated (all must match)")
+    query.add_argument("-g", "--group-by", metavar="PATHS",
+                       help="Comma-separated claim paths; print each distinct combination with its count")
+    query.add_argument("-f", "--fields", metavar="PATHS",
+                       help="Claim paths to print with each token (default: those in the conditions)")
+    query.add_argument("-c", "--count", action="store_true", help="Print only the number of matches")
+    query.add_argument("--tokens-only", action="store_true", help="Print bare tokens instead of NDJSON")
+    query.add_argument("--paths", action="store_true", help="List the indexed claim paths and exit")
+    query.add_argument("-l", "--limit", type=int, default=None, help="Print at most this many rows")
+    query.set_defaults(handler=cmd_query)
+
+    args = parser.parse_args(argv)
+    try:
+        return args.handler(args)
+    except BrokenPipeError:
+        return 0
+    except (OSError, ValueError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,6 +1,56 @@
+import argparse
+import sys
+import time
 from cryptography.hazmat.primitives import serialization
 from cryptography.hazmat.primitives.asymmetric import rsa
 from cryptography.hazmat.backends import default_backend
+from key_pool import DEFAULT_POOL_DIR, KEY_SPECS, KeyPool
+
+
+def parse_spec(value: str):
+    """
+    Parse 'SPEC' or 'SPEC:COUNT', e.g. 'rsa4096:10'
+    """
+    spec, _, count = value.partition(':')
+    if spec not in KEY_SPECS:
+        raise argparse.ArgumentTypeError(f"unknown key spec '{spec}', expected one of {', '.join(KEY_SPECS)}")
+    try:
+        return spec, int(count) if count else 1
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid count in '{value}'")
+
+
+parser = argparse.ArgumentParser(
+    description="Generate an RSA key pair (priv.pem/publ.pem), or fill a keystore pool with many key pairs")
+parser.add_argument("--pool", nargs="?", const=DEFAULT_POOL_DIR, metavar="DIR",
+                    help=f"Keystore directory to add keys to (default: {DEFAULT_POOL_DIR})")
+parser.add_argument("--spec", action="append", type=parse_spec, default=[], metavar="SPEC[:COUNT]",
+                    help=f"Keys to generate into the pool, may be repeated ({', '.join(KEY_SPECS)})")
+parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: all cores)")
+parser.add_argument("--list", action="store_true", help="List the keys in the pool")
+parser.add_argument("--jwks", action="store_true", help="Print the pool's public keys as a JWKS")
+args = parser.parse_args()
+
+if args.pool or args.spec or args.list or args.jwks:
+    pool = KeyPool(args.pool or DEFAULT_POOL_DIR)
+
+    if args.spec:
+        start = time.perf_counter()
+        added = pool.generate(args.spec, args.workers)
+        print(f"Generated {len(added)} key pairs in {time.perf_counter() - start:.1f}s into {pool.directory}",
+              file=sys.stderr)
+        for entry in added:
+            print(f"{entry['kid']}  {entry['spec']:<8} {entry['alg']:<6} {entry['fingerprint']}")
+
+    if args.list:
+        for entry in pool.keys:
+            status = "used" if entry["used"] else "free"
+            print(f"{entry['kid']}  {entry['spec']:<8} {entry['alg']:<6} {status}  {entry['fingerprint']}")
+
+    if args.jwks:
+        import json
+        print(json.dumps(pool.to_jwks(), indent=2))
+    sys.exit(0)
 
 # Generate private key
 private_key = rsa.generate_private_key(
@@ -25,4 +75,4 @@ with open("publ.pem", "wb") as f:
     f.write(public_key.public_bytes(
         encoding=serialization.Encoding.PEM,
         format=serialization.PublicFormat.SubjectPublicKeyInfo
-    ))
\ No newline at end of file
+    ))
@@ -1,6 +1,11 @@
 import json
 from typing import Dict, Any, Tuple, Optional
 import re
+from urllib.parse import urlsplit
+from jwt_decoder import canonical_algorithm
+
+# Compiled once; the interactive prompt validates every token typed or pasted in
+JWT_FORMAT = re.compile(r'^[A-Za-z0-9-_=]+\.[A-Za-z0-9-_=]+\.[A-Za-z0-9-_=]*$')
 
 class InputHandler:
     @staticmethod
@@ -8,8 +13,7 @@ class InputHandler:
         """
         Validate if the string matches JWT format (three base64-encoded sections separated by dots)
         """
-        jwt_pattern = r'^[A-Za-z0-9-_=]+\.[A-Za-z0-9-_=]+\.[A-Za-z0-9-_=]*$'
-        return bool(re.match(jwt_pattern, token))
+        return JWT_FORMAT.match(token) is not None
 
     @staticmethod
     def validate_json_input(json_str: str) -> Tuple[bool, Optional[Dict[str, Any]], Optional[str]]:
@@ -25,6 +29,18 @@ class InputHandler:
         except json.JSONDecodeError as e:
             return False, None, f"Invalid JSON: {str(e)}"
 
+    @staticmethod
+    def parse_field_value(value: str) -> Any:
+        """
+        Parse a field value as JSON (boolean/number/null/array/object), falling back to a string
+        """
+        for candidate in (value, value.lower()):
+            try:
+                return json.loads(candidate)
+            except json.JSONDecodeError:
+                continue
+        return value
+
     @staticmethod
     def get_menu_choice(options: Dict[str, str]) -> str:
         """
@@ -66,6 +82,12 @@ class InputHandler:
         """
         Interactive header modification with specific field options
         """
+        from json_viewer import JSONViewer, is_large
+        if is_large(current_header):
+            # Paged tree editor instead of printing the whole object on every step
+            edited = JSONViewer(current_header, "HEADER").edit()
+            return current_header if edited is None else edited
+
         header = current_header.copy()
         while True:
             print("\nCurrent header:")
@@ -87,9 +109,10 @@ class InputHandler:
             choice = InputHandler.get_menu_choice(options)
             
             if choice == "1":
-                print("\nAvailable algorithms: none, HS256, RS256")
-                alg = input("Enter new algorithm: ").strip().upper()
-                header["alg"] = alg
+                print("\nAvailable algorithms: none, HS256/384/512, RS256/384/512, PS256/384/512, "
+                      "ES256/384/512, EdDSA")
+                alg = input("Enter new algorithm: ").strip()
+                header["alg"] = canonical_algorithm(alg)
             elif choice == "2":
                 typ = input("\nEnter new type (default 'JWT'): ").strip().upper()
                 header["typ"] = typ or "JWT"
@@ -97,13 +120,7 @@ class InputHandler:
                 key = input("\nEnter field name: ").strip()
                 if key:
                     value = input("Enter field value: ").strip()
-                    try:
-                        # Try to parse as JSON in case it's a boolean/number/null
-                        parsed_value = json.loads(value.lower())
-                        header[key] = parsed_value
-                    except json.JSONDecodeError:
-                        # If not valid JSON, treat as string
-                        header[key] = value
+                    header[key] = InputHandler.parse_field_value(value)
             elif choice == "4":
                 if len(header) > 0:
                     print("\nAvailable fields:")
@@ -130,6 +147,12 @@ class InputHandler:
         """
         Interactive payload modification with specific field options
         """
+        from json_viewer import JSONViewer, is_large
+        if is_large(current_payload):
+            # Paged tree editor instead of printing the whole object on every step
+            edited = JSONViewer(current_payload, "PAYLOAD").edit()
+            return current_payload if edited is None else edited
+
         payload = current_payload.copy()
         while True:
             print("\nCurrent payload:")
@@ -160,26 +183,14 @@ class InputHandler:
                         if 0 <= field_idx < len(payload):
                             key_to_modify = list(payload.keys())[field_idx]
                             value = input(f"Enter new value for '{key_to_modify}': ").strip()
-                            try:
-                                # Try to parse as JSON in case it's a boolean/number/null
-                                parsed_value = json.loads(value.lower())
-                                payload[key_to_modify] = parsed_value
-                            except json.JSONDecodeError:
-                                # If not valid JSON, treat as string
-                                payload[key_to_modify] = value
+                            payload[key_to_modify] = InputHandler.parse_field_value(value)
                     except (ValueError, IndexError):
                         print("Invalid selection")
             elif choice == "2":
                 key = input("\nEnter field name: ").strip()
                 if key:
                     value = input("Enter field value: ").strip()
-                    try:
-                        # Try to parse as JSON in case it's a boolean/number/null
-                        parsed_value = json.loads(value.lower())
-                        payload[key] = parsed_value
-                    except json.JSONDecodeError:
-                        # If not valid JSON, treat as string
-                        payload[key] = value
+                    payload[key] = InputHandler.parse_field_value(value)
             elif choice == "3":
                 if len(payload) > 0:
                     print("\nAvailable fields:")
@@ -249,4 +260,24 @@ class InputHandler:
             path = input(f"\n{prompt}: ").strip()
             if path:
                 return path
-            print("File path cannot be empty. Please try again.")
\ No newline at end of file
+            print("File path cannot be empty. Please try again.")
+
+    @staticmethod
+    def get_url(prompt: str) -> str:
+        """
+        Get an http(s) URL input from user
+        """
+        while True:
+            url = input(f"\n{prompt}: ").strip()
+            try:
+                parts = urlsplit(url)
+                # Reading the port raises ValueError when it is not a number
+                valid = parts.scheme in ("http", "https") and bool(parts.hostname) and (parts.port or 0) >= 0
+            except ValueError:
+                valid = False
+            if valid:
+                return url
+            if not url:
+                print("URL cannot be empty. Please try again.")
+            else:
+                print("Invalid URL, expected http://host/... or https://host/... Please try again.")
\ No newline at end of file
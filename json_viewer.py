@@ -0,0 +1,431 @@
+import json
+import re
+from typing import Any, Dict, List, Optional, Tuple, Union
+from rich.console import Console, Group
+from rich.panel import Panel
+from rich.table import Table
+from rich.text import Text
+from rich.box import ROUNDED
+from input_handler import InputHandler
+
+# Nodes above which display_json and the editors switch to the tree viewer
+LARGE_NODE_LIMIT = 200
+
+# Scalars longer than this are cut before styling; the row is cropped to the terminal anyway
+MAX_VALUE_CHARS = 512
+
+Path = Tuple[Union[str, int], ...]
+
+_PATH_TOKEN = re.compile(r'\[(\d+)\]|\["((?:[^"\\]|\\.)*)"\]|\.?([^.\[\]]+)')
+
+_VALUE_STYLES = {str: "green", int: "cyan", float: "cyan", bool: "magenta", type(None): "magenta"}
+
+
+def parse_path(text: str) -> Path:
+    """
+    Parse a key path such as 'profile.roles[2].name' or 'claims["a.b"]'
+    """
+    path: List[Union[str, int]] = []
+    position = 0
+    text = text.strip()
+    while position < len(text):
+        match = _PATH_TOKEN.match(text, position)
+        if not match or match.end() == position:
+            raise ValueError(f"Invalid path at '{text[position:]}'")
+        index, quoted, name = match.groups()
+        if index is not None:
+            path.append(int(index))
+        elif quoted is not None:
+            path.append(json.loads(f'"{quoted}"'))
+        else:
+            path.append(name)
+        position = match.end()
+    return tuple(path)
+
+
+def format_path(path: Path) -> str:
+    parts = []
+    for part in path:
+        if isinstance(part, int):
+            parts.append(f"[{part}]")
+        elif re.fullmatch(r'[^.\[\]"]+', part):
+            parts.append(f".{part}" if parts else part)
+        else:
+            parts.append(f"[{json.dumps(part)}]")
+    return "".join(parts) or "$"
+
+
+def is_large(data: Any, limit: int = LARGE_NODE_LIMIT) -> bool:
+    """
+    Whether data has more than limit nodes, stopping as soon as it does
+    """
+    remaining = limit
+    stack = [data]
+    while stack:
+        value = stack.pop()
+        remaining -= 1
+        if remaining < 0:
+            return True
+        if isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, list):
+            stack.extend(value)
+    return False
+
+
+def _coerce_part(container: Any, part: Union[str, int]) -> Union[str, int]:
+    # 'roles.2' and 'roles[2]' both address a list item; '[2]' on an object means key "2"
+    if isinstance(container, list) and isinstance(part, str) and part.isdigit():
+        return int(part)
+    if isinstance(container, dict) and isinstance(part, int):
+        return str(part)
+    return part
+
+
+class JSONTree:
+    def __init__(self, data: Any):
+        """
+        Collapsible tree over a JSON value. Rows are located arithmetically from the
+        sizes of expanded subtrees, so nothing is laid out beyond the requested window.
+        """
+        self.data = data
+        # Expanded child keys per container path; the root is always open
+        self._open: Dict[Path, set] = {}
+        # Caches rebuilt on demand after a toggle or an edit
+        self._sizes: Dict[Path, int] = {}
+        self._positions: Dict[Path, List[int]] = {}
+        self._key_lists: Dict[Path, List[str]] = {}
+        self._key_index: Dict[Path, Dict[str, int]] = {}
+
+    def is_expanded(self, path: Path) -> bool:
+        return not path or path[-1] in self._open.get(path[:-1], ())
+
+    def _invalidate(self, structure: bool = False) -> None:
+        self._sizes.clear()
+        self._positions.clear()
+        if structure:
+            self._key_lists.clear()
+            self._key_index.clear()
+
+    def _key_at(self, path: Path, container: Any, position: int) -> Union[str, int]:
+        if isinstance(container, list):
+            return position
+        keys = self._key_lists.get(path)
+        if keys is None:
+            keys = self._key_lists[path] = list(container)
+        return keys[position]
+
+    def _position_of(self, path: Path, container: Any, key: Union[str, int]) -> int:
+        if isinstance(container, list):
+            return key
+        index = self._key_index.get(path)
+        if index is None:
+            index = self._key_index[path] = {name: position for position, name in enumerate(container)}
+        return index[key]
+
+    def _open_positions(self, path: Path, container: Any) -> List[int]:
+        """
+        Sorted positions of the expanded container children of a container
+        """
+        positions = self._positions.get(path)
+        if positions is None:
+            positions = []
+            for key in self._open.get(path, ()):
+                try:
+                    child = container[key]
+                except (KeyError, IndexError, TypeError):
+                    continue
+                if isinstance(child, (dict, list)):
+                    positions.append(self._position_of(path, container, key))
+            positions.sort()
+            self._positions[path] = positions
+        return positions
+
+    def _size(self, path: Path, container: Any) -> int:
+        """
+        Visible rows below an expanded container
+        """
+        size = self._sizes.get(path)
+        if size is None:
+            size = len(container)
+            for position in self._open_positions(path, container):
+                key = self._key_at(path, container, position)
+                size += self._size(path + (key,), container[key])
+            self._sizes[path] = size
+        return size
+
+    def __len__(self) -> int:
+        return self._size((), self.data) if isinstance(self.data, (dict, list)) else 0
+
+    def row_at(self, row: int) -> Tuple[Path, int]:
+        """
+        (path, depth) of a visible row
+        """
+        if not 0 <= row < len(self):
+            raise IndexError(f"Row {row + 1} out of range")
+        path: Path = ()
+        container = self.data
+        while True:
+            # Children before each expanded child take one row each, then its subtree follows
+            start = 0
+            child_path = None
+            for position in self._open_positions(path, container):
+                if row <= position - start:
+                    break
+                row -= position - start + 1
+                key = self._key_at(path, container, position)
+                size = self._size(path + (key,), container[key])
+                if row < size:
+                    child_path = path + (key,)
+                    break
+                row -= size
+                start = position + 1
+            if child_path is None:
+                return path + (self._key_at(path, container, start + row),), len(path)
+            path, container = child_path, container[child_path[-1]]
+
+    def rows(self, offset: int, height: int) -> List[Tuple[Path, int]]:
+        return [self.row_at(row) for row in range(offset, min(offset + height, len(self)))]
+
+    def row_of(self, path: Path) -> int:
+        """
+        Row of a path whose ancestors are all expanded
+        """
+        row = -1
+        container = self.data
+        for depth, key in enumerate(path):
+            parent = path[:depth]
+            position = self._position_of(parent, container, key)
+            row += 1 + position
+            for open_position in self._open_positions(parent, container):
+                if open_position >= position:
+                    break
+                open_key = self._key_at(parent, container, open_position)
+                row += self._size(parent + (open_key,), container[open_key])
+            container = container[key]
+        return row
+
+    def get(self, path: Path) -> Any:
+        value = self.data
+        for part in path:
+            try:
+                value = value[_coerce_part(value, part)]
+            except (KeyError, IndexError, TypeError):
+                raise KeyError(f"No such path: {format_path(path)}")
+        return value
+
+    def normalize(self, path: Path) -> Path:
+        """
+        Path with list indices as ints and object keys as strings, as the rows use them
+        """
+        normalized = []
+        value = self.data
+        for part in path:
+            part = _coerce_part(value, part)
+            normalized.append(part)
+            try:
+                value = value[part]
+            except (KeyError, IndexError, TypeError):
+                value = None
+        return tuple(normalized)
+
+    def toggle(self, row: int) -> None:
+        path, _ = self.row_at(row)
+        if not isinstance(self.get(path), (dict, list)):
+            return
+        siblings = self._open.setdefault(path[:-1], set())
+        if path[-1] in siblings:
+            siblings.discard(path[-1])
+        else:
+            siblings.add(path[-1])
+        self._invalidate()
+
+    def reveal(self, path: Path) -> int:
+        """
+        Expand every ancestor of path and return its row
+        """
+        self.get(path)
+        path = self.normalize(path)
+        for length in range(1, len(path)):
+            self._open.setdefault(path[:length - 1], set()).add(path[length - 1])
+        self._invalidate()
+        return self.row_of(path)
+
+    def set(self, path: Path, value: Any) -> None:
+        """
+        Set a value, copying only the containers along the path so the original data is untouched
+        """
+        if not path:
+            raise KeyError("Cannot replace the root")
+        self.get(path[:-1])
+        self.data = self._replace(self.data, path, value, delete=False)
+        self._invalidate(structure=True)
+
+    def delete(self, path: Path) -> None:
+        if not path:
+            raise KeyError("Cannot delete the root")
+        self.get(path)
+        path = self.normalize(path)
+        self.data = self._replace(self.data, path, None, delete=True)
+        # Later list items shift down, so forget what was expanded under the parent
+        parent = path[:-1]
+        drop = [open_path for open_path in self._open
+                if open_path[:len(parent)] == parent and len(open_path) > len(parent)
+                and (isinstance(path[-1], int) or open_path[len(parent)] == path[-1])]
+        for open_path in drop:
+            del self._open[open_path]
+        siblings = self._open.get(parent)
+        if siblings is not None:
+            if isinstance(path[-1], int):
+                siblings.clear()
+            else:
+                siblings.discard(path[-1])
+        self._invalidate(structure=True)
+
+    def _replace(self, container: Any, path: Path, value: Any, delete: bool) -> Any:
+        head = _coerce_part(container, path[0])
+        if isinstance(container, dict):
+            copy: Any = dict(container)
+        elif isinstance(container, list) and isinstance(head, int):
+            if not 0 <= head < len(container) + (0 if delete or len(path) > 1 else 1):
+                raise KeyError(f"Index {head} out of range")
+            copy = list(container)
+        else:
+            raise KeyError(f"Cannot index {type(container).__name__} with {head!r}")
+
+        if len(path) > 1:
+            copy[head] = self._replace(copy[head], path[1:], value, delete)
+        elif delete:
+            del copy[head]
+        elif isinstance(copy, list) and head == len(copy):
+            copy.append(value)
+        else:
+            copy[head] = value
+        return copy
+
+    def render(self, offset: int, height: int) -> Table:
+        """
+        Styled rows for one window of the tree; cost depends on height, not on the data size
+        """
+        table = Table(show_header=False, box=None, padding=(0, 1), expand=True)
+        table.add_column(justify="right", style="dim", no_wrap=True, min_width=len(str(offset + height)))
+        table.add_column(no_wrap=True, overflow="ellipsis", ratio=1)
+        for row, (path, depth) in enumerate(self.rows(offset, height), offset):
+            table.add_row(str(row + 1), self._row_text(path, depth))
+        return table
+
+    def _row_text(self, path: Path, depth: int) -> Text:
+        key = path[-1]
+        value = self.get(path)
+        text = Text("  " * depth)
+        if isinstance(value, (dict, list)):
+            text.append("▾ " if self.is_expanded(path) else "▸ ", style="bold")
+        else:
+            text.append("  ")
+        text.append(f"[{key}]" if isinstance(key, int) else json.dumps(key, ensure_ascii=False), style="bold blue")
+        text.append(": ")
+
+        if isinstance(value, dict):
+            text.append(f"{{…}} {len(value)} keys", style="dim")
+        elif isinstance(value, list):
+            text.append(f"[…] {len(value)} items", style="dim")
+        else:
+            if isinstance(value, str) and len(value) > MAX_VALUE_CHARS:
+                value = value[:MAX_VALUE_CHARS]
+            text.append(json.dumps(value, ensure_ascii=False), style=_VALUE_STYLES.get(type(value), ""))
+        return text
+
+
+class JSONViewer:
+    COMMANDS = {
+        "n / p": "Next / previous page",
+        "t ROW": "Expand or collapse a row",
+        "g PATH": "Jump to a key path, e.g. roles[2].name",
+        "s PATH=VALUE": "Set a value (JSON or plain string)",
+        "d PATH": "Delete a key or item",
+        "w": "Save and return",
+        "q": "Cancel modifications",
+    }
+
+    def __init__(self, data: Dict[str, Any], title: str, console: Optional[Console] = None):
+        """
+        Paged viewer and editor for JSON objects too large to print in full
+        """
+        self.tree = JSONTree(data)
+        self.title = title
+        self.console = console or Console()
+        self.offset = 0
+        self.status = ""
+
+    @property
+    def page_size(self) -> int:
+        # Leave room for the panel border, status line, command list and prompt
+        return max(self.console.size.height - len(self.COMMANDS) - 8, 5)
+
+    def panel(self, height: Optional[int] = None) -> Panel:
+        """
+        The current window of the tree as a panel
+        """
+        height = height or self.page_size
+        shown = min(self.offset + height, len(self.tree))
+        return Panel(
+            self.tree.render(self.offset, height),
+            title=f"[bold]─ {self.title} ─[/bold]",
+            subtitle=f"rows {self.offset + 1 if shown else 0}-{shown} of {len(self.tree)}",
+            border_style="blue",
+            box=ROUNDED
+        )
+
+    def draw(self) -> None:
+        # Keep the window full after rows were removed below it
+        self.offset = max(min(self.offset, len(self.tree) - self.page_size), 0)
+        commands = Table(show_header=False, box=None, padding=(0, 1))
+        for command, description in self.COMMANDS.items():
+            commands.add_row(f"[bold blue]{command}[/bold blue]", description)
+        with self.console:
+            self.console.clear()
+            self.console.print(Group(self.panel(), Text(self.status, style="yellow"), commands))
+        self.status = ""
+
+    def scroll_to(self, row: int) -> None:
+        if not self.offset <= row < self.offset + self.page_size:
+            self.offset = max(row - self.page_size // 3, 0)
+
+    def edit(self) -> Optional[Dict[str, Any]]:
+        """
+        Run the interactive loop; returns the edited object, or None when cancelled
+        """
+        while True:
+            self.draw()
+            command, _, argument = input("\n> ").strip().partition(" ")
+            argument = argument.strip()
+            try:
+                if command == "n":
+                    if self.offset + self.page_size < len(self.tree):
+                        self.offset += self.page_size
+                elif command == "p":
+                    self.offset = max(self.offset - self.page_size, 0)
+                elif command == "t":
+                    self.tree.toggle(int(argument) - 1)
+                elif command == "g":
+                    self.scroll_to(self.tree.reveal(parse_path(argument)))
+                elif command == "s":
+                    path, separator, value = argument.partition("=")
+                    if not separator:
+                        raise ValueError("Expected PATH=VALUE")
+                    path = parse_path(path)
+                    self.tree.set(path, InputHandler.parse_field_value(value.strip()))
+                    self.scroll_to(self.tree.reveal(path))
+                    self.status = f"✓ Set {format_path(path)}"
+                elif command == "d":
+                    path = parse_path(argument)
+                    self.tree.delete(path)
+                    self.status = f"✓ Removed {format_path(path)}"
+                elif command == "w":
+                    return self.tree.data
+                elif command == "q":
+                    return None
+                else:
+                    self.status = "Unknown command"
+            except (ValueError, KeyError, IndexError) as e:
+                self.status = f"✗ {e.args[0] if e.args else e}"
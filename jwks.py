@@ -0,0 +1,304 @@
+import base64
+import hashlib
+import json
+import os
+import threading
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
+from jwt_token import Token
+
+# Key type used by each family of JWT algorithms
+ALG_KEY_TYPES = {"RS": "RSA", "PS": "RSA", "ES": "EC", "Ed": "OKP"}
+
+# Fewer candidates than this are verified one by one without a thread pool
+PARALLEL_THRESHOLD = 4
+
+# Key files picked up from a directory
+KEY_FILE_EXTENSIONS = (".json", ".jwk", ".jwks", ".pem", ".crt", ".cer", ".der", ".pub", ".key")
+
+
+class KeyEntry(NamedTuple):
+    key: Any
+    kty: str
+    size: int
+    kid: Optional[str] = None
+    alg: Optional[str] = None
+    thumbprint: Optional[str] = None
+    x5t: Optional[str] = None
+    x5t_s256: Optional[str] = None
+    source: str = ""
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _signature_size(public_key: Any) -> Tuple[str, int]:
+    """
+    Key type and the length in bytes of the signatures the key produces
+    """
+    from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519, rsa
+    if isinstance(public_key, rsa.RSAPublicKey):
+        return "RSA", (public_key.key_size + 7) // 8
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        return "EC", 2 * ((public_key.curve.key_size + 7) // 8)
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        return "OKP", 64
+    if isinstance(public_key, ed448.Ed448PublicKey):
+        return "OKP", 114
+    raise ValueError(f"Unsupported key type: {type(public_key).__name__}")
+
+
+def make_entry(public_key: Any, source: str = "", kid: Optional[str] = None, alg: Optional[str] = None,
+               x5t: Optional[str] = None, x5t_s256: Optional[str] = None) -> KeyEntry:
+    from key_pool import jwk_thumbprint, public_jwk
+    if hasattr(public_key, "public_key"):
+        public_key = public_key.public_key()
+    kty, size = _signature_size(public_key)
+    try:
+        thumbprint = jwk_thumbprint(public_jwk(public_key))
+    except (KeyError, ValueError):
+        thumbprint = None
+    return KeyEntry(public_key, kty, size, kid, alg, thumbprint, x5t, x5t_s256, source)
+
+
+def _certificate_thumbprints(der: bytes) -> Tuple[str, str]:
+    return _b64url(hashlib.sha1(der).digest()), _b64url(hashlib.sha256(der).digest())
+
+
+def _jwk_entry(jwk: Dict[str, Any], source: str) -> KeyEntry:
+    from key_cache import key_registry
+    x5t, x5t_s256 = jwk.get("x5t"), jwk.get("x5t#S256")
+    if jwk.get("x5c") and not (x5t and x5t_s256):
+        computed = _certificate_thumbprints(base64.b64decode(jwk["x5c"][0]))
+        x5t, x5t_s256 = x5t or computed[0], x5t_s256 or computed[1]
+    # Only the public members are parsed, so private JWKs contribute their public half
+    return make_entry(key_registry.load_key(jwk), source, jwk.get("kid"), jwk.get("alg"), x5t, x5t_s256)
+
+
+def _jwks_entries(keys: List[Any], path: str, errors: Dict[str, str]) -> List[KeyEntry]:
+    """
+    Entries for the asymmetric keys of a JWKS; a key that fails to load is recorded
+    in errors instead of discarding the whole set
+    """
+    from jwt.exceptions import PyJWTError
+    asymmetric = set(ALG_KEY_TYPES.values())
+    entries = []
+    for position, jwk in enumerate(keys):
+        # Entries without 'kty' are not keys, and 'oct' secrets cannot verify signatures
+        if not isinstance(jwk, dict) or jwk.get("kty") not in asymmetric:
+            continue
+        try:
+            entries.append(_jwk_entry(jwk, path))
+        except (ValueError, TypeError, KeyError, IndexError, PyJWTError) as e:
+            errors[f"{path}#{jwk.get('kid') or position}"] = str(e) or type(e).__name__
+    return entries
+
+
+def _file_entries(path: str, errors: Optional[Dict[str, str]] = None) -> List[KeyEntry]:
+    """
+    Entries from a JWKS, a single JWK, or a PEM/DER/OpenSSH key or certificate file
+    """
+    from key_cache import key_registry
+    with open(path, 'rb') as f:
+        data = f.read()
+
+    stripped = data.strip()
+    if stripped.startswith(b'{'):
+        try:
+            document = json.loads(stripped)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON in {path}: {str(e)}")
+        if isinstance(document.get("keys"), list):
+            return _jwks_entries(document["keys"], path, errors if errors is not None else {})
+        return [_jwk_entry(document, path)]
+
+    x5t = x5t_s256 = None
+    if stripped.startswith(b'-----BEGIN CERTIFICATE'):
+        from cryptography import x509
+        from cryptography.hazmat.primitives import serialization
+        certificate = x509.load_pem_x509_certificate(stripped)
+        x5t, x5t_s256 = _certificate_thumbprints(certificate.public_bytes(serialization.Encoding.DER))
+    # The file name (up to the first dot) doubles as a kid, as in key pool directories
+    kid = os.path.basename(path).split('.', 1)[0]
+    return [make_entry(key_registry.load_file(path), path, kid, None, x5t, x5t_s256)]
+
+
+class KeySet:
+    def __init__(self, entries: Iterable[KeyEntry], errors: Optional[Dict[str, str]] = None):
+        """
+        Public keys indexed by kid, x5t, x5t#S256 and RFC 7638 thumbprint
+        """
+        self.entries: List[KeyEntry] = []
+        self.errors = errors or {}
+        self._index: Dict[Tuple[str, str], List[KeyEntry]] = {}
+        self._by_size: Dict[Tuple[str, int], List[KeyEntry]] = {}
+        self._pool: Any = None
+        self._lock = threading.Lock()
+
+        seen = set()
+        for entry in entries:
+            # The same key listed twice (say its private and public file) is tried once
+            identity = (entry.thumbprint or id(entry.key), entry.kid)
+            if identity in seen:
+                continue
+            seen.add(identity)
+            self.entries.append(entry)
+            for field in ("kid", "x5t", "x5t_s256", "thumbprint"):
+                value = getattr(entry, field)
+                if value:
+                    self._index.setdefault((field, value), []).append(entry)
+            self._by_size.setdefault((entry.kty, entry.size), []).append(entry)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def lookup(self, header: Dict[str, Any]) -> List[KeyEntry]:
+        """
+        Keys the header points at through kid, x5t or x5t#S256
+        """
+        matches: List[KeyEntry] = []
+        kid = header.get("kid")
+        if isinstance(kid, str):
+            # Many issuers use the key thumbprint as kid
+            matches += self._index.get(("kid", kid), []) + self._index.get(("thumbprint", kid), [])
+        for field, name in (("x5t", "x5t"), ("x5t_s256", "x5t#S256")):
+            value = header.get(name)
+            if isinstance(value, str):
+                matches += self._index.get((field, value), [])
+        unique = {id(entry): entry for entry in matches}
+        return list(unique.values())
+
+    def candidates(self, token: Token) -> List[KeyEntry]:
+        """
+        Keys that could have produced the token's signature: matching key type
+        and signature length, and a compatible alg if the key declares one
+        """
+        kty = ALG_KEY_TYPES.get(token.algorithm[:2])
+        if kty is None:
+            return []
+        return [entry for entry in self._by_size.get((kty, len(token.signature)), [])
+                if entry.alg in (None, token.algorithm)]
+
+    def find(self, token: Any) -> Optional[KeyEntry]:
+        """
+        The key that verifies the token's signature: the keys named by the header
+        first, then every other plausible key, in parallel when there are many
+        """
+        token = Token.coerce(token)
+        kty = ALG_KEY_TYPES.get(token.algorithm[:2])
+
+        named = [entry for entry in self.lookup(token.header) if entry.kty == kty]
+        for entry in named:
+            if self._verify(token, entry):
+                return entry
+
+        tried = {id(entry) for entry in named}
+        others = [entry for entry in self.candidates(token) if id(entry) not in tried]
+        if len(others) < PARALLEL_THRESHOLD:
+            return next((entry for entry in others if self._verify(token, entry)), None)
+
+        from concurrent.futures import FIRST_COMPLETED, wait
+        pending = {self._executor().submit(self._verify, token, entry): entry for entry in others}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    entry = pending.pop(future)
+                    if future.result():
+                        return entry
+        finally:
+            for future in pending:
+                future.cancel()
+        return None
+
+    def verify(self, token: Any) -> bool:
+        return self.find(token) is not None
+
+    @staticmethod
+    def _verify(token: Token, entry: KeyEntry) -> bool:
+        from jwt_decoder import JWTDecoder
+        try:
+            return JWTDecoder.verify_signature(token, entry.key)
+        except ValueError:
+            return False
+
+    def _executor(self) -> Any:
+        from concurrent.futures import ThreadPoolExecutor
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 2))
+            return self._pool
+
+    @classmethod
+    def from_path(cls, path: str) -> "KeySet":
+        """
+        Load a JWKS/JWK/PEM file, or every key file in a directory
+        """
+        errors: Dict[str, str] = {}
+        if not os.path.isdir(path):
+            return cls(_file_entries(path, errors), errors)
+
+        from key_pool import INDEX_FILE
+        entries: List[KeyEntry] = []
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            if not name.lower().endswith(KEY_FILE_EXTENSIONS) or not os.path.isfile(file_path):
+                continue
+            # The index of a key pool directory lists the pool's key files, it holds no keys itself
+            if name == INDEX_FILE:
+                continue
+            try:
+                entries += _file_entries(file_path, errors)
+            except (ValueError, TypeError, OSError) as e:
+                errors[file_path] = str(e)
+        return cls(entries, errors)
+
+
+def _path_signature(path: str) -> Tuple[Any, ...]:
+    """
+    Cheap identity of a file or directory that changes whenever a key file does
+    """
+    if not os.path.isdir(path):
+        stat = os.stat(path)
+        return (stat.st_mtime_ns, stat.st_size)
+    signature = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.is_file():
+                stat = entry.stat()
+                signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+    return tuple(sorted(signature))
+
+
+class KeySetCache:
+    def __init__(self):
+        """
+        Parsed key sets by path, reloaded only when the file or directory changes
+        """
+        self.hits = 0
+        self.misses = 0
+        self._sets: Dict[str, Tuple[Tuple[Any, ...], KeySet]] = {}
+        self._lock = threading.Lock()
+
+    def load(self, path: str) -> KeySet:
+        path = os.path.abspath(path)
+        signature = _path_signature(path)
+        with self._lock:
+            cached = self._sets.get(path)
+            if cached is not None and cached[0] == signature:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        key_set = KeySet.from_path(path)
+        with self._lock:
+            self._sets[path] = (signature, key_set)
+        return key_set
+
+
+# Process-wide cache shared by the decoder, batch workers and the interactive mode
+key_sets = KeySetCache()
+
+
+def load_key_set(path: str) -> KeySet:
+    return key_sets.load(path)
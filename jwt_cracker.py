@@ -0,0 +1,428 @@
+#!/usr/bin/env python3
+import argparse
+import hmac
+import itertools
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from jwt_decoder import HMAC_DIGESTS, JWTDecoder
+
+DEFAULT_CHUNK_SIZE = 20000
+
+# Per-process state installed by the pool initializer
+_worker_target: Tuple[bytes, bytes, str] = (b"", b"", "sha256")
+_worker_groups: Dict[str, List[Tuple[int, bytes, bytes]]] = {}
+
+
+class CrackResult(NamedTuple):
+    secret: Optional[bytes]
+    tested: int
+    elapsed: float
+
+    @property
+    def rate(self) -> float:
+        return self.tested / self.elapsed if self.elapsed > 0 else 0.0
+
+
+def _init_worker(signing_input: bytes, signature: bytes, digest_name: str) -> None:
+    global _worker_target
+    _worker_target = (signing_input, signature, digest_name)
+
+
+def _check_chunk(chunk: List[bytes]) -> Tuple[Optional[bytes], int]:
+    signing_input, signature, digest_name = _worker_target
+    digest = hmac.digest
+    for candidate in chunk:
+        if digest(candidate, signing_input, digest_name) == signature:
+            return candidate, len(chunk)
+    return None, len(chunk)
+
+
+def _init_worker_many(groups: Dict[str, List[Tuple[int, bytes, bytes]]]) -> None:
+    global _worker_groups
+    _worker_groups = groups
+
+
+def _check_chunk_many(chunk: List[bytes], solved: frozenset) -> Tuple[List[Tuple[int, bytes]], int]:
+    groups = []
+    for digest_name, targets in _worker_groups.items():
+        outstanding = [target for target in targets if target[0] not in solved]
+        if outstanding:
+            groups.append((digest_name, outstanding))
+
+    found = []
+    for candidate in chunk:
+        for digest_name, targets in groups:
+            if not targets:
+                continue
+            # Derive the keyed inner/outer state once and fork it per signing input
+            keyed = hmac.new(candidate, digestmod=digest_name)
+            hits = []
+            for target in targets:
+                mac = keyed.copy()
+                mac.update(target[1])
+                if mac.digest() == target[2]:
+                    hits.append(target)
+            for target in hits:
+                targets.remove(target)
+                found.append((target[0], candidate))
+    return found, len(chunk)
+
+
+class JWTCracker:
+    def __init__(self, token: str):
+        """
+        Prepare an HMAC-signed token for secret cracking
+        """
+        parsed = JWTDecoder.parse_token(token)
+        self.algorithm = parsed.algorithm
+        if self.algorithm not in HMAC_DIGESTS:
+            raise ValueError(f"Cannot crack {self.algorithm} token, expected one of {', '.join(HMAC_DIGESTS)}")
+        if not parsed.signature:
+            raise ValueError("Token has no signature to crack")
+
+        self.digest_name = HMAC_DIGESTS[self.algorithm]
+        self.signing_input = parsed.signing_input
+        self.signature = parsed.signature
+
+    def check(self, candidate: bytes) -> bool:
+        """
+        Test a single candidate secret against the token signature
+        """
+        return hmac.compare_digest(
+            hmac.digest(candidate, self.signing_input, self.digest_name), self.signature)
+
+    def crack(self, candidates: Iterable[bytes], workers: Optional[int] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE,
+              progress: Optional[Callable[[int, float], None]] = None) -> CrackResult:
+        """
+        Test candidate secrets across a process pool until one matches
+        """
+        workers = workers or os.cpu_count() or 1
+        start = time.perf_counter()
+        tested = 0
+
+        if workers == 1:
+            _init_worker(self.signing_input, self.signature, self.digest_name)
+            for chunk in iter_chunks(candidates, chunk_size):
+                found, count = _check_chunk(chunk)
+                tested += count
+                if progress:
+                    progress(tested, time.perf_counter() - start)
+                if found is not None:
+                    return CrackResult(found, tested, time.perf_counter() - start)
+            return CrackResult(None, tested, time.perf_counter() - start)
+
+        chunks = iter_chunks(candidates, chunk_size)
+        # Keep a bounded number of chunks in flight so huge wordlists stream
+        max_pending = workers * 2
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self.signing_input, self.signature, self.digest_name)) as pool:
+            pending = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(_check_chunk, chunk))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    found, count = future.result()
+                    tested += count
+                    if found is not None:
+                        for other in pending:
+                            other.cancel()
+                        return CrackResult(found, tested, time.perf_counter() - start)
+                if progress:
+                    progress(tested, time.perf_counter() - start)
+
+        return CrackResult(None, tested, time.perf_counter() - start)
+
+
+class MultiTokenCracker:
+    def __init__(self, tokens: Iterable[str]):
+        """
+        Prepare many HMAC-signed tokens for a shared wordlist pass
+        """
+        self.tokens: List[List[str]] = []
+        self.algorithms: List[str] = []
+        self.rejected: Dict[str, str] = {}
+        self.groups: Dict[str, List[Tuple[int, bytes, bytes]]] = {}
+
+        # Tokens sharing a signing input and signature are the same target
+        seen: Dict[Tuple[bytes, bytes], int] = {}
+        for token in tokens:
+            token = token.strip()
+            if not token:
+                continue
+            try:
+                cracker = JWTCracker(token)
+            except (ValueError, TypeError) as e:
+                self.rejected[token] = str(e)
+                continue
+
+            target_key = (cracker.signing_input, cracker.signature)
+            if target_key in seen:
+                self.tokens[seen[target_key]].append(token)
+                continue
+
+            index = len(self.tokens)
+            seen[target_key] = index
+            self.tokens.append([token])
+            self.algorithms.append(cracker.algorithm)
+            self.groups.setdefault(cracker.digest_name, []).append(
+                (index, cracker.signing_input, cracker.signature))
+
+    def crack(self, candidates: Iterable[bytes], workers: Optional[int] = None,
+              chunk_size: int = DEFAULT_CHUNK_SIZE,
+              progress: Optional[Callable[[int, float], None]] = None) -> Tuple[Dict[str, bytes], CrackResult]:
+        """
+        Test each candidate once against every outstanding token
+        Returns: (secrets by token, overall statistics)
+        """
+        workers = workers or os.cpu_count() or 1
+        start = time.perf_counter()
+        tested = 0
+        solved: Dict[int, bytes] = {}
+        total = len(self.tokens)
+
+        def finish() -> Tuple[Dict[str, bytes], CrackResult]:
+            secrets = {token: solved[index]
+                       for index, tokens in enumerate(self.tokens) if index in solved
+                       for token in tokens}
+            return secrets, CrackResult(None, tested, time.perf_counter() - start)
+
+        if total == 0:
+            return finish()
+
+        if workers == 1:
+            _init_worker_many({name: list(targets) for name, targets in self.groups.items()})
+            for chunk in iter_chunks(candidates, chunk_size):
+                found, count = _check_chunk_many(chunk, frozenset(solved))
+                tested += count
+                for index, secret in found:
+                    solved.setdefault(index, secret)
+                if progress:
+                    progress(tested, time.perf_counter() - start)
+                if len(solved) == total:
+                    break
+            return finish()
+
+        chunks = iter_chunks(candidates, chunk_size)
+        max_pending = workers * 2
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker_many,
+                                 initargs=(self.groups,)) as pool:
+            pending = set()
+            exhausted = False
+            while len(solved) < total:
+                while not exhausted and len(pending) < max_pending:
+                    chunk = next(chunks, None)
+                    if chunk is None:
+                        exhausted = True
+                        break
+                    # Cracked tokens are dropped from every chunk submitted afterwards
+                    pending.add(pool.submit(_check_chunk_many, chunk, frozenset(solved)))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    found, count = future.result()
+                    tested += count
+                    for index, secret in found:
+                        solved.setdefault(index, secret)
+                if progress:
+                    progress(tested, time.perf_counter() - start)
+
+            for other in pending:
+                other.cancel()
+
+        return finish()
+
+
+def iter_tokens(path: str) -> Iterator[str]:
+    """
+    Stream tokens from a file with one JWT per line ('-' for stdin)
+    """
+    stream = sys.stdin if path == '-' else open(path, 'r')
+    try:
+        for line in stream:
+            line = line.strip()
+            if line:
+                yield line
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+
+def _unsolved(tokens: Iterable[str], store: Any, known: Dict[str, bytes]) -> Iterator[str]:
+    """
+    Pass through the tokens the results store has no solution for, collecting the
+    secrets of the others into known
+    """
+    for token in tokens:
+        try:
+            secret = store.known_secret(token) if store.solved(token) else None
+        except ValueError:
+            secret = None
+        if secret is None:
+            yield token
+        else:
+            known[token] = secret
+
+
+def iter_wordlist(path: str) -> Iterator[bytes]:
+    """
+    Stream candidate secrets from a wordlist file ('-' for stdin)
+    """
+    stream = sys.stdin.buffer if path == '-' else open(path, 'rb')
+    try:
+        for line in stream:
+            yield line.rstrip(b"\r\n")
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def count_words(path: str) -> Optional[int]:
+    """
+    Lines in a wordlist file, or None for stdin
+    """
+    if path == '-':
+        return None
+    lines = 0
+    last = b"\n"
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    return lines + (last != b"\n")
+
+
+def iter_chunks(candidates: Iterable[bytes], chunk_size: int) -> Iterator[List[bytes]]:
+    """
+    Group a candidate stream into lists of at most chunk_size entries
+    """
+    chunk = []
+    for candidate in candidates:
+        chunk.append(candidate)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def format_rate(tested: int, elapsed: float) -> str:
+    rate = tested / elapsed if elapsed > 0 else 0.0
+    return f"{tested:,} candidates in {elapsed:.1f}s ({rate:,.0f}/s)"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Crack the secret of HS256/384/512 JWTs with a wordlist")
+    parser.add_argument("token", nargs="?", help="JWT to crack")
+    parser.add_argument("wordlist", help="Wordlist path, or '-' to read candidates from stdin")
+    parser.add_argument("-t", "--tokens-file", help="Crack every token in this file (one per line) in a single pass")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Candidates per work unit")
+    parser.add_argument("-r", "--rules", action="append", metavar="SET|FILE",
+                        help="Mangle the wordlist with a built-in rule set or a hashcat .rule file, "
+                             "may be repeated or comma-separated (built-in: "
+                             "case, leet, digits, years, affix, combo, default)")
+    parser.add_argument("--dedupe", action="store_true",
+                        help="Skip repeated candidates produced by rules with a Bloom filter "
+                             "(a small share of real candidates may be skipped too)")
+    parser.add_argument("--dedupe-capacity", type=int, default=None, metavar="N",
+                        help="Candidates the duplicate filter is sized for (8 bytes each, "
+                             "default: wordlist lines x rules, at most 50M)")
+    parser.add_argument("--no-store", action="store_true",
+                        help="Neither consult nor update the results store ($JWT_RESULTS_DB)")
+    args = parser.parse_args(argv)
+
+    if bool(args.token) == bool(args.tokens_file):
+        parser.error("provide either a token or --tokens-file")
+
+    candidates: Iterable[bytes] = iter_wordlist(args.wordlist)
+    if args.rules:
+        from candidate_rules import RuleEngine, load_rules, parse_rule_specs
+        try:
+            engine = RuleEngine(load_rules(parse_rule_specs(args.rules)), args.dedupe, args.dedupe_capacity)
+        except ValueError as e:
+            parser.error(str(e))
+        print(f"Applying {len(engine.rules):,} rules to each word", file=sys.stderr)
+        if engine.dedupe:
+            if engine.capacity is None:
+                engine.capacity = engine.dedupe_capacity(count_words(args.wordlist))
+            print(f"Skipping repeats with a {engine.capacity * 8 / 1e6:,.1f} MB filter "
+                  f"({engine.capacity:,} candidates)", file=sys.stderr)
+        candidates = engine.candidates(candidates)
+
+    store = None
+    if not args.no_store:
+        from results_store import open_store
+        store = open_store()
+
+    def report(tested: int, elapsed: float) -> None:
+        print(f"\r{format_rate(tested, elapsed)}", end="", file=sys.stderr, flush=True)
+
+    if args.tokens_file:
+        tokens: Iterable[str] = iter_tokens(args.tokens_file)
+        known: Dict[str, bytes] = {}
+        if store is not None:
+            tokens = _unsolved(tokens, store, known)
+        cracker = MultiTokenCracker(tokens)
+        for token, reason in cracker.rejected.items():
+            print(f"Skipping token: {reason}", file=sys.stderr)
+        for token, secret in known.items():
+            print(json.dumps({"token": token, "secret": secret.decode('utf-8', errors='replace'), "cached": True}))
+
+        secrets: Dict[str, bytes] = {}
+        if cracker.tokens:
+            if store is not None:
+                # Secrets cracked in earlier runs are tried before the wordlist
+                candidates = itertools.chain(store.secrets(), candidates)
+            secrets, result = cracker.crack(candidates, args.workers, args.chunk_size, report)
+            print(f"\r{format_rate(result.tested, result.elapsed)}", file=sys.stderr)
+        for token, secret in secrets.items():
+            if store is not None:
+                store.record_secret(token, secret, "wordlist")
+            print(json.dumps({"token": token, "secret": secret.decode('utf-8', errors='replace')}))
+        total = sum(len(tokens) for tokens in cracker.tokens) + len(known)
+        print(f"Cracked {len(secrets) + len(known)} of {total} tokens"
+              + (f" ({len(known)} already in the results store)" if known else ""), file=sys.stderr)
+        return 0 if secrets or known else 1
+
+    try:
+        cracker = JWTCracker(args.token)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    known = store.known_secret(args.token) if store is not None else None
+    if known is not None:
+        print("Secret known from an earlier run", file=sys.stderr)
+        print(known.decode('utf-8', errors='replace'))
+        return 0
+
+    result = cracker.crack(candidates, args.workers, args.chunk_size, report)
+    print(f"\r{format_rate(result.tested, result.elapsed)}", file=sys.stderr)
+
+    if result.secret is None:
+        print("Secret not found", file=sys.stderr)
+        return 1
+    if store is not None:
+        store.record_secret(args.token, result.secret, "wordlist")
+    print(result.secret.decode('utf-8', errors='replace'))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
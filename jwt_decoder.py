@@ -1,34 +1,124 @@
-import jwt
-from typing import Tuple, Dict, Any, Optional
-from jwt.exceptions import InvalidTokenError, InvalidSignatureError
+import hmac
+import os
+import sys
+from collections import deque
+from functools import lru_cache
+from typing import Tuple, Dict, Any, Iterable, Iterator, List, Optional, Union
+from jwt_token import Token
+from profiling import profiler
+
+HMAC_DIGESTS = {"HS256": "sha256", "HS384": "sha384", "HS512": "sha512"}
+
+# Algorithms verified with a public key: RSA, RSA-PSS, ECDSA and EdDSA
+ASYMMETRIC_ALGORITHMS = ("RS256", "RS384", "RS512", "PS256", "PS384", "PS512",
+                         "ES256", "ES384", "ES512", "EdDSA")
+
+# Tokens per task handed to the verification thread pool
+DEFAULT_VERIFY_CHUNK_SIZE = 64
+
+# PyJWT, cryptography and the key registry are imported on first use so that
+# decode-only callers never pay for loading them
+
+
+def _is_key_set(key: Any) -> bool:
+    # A KeySet can only exist once jwks has been imported, so it is never loaded just for this check
+    jwks = sys.modules.get("jwks")
+    return jwks is not None and isinstance(key, jwks.KeySet)
+
+
+def is_asymmetric(algorithm: str) -> bool:
+    return algorithm in ASYMMETRIC_ALGORITHMS
+
+
+def canonical_algorithm(name: str) -> str:
+    """
+    The registered spelling of an algorithm name typed in any case, e.g. 'eddsa' -> 'EdDSA'
+    """
+    for algorithm in ("none", *HMAC_DIGESTS, *ASYMMETRIC_ALGORITHMS):
+        if name.lower() == algorithm.lower():
+            return algorithm
+    return name
+
+
+def _chunks(tokens: Iterable[Union[Token, str]], chunk_size: int) -> Iterator[List[Union[Token, str]]]:
+    chunk = []
+    for token in tokens:
+        chunk.append(token)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _check_chunk(chunk: List[Union[Token, str]], key: Any) -> List[bool]:
+    results = []
+    for token in chunk:
+        try:
+            results.append(JWTDecoder.verify_signature(JWTDecoder.parse_token(token), key))
+        except ValueError:
+            results.append(False)
+    return results
+
+
+@lru_cache(maxsize=None)
+def get_algorithms() -> Dict[str, Any]:
+    """
+    Signature algorithm implementations keyed by JWT 'alg' name
+    """
+    from jwt.algorithms import get_default_algorithms
+    return get_default_algorithms()
+
 
 class JWTDecoder:
     @staticmethod
-    def decode_without_verification(token: str) -> Tuple[Dict[str, Any], Dict[str, Any], str]:
+    def parse_token(token: Union[Token, str, bytes]) -> Token:
+        """
+        Wrap a JWT in a Token; segments are decoded on first access
+        """
+        return Token.coerce(token)
+
+    @staticmethod
+    def decode_without_verification(token: Union[Token, str]) -> Tuple[Dict[str, Any], Dict[str, Any], str]:
         """
         Decode JWT without verifying the signature to extract header and payload
         """
-        try:
-            # Split the token into parts
-            header_segment, payload_segment, _ = token.split('.')
-            
-            # Decode header and payload
-            header = jwt.get_unverified_header(token)
-            payload = jwt.decode(token, options={"verify_signature": False})
-            algorithm = header.get('alg', 'none')
-            
-            return header, payload, algorithm
-            
-        except Exception as e:
-            raise ValueError(f"Invalid JWT format: {str(e)}")
+        parsed = JWTDecoder.parse_token(token)
+        return parsed.header, parsed.payload, parsed.algorithm
+
+    @staticmethod
+    def load_key_set(path: str) -> Any:
+        """
+        Load a JWKS file, JWK/PEM key file or directory of keys; cached until it changes
+        """
+        from jwks import load_key_set
+        with profiler.phase("verify.key"):
+            return load_key_set(path)
+
+    @staticmethod
+    def lookup_known_key(token: Union[Token, str], store: Any) -> Any:
+        """
+        The HS secret or public key a results store holds for this token, already
+        checked against its signature; None when the store has nothing that verifies it
+        """
+        if store is None:
+            return None
+        parsed = JWTDecoder.parse_token(token)
+        with profiler.phase("verify.store"):
+            if parsed.algorithm in HMAC_DIGESTS:
+                return store.known_secret(parsed)
+            return store.known_key(parsed)
 
     @staticmethod
     def verify_hs_token(token: str, secret_key: str) -> bool:
         """
         Verify JWT signed with HMAC algorithm
         """
+        import jwt
+        from jwt.exceptions import InvalidTokenError, InvalidSignatureError
         try:
-            jwt.decode(token, secret_key, algorithms=["HS256", "HS384", "HS512"])
+            with profiler.phase("verify.pyjwt"):
+                jwt.decode(token, secret_key, algorithms=["HS256", "HS384", "HS512"])
             return True
         except InvalidSignatureError:
             return False
@@ -36,14 +126,91 @@ class JWTDecoder:
             raise ValueError(f"Invalid token: {str(e)}")
 
     @staticmethod
-    def verify_rs_token(token: str, public_key: str) -> bool:
+    def verify_rs_token(token: str, public_key: Any) -> bool:
+        """
+        Verify JWT signed with RSA algorithm, against one key or a key set
+        """
+        return JWTDecoder.verify_asymmetric_token(token, public_key, ["RS256", "RS384", "RS512"])
+
+    @staticmethod
+    def verify_asymmetric_token(token: str, public_key: Any,
+                                algorithms: Iterable[str] = ASYMMETRIC_ALGORITHMS) -> bool:
         """
-        Verify JWT signed with RSA algorithm
+        Verify JWT signed with an RS/PS/ES or EdDSA algorithm, against one key or a key set
         """
+        import jwt
+        from jwt.exceptions import InvalidTokenError, InvalidSignatureError
+        from key_cache import key_registry
         try:
-            jwt.decode(token, public_key, algorithms=["RS256", "RS384", "RS512"])
+            with profiler.phase("verify.key"):
+                if _is_key_set(public_key):
+                    entry = public_key.find(token)
+                    if entry is None:
+                        return False
+                    public_key = entry.key
+                public_key = key_registry.resolve(public_key)
+            with profiler.phase("verify.pyjwt"):
+                jwt.decode(token, public_key, algorithms=list(algorithms))
             return True
         except InvalidSignatureError:
             return False
         except InvalidTokenError as e:
-            raise ValueError(f"Invalid token: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Invalid token: {str(e)}")
+
+    @staticmethod
+    def verify_signature(parsed: Token, key: Any) -> bool:
+        """
+        Check only the signature of a parsed token, without validating claims
+        """
+        if _is_key_set(key):
+            return key.find(parsed) is not None
+
+        if parsed.algorithm in HMAC_DIGESTS:
+            secret = key.encode('utf-8') if isinstance(key, str) else key
+            if not isinstance(secret, (bytes, bytearray, memoryview)):
+                raise ValueError(f"Invalid key: {parsed.algorithm} needs a secret, got {type(key).__name__}")
+            with profiler.phase("verify.hmac"):
+                return hmac.compare_digest(
+                    hmac.digest(secret, parsed.signing_input, HMAC_DIGESTS[parsed.algorithm]), parsed.signature)
+
+        from jwt.exceptions import InvalidKeyError
+        from key_cache import key_registry
+
+        algorithms = get_algorithms()
+        if parsed.algorithm not in algorithms or parsed.algorithm == 'none':
+            raise ValueError(f"Unsupported algorithm: {parsed.algorithm}")
+        algorithm = algorithms[parsed.algorithm]
+        with profiler.phase("verify.key"):
+            try:
+                prepared_key = algorithm.prepare_key(key_registry.resolve(key))
+            except (InvalidKeyError, TypeError) as e:
+                # PyJWT raises TypeError for a key of the wrong type, e.g. EC for RS256
+                raise ValueError(f"Invalid key: {str(e)}")
+        with profiler.phase("verify.signature"):
+            return algorithm.verify(parsed.signing_input, prepared_key, parsed.signature)
+
+    @staticmethod
+    def verify_many(tokens: Iterable[Union[Token, str]], key: Any, workers: Optional[int] = None,
+                    chunk_size: int = DEFAULT_VERIFY_CHUNK_SIZE) -> Iterator[bool]:
+        """
+        Check the signatures of many tokens against one key or key set, in input order.
+        RSA, ECDSA and EdDSA verification runs in OpenSSL with the GIL released, so
+        a thread pool sized to the machine scales without pickling to processes.
+        Malformed tokens and unsupported algorithms count as invalid.
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1:
+            for chunk in _chunks(tokens, chunk_size):
+                yield from _check_chunk(chunk, key)
+            return
+
+        from concurrent.futures import ThreadPoolExecutor
+        max_pending = workers * 2
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            pending = deque()
+            for chunk in _chunks(tokens, chunk_size):
+                pending.append(pool.submit(_check_chunk, chunk, key))
+                if len(pending) >= max_pending:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
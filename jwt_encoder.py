@@ -1,5 +1,318 @@
-import jwt
-from typing import Dict, Any, Optional
+import base64
+import hmac
+import json
+from collections import deque
+from datetime import datetime
+from json.decoder import WHITESPACE, scanstring
+from typing import Dict, Any, Iterable, Iterator, List, Optional, Tuple, Union
+from jwt_decoder import HMAC_DIGESTS, JWTDecoder, get_algorithms, is_asymmetric
+from jwt_token import Token, b64url_decode
+from profiling import profiler
+
+# PyJWT, cryptography and the key registry are imported by the methods that sign
+
+DEFAULT_MINT_CHUNK_SIZE = 500
+
+# Base64 prefixes (and HMAC states after them) kept per IncrementalEncoder
+MAX_PREFIX_CACHE = 64
+
+_JSON_DECODER = json.JSONDecoder()
+
+# Per-process minter installed by the pool initializer
+_worker_minter: Optional["TokenMinter"] = None
+
+
+def b64url_encode(data: bytes) -> bytes:
+    """
+    Encode bytes as unpadded base64url
+    """
+    return base64.urlsafe_b64encode(data).rstrip(b'=')
+
+
+def _json_default(value: Any) -> Any:
+    # Match PyJWT's handling of datetime claims
+    if isinstance(value, datetime):
+        return int(value.timestamp())
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _init_mint_worker(header: Dict[str, Any], payload_template: Dict[str, Any],
+                      key: Any, algorithm: str) -> None:
+    global _worker_minter
+    _worker_minter = TokenMinter(header, payload_template, key, algorithm)
+
+
+def _mint_chunk(claims: List[Dict[str, Any]]) -> List[str]:
+    return [_worker_minter.mint(claim_set) for claim_set in claims]
+
+
+def _prepare_signing(key: Any, algorithm: str) -> Tuple[Any, Any, Any]:
+    """
+    Keyed HMAC state, or signer and prepared key, for an algorithm
+    Returns: (hmac state, signer, prepared key); unused entries are None
+    """
+    # 'none' and HMAC are handled here, so PyJWT is only loaded for asymmetric keys
+    if algorithm in HMAC_DIGESTS:
+        secret = key.encode('utf-8') if isinstance(key, str) else key
+        return hmac.new(secret, digestmod=HMAC_DIGESTS[algorithm]), None, None
+    if algorithm == 'none':
+        return None, None, None
+    if algorithm not in get_algorithms():
+        raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+    from key_cache import key_registry
+    signer = get_algorithms()[algorithm]
+    with profiler.phase("sign.key"):
+        return None, signer, signer.prepare_key(key_registry.resolve(key))
+
+
+def _dump_value(value: Any) -> str:
+    return json.dumps(value, separators=(",", ":"), default=_json_default)
+
+
+def _scan_members(text: str) -> Tuple[List[Tuple[str, int, int, int]], int]:
+    """
+    Locate the top-level members of a JSON object without re-serializing it; text is
+    UTF-8 bytes decoded as latin-1, so that every offset is also a byte offset
+    Returns: ([(name, member start, value start, value end)], index of the closing brace)
+    """
+    index = WHITESPACE.match(text, 0).end()
+    if text[index:index + 1] != '{':
+        raise ValueError("Expected a JSON object")
+    members = []
+    index = WHITESPACE.match(text, index + 1).end()
+    if text[index:index + 1] == '}':
+        return members, index
+
+    while True:
+        if text[index:index + 1] != '"':
+            raise ValueError(f"Expected a member name at offset {index}")
+        name, value_start = scanstring(text, index + 1)
+        if not name.isascii():
+            # Raw UTF-8 came through as latin-1 characters, while escapes were resolved to
+            # the real ones; decode the raw name as UTF-8 before resolving its escapes
+            name = scanstring(text[index:value_start].encode('latin-1').decode('utf-8'), 1)[0]
+        value_start = WHITESPACE.match(text, value_start).end()
+        if text[value_start:value_start + 1] != ':':
+            raise ValueError(f"Expected ':' at offset {value_start}")
+        value_start = WHITESPACE.match(text, value_start + 1).end()
+        _, value_end = _JSON_DECODER.raw_decode(text, value_start)
+        members.append((name, index, value_start, value_end))
+
+        index = WHITESPACE.match(text, value_end).end()
+        delimiter = text[index:index + 1]
+        if delimiter == '}':
+            return members, index
+        if delimiter != ',':
+            raise ValueError(f"Expected ',' or '}}' at offset {index}")
+        index = WHITESPACE.match(text, index + 1).end()
+
+
+def _diff_members(old: Dict[str, Any], new: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Members of new that differ from old, and names of old that new dropped
+    """
+    # Compare types as well, since 1 == True and 1 == 1.0 would hide an edit
+    updates = {name: value for name, value in new.items()
+               if name not in old or type(old[name]) is not type(value) or old[name] != value}
+    return updates, [name for name in old if name not in new]
+
+
+class _JSONObjectText:
+    __slots__ = ("data", "members", "close", "positions")
+
+    def __init__(self, data: bytes):
+        """
+        Member spans of an encoded JSON object, for edits that keep every other byte
+        """
+        # latin-1 maps bytes 1:1 onto characters, so offsets stay byte offsets and
+        # untouched UTF-8 sequences survive the round trip unchanged
+        self.data = data
+        self.members, self.close = _scan_members(data.decode('latin-1'))
+        # Duplicate names resolve to the last occurrence, as json.loads does
+        self.positions = {member[0]: position for position, member in enumerate(self.members)}
+
+    def edit(self, updates: Dict[str, Any], remove: Iterable[str] = ()) -> Tuple[bytes, int]:
+        """
+        Apply member updates/removals
+        Returns: (new bytes, offset of the first changed byte)
+        """
+        members = self.members
+        removed = {self.positions[name] for name in remove if name in self.positions}
+        # (start, end, replacement) regions of the original bytes, never overlapping
+        regions = []
+        added = []
+        for name, value in updates.items():
+            position = self.positions.get(name)
+            if position is None:
+                added.append(f"{_dump_value(name)}:{_dump_value(value)}")
+            else:
+                removed.discard(position)
+                _, _, value_start, value_end = members[position]
+                regions.append((value_start, value_end, _dump_value(value).encode('ascii')))
+
+        # A member followed by another is removed along with the separator after it;
+        # a trailing run of removed members takes the separator before the run instead
+        trailing = len(members)
+        while trailing and trailing - 1 in removed:
+            trailing -= 1
+        for position in removed:
+            if position < trailing:
+                regions.append((members[position][1], members[position + 1][1], b''))
+        if trailing < len(members):
+            run_start = members[trailing - 1][3] if trailing else members[0][1]
+            regions.append((run_start, members[-1][3], b''))
+
+        if added:
+            insert_at = members[-1][3] if members else self.close
+            separator = "," if trailing else ""
+            regions.append((insert_at, insert_at, (separator + ",".join(added)).encode('ascii')))
+
+        if not regions:
+            return self.data, len(self.data)
+
+        regions.sort()
+        pieces = []
+        offset = 0
+        for start, end, replacement in regions:
+            pieces.append(self.data[offset:start])
+            pieces.append(replacement)
+            offset = end
+        pieces.append(self.data[offset:])
+        return b''.join(pieces), regions[0][0]
+
+
+class TokenMinter:
+    def __init__(self, header: Dict[str, Any], payload_template: Dict[str, Any],
+                 key: Any = None, algorithm: str = 'HS256'):
+        """
+        Pre-encode the header and prepare the signing key for repeated minting
+        """
+        self._hmac_state, self._signer, self._prepared_key = _prepare_signing(key, algorithm)
+
+        # Same header layout PyJWT produces: default typ, alg forced, sorted keys
+        full_header = {"typ": "JWT", **header, "alg": algorithm}
+        if not full_header["typ"]:
+            del full_header["typ"]
+        self.header_segment = b64url_encode(
+            json.dumps(full_header, separators=(",", ":"), sort_keys=True).encode())
+        self.payload_template = payload_template
+        self.algorithm = algorithm
+        self.key = key
+
+    def mint(self, claims: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Create one signed token from the template merged with the given claims
+        """
+        payload = {**self.payload_template, **claims} if claims else self.payload_template
+        with profiler.phase("encode.json"):
+            payload_json = json.dumps(payload, separators=(",", ":"), default=_json_default).encode()
+        with profiler.phase("encode.base64"):
+            signing_input = self.header_segment + b'.' + b64url_encode(payload_json)
+
+        if self._hmac_state is not None:
+            with profiler.phase("sign.hmac"):
+                mac = self._hmac_state.copy()
+                mac.update(signing_input)
+                signature = mac.digest()
+        elif self._signer is not None:
+            with profiler.phase("sign.signature"):
+                signature = self._signer.sign(signing_input, self._prepared_key)
+        else:
+            signature = b''
+
+        return (signing_input + b'.' + b64url_encode(signature)).decode('ascii')
+
+    @property
+    def is_asymmetric(self) -> bool:
+        return self._signer is not None
+
+    def portable_key(self) -> Any:
+        """
+        Key material that can be pickled to worker processes
+        """
+        key = self.key
+        if isinstance(key, (str, bytes, dict)) or key is None:
+            return key
+        from cryptography.hazmat.primitives import serialization
+        return key.private_bytes(
+            encoding=serialization.Encoding.PEM,
+            format=serialization.PrivateFormat.PKCS8,
+            encryption_algorithm=serialization.NoEncryption()
+        )
+
+
+class IncrementalEncoder:
+    def __init__(self, token: Union[Token, str], key: Any = None, algorithm: Optional[str] = None):
+        """
+        Re-sign edits of an existing token, keeping its original bytes wherever they are unchanged
+        """
+        self.token = Token.coerce(token)
+        self.algorithm = algorithm or self.token.algorithm
+        self.key = key
+        self._hmac_state, self._signer, self._prepared_key = _prepare_signing(key, self.algorithm)
+
+        self._header = _JSONObjectText(b64url_decode(self.token.header_segment))
+        self._payload = _JSONObjectText(b64url_decode(self.token.payload_segment))
+        # Changing the algorithm rewrites only the header's alg member
+        self._header_updates = {} if self.algorithm == self.token.algorithm else {"alg": self.algorithm}
+        self._header_segment = self._encode_header({})
+        self._prefixes: Dict[Tuple[bytes, int], Tuple[bytes, Any]] = {}
+
+    def _encode_header(self, header_claims: Dict[str, Any], header_remove: Iterable[str] = ()) -> bytes:
+        updates = {**header_claims, **self._header_updates}
+        header_remove = [name for name in header_remove if name not in updates]
+        if not updates and not header_remove:
+            return self.token.header_segment
+        return b64url_encode(self._header.edit(updates, header_remove)[0])
+
+    def encode(self, claims: Optional[Dict[str, Any]] = None, remove: Iterable[str] = (),
+               header_claims: Optional[Dict[str, Any]] = None, header_remove: Iterable[str] = ()) -> str:
+        """
+        Set and remove payload claims (and optionally header fields), then sign
+        """
+        header_segment = (self._encode_header(header_claims or {}, header_remove)
+                          if header_claims or header_remove else self._header_segment)
+        with profiler.phase("encode.json"):
+            payload_json, first_change = self._payload.edit(claims or {}, remove)
+
+        # Base64 works in 3-byte groups, so everything before the first edited
+        # group encodes (and is MACed) exactly as before
+        aligned = first_change - first_change % 3
+        with profiler.phase("encode.base64"):
+            prefix, mac = self._prefix(header_segment, aligned)
+            signing_suffix = b64url_encode(payload_json[aligned:])
+
+        if self._hmac_state is not None:
+            with profiler.phase("sign.hmac"):
+                mac = mac.copy()
+                mac.update(signing_suffix)
+                signature = mac.digest()
+        elif self._signer is not None:
+            with profiler.phase("sign.signature"):
+                signature = self._signer.sign(prefix + signing_suffix, self._prepared_key)
+        else:
+            signature = b''
+
+        return (prefix + signing_suffix + b'.' + b64url_encode(signature)).decode('ascii')
+
+    def _prefix(self, header_segment: bytes, aligned: int) -> Tuple[bytes, Any]:
+        """
+        Signing-input prefix up to an aligned payload offset, with the HMAC state after it
+        """
+        cache_key = (header_segment, aligned)
+        cached = self._prefixes.get(cache_key)
+        if cached is None:
+            if len(self._prefixes) >= MAX_PREFIX_CACHE:
+                self._prefixes.clear()
+            prefix = header_segment + b'.' + b64url_encode(self._payload.data[:aligned])
+            mac = None
+            if self._hmac_state is not None:
+                mac = self._hmac_state.copy()
+                mac.update(prefix)
+            cached = self._prefixes[cache_key] = (prefix, mac)
+        return cached
+
 
 class JWTEncoder:
     @staticmethod
@@ -10,7 +323,7 @@ class JWTEncoder:
         try:
             # Ensure algorithm is set to 'none'
             header['alg'] = 'none'
-            return jwt.encode(payload, None, algorithm='none', headers=header)
+            return TokenMinter(header, payload, None, 'none').mint()
         except Exception as e:
             raise ValueError(f"Error creating JWT: {str(e)}")
 
@@ -23,25 +336,44 @@ class JWTEncoder:
         try:
             # Ensure correct algorithm is set in header
             header['alg'] = algorithm
-            return jwt.encode(payload, secret_key, algorithm=algorithm, headers=header)
+            return TokenMinter(header, payload, secret_key, algorithm).mint()
         except Exception as e:
             raise ValueError(f"Error creating JWT: {str(e)}")
 
     @staticmethod
     def create_token_rs(header: Dict[str, Any], payload: Dict[str, Any],
-                       private_key: str, algorithm: str = 'RS256') -> str:
+                       private_key: Any, algorithm: str = 'RS256') -> str:
         """
-        Create a JWT using RSA algorithm
+        Create a JWT using an RSA, RSA-PSS, ECDSA or EdDSA algorithm
         """
         try:
+            import jwt
+            from key_cache import key_registry
             # Ensure correct algorithm is set in header
             header['alg'] = algorithm
-            return jwt.encode(payload, private_key, algorithm=algorithm, headers=header)
+            with profiler.phase("sign.key"):
+                private_key = key_registry.resolve(private_key)
+            with profiler.phase("sign.pyjwt"):
+                return jwt.encode(payload, private_key, algorithm=algorithm, headers=header)
+        except Exception as e:
+            raise ValueError(f"Error creating JWT: {str(e)}")
+
+    @staticmethod
+    def create_token_from_pool(header: Dict[str, Any], payload: Dict[str, Any], pool: Any,
+                               algorithm: str = 'RS256', spec: Optional[str] = None,
+                               consume: bool = False) -> str:
+        """
+        Create a JWT signed with a pre-generated key drawn from a KeyPool, setting kid
+        """
+        try:
+            entry = pool.draw(algorithm, spec, consume)
+            header['kid'] = entry['kid']
+            return TokenMinter(header, payload, pool.private_key(entry), algorithm).mint()
         except Exception as e:
             raise ValueError(f"Error creating JWT: {str(e)}")
 
     @staticmethod
-    def update_token(original_token: str, new_header: Optional[Dict[str, Any]] = None,
+    def update_token(original_token: Union[Token, str, None], new_header: Optional[Dict[str, Any]] = None,
                     new_payload: Optional[Dict[str, Any]] = None,
                     key: Optional[str] = None, algorithm: Optional[str] = None) -> str:
         """
@@ -49,26 +381,73 @@ class JWTEncoder:
         """
         try:
             # If no new header/payload provided, use existing ones
-            if not new_header or not new_payload:
-                old_header = jwt.get_unverified_header(original_token)
-                old_payload = jwt.decode(original_token, options={"verify_signature": False})
-                
+            if new_header is None or new_payload is None:
+                old_header, old_payload, _ = JWTDecoder.decode_without_verification(original_token)
+                # The alg is rewritten below, so never touch a Token's cached header
+                old_header = dict(old_header)
+
             header = new_header if new_header is not None else old_header
             payload = new_payload if new_payload is not None else old_payload
             
             # Determine algorithm
             if not algorithm:
                 algorithm = header.get('alg', 'HS256')
+            if algorithm.lower() == 'none':
+                algorithm = 'none'
+            elif algorithm not in HMAC_DIGESTS and not is_asymmetric(algorithm):
+                raise ValueError(f"Unsupported algorithm: {algorithm}")
+
+            # Edit the original bytes in place when there is a token to start from
+            if original_token is not None:
+                token = Token.coerce(original_token)
+                header_updates, header_removed = _diff_members(token.header, header)
+                payload_updates, payload_removed = _diff_members(token.payload, payload)
+                encoder = IncrementalEncoder(token, key, algorithm)
+                return encoder.encode(payload_updates, payload_removed, header_updates, header_removed)
 
             # Create new token based on algorithm
-            if algorithm.lower() == 'none':
+            if algorithm == 'none':
                 return JWTEncoder.create_token_none_alg(header, payload)
             elif algorithm.startswith('HS'):
                 return JWTEncoder.create_token_hs(header, payload, key, algorithm)
-            elif algorithm.startswith('RS'):
-                return JWTEncoder.create_token_rs(header, payload, key, algorithm)
             else:
-                raise ValueError(f"Unsupported algorithm: {algorithm}")
+                return JWTEncoder.create_token_rs(header, payload, key, algorithm)
                 
         except Exception as e:
-            raise ValueError(f"Error updating JWT: {str(e)}")
\ No newline at end of file
+            raise ValueError(f"Error updating JWT: {str(e)}")
+
+    @staticmethod
+    def mint_tokens(header: Dict[str, Any], payload_template: Dict[str, Any],
+                    claims: Iterable[Dict[str, Any]], key: Any = None, algorithm: str = 'HS256',
+                    workers: int = 1, chunk_size: int = DEFAULT_MINT_CHUNK_SIZE) -> Iterator[str]:
+        """
+        Stream signed tokens built from a template and a sequence of claim overrides
+        """
+        try:
+            minter = TokenMinter(header, payload_template, key, algorithm)
+        except Exception as e:
+            raise ValueError(f"Error creating JWT: {str(e)}")
+
+        # HMAC and 'none' are cheaper than pickling work to another process
+        if workers <= 1 or not minter.is_asymmetric:
+            for claim_set in claims:
+                yield minter.mint(claim_set)
+            return
+
+        from concurrent.futures import ProcessPoolExecutor
+        max_pending = workers * 2
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_mint_worker,
+                                 initargs=(header, payload_template, minter.portable_key(), algorithm)) as pool:
+            pending = deque()
+            chunk = []
+            for claim_set in claims:
+                chunk.append(claim_set)
+                if len(chunk) >= chunk_size:
+                    pending.append(pool.submit(_mint_chunk, chunk))
+                    chunk = []
+                    if len(pending) >= max_pending:
+                        yield from pending.popleft().result()
+            if chunk:
+                pending.append(pool.submit(_mint_chunk, chunk))
+            while pending:
+                yield from pending.popleft().result()
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+import argparse
+import json
+import mmap
+import os
+import re
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from jwt_token import Token
+
+# Bytes of input scanned per work unit
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+
+# How far a range is read past its end to finish a token that starts inside it;
+# only a header and payload longer than this together can be missed at a boundary
+OVERLAP = 1024 * 1024
+
+# A JSON header always base64url-encodes to 'eyJ'. The pattern starts with that literal
+# so the regex engine can skip ahead with a fast substring search; a lookbehind for the
+# token boundary would disable that and run some 30x slower, so the byte before a match
+# is checked by hand instead.
+JWT_PATTERN = re.compile(rb'eyJ[A-Za-z0-9_-]+\.[A-Za-z0-9_-]+\.[A-Za-z0-9_-]*')
+
+# Bytes that continue a token; a match preceded by one starts mid-token
+_TOKEN_BYTES = frozenset(b'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789-_.')
+
+
+def dedupe_key(token: bytes) -> bytes:
+    """
+    The signature identifies a token; unsigned tokens are compared whole
+    """
+    return token.rpartition(b'.')[2] or token
+
+
+def _is_jwt(token: bytes) -> bool:
+    """
+    Whether the header decodes to a JSON object, which weeds out look-alike strings
+    """
+    try:
+        Token(token).header
+    except ValueError:
+        return False
+    return True
+
+
+def scan(buffer: Any, start: int, end: int) -> List[bytes]:
+    """
+    Tokens that start in buffer[start:end], in order and unique by signature. A token
+    running past end is read to its real end, and one that started before start is
+    left to the previous range, so adjacent ranges never split or repeat a token.
+    """
+    size = len(buffer)
+    limit = min(end + OVERLAP, size)
+    seen = set()
+    tokens = []
+    for match in JWT_PATTERN.finditer(buffer, start, limit):
+        position = match.start()
+        if position >= end:
+            break
+        if position and buffer[position - 1] in _TOKEN_BYTES:
+            continue
+        token = match.group()
+        if match.end() == limit and limit < size:
+            token = JWT_PATTERN.match(buffer, position).group()
+        key = dedupe_key(token)
+        if key not in seen and _is_jwt(token):
+            seen.add(key)
+            tokens.append(token)
+    return tokens
+
+
+def _scan_file_range(path: str, start: int, end: int) -> List[bytes]:
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+        return scan(buffer, start, end)
+
+
+def _ranges(size: int, chunk_size: int) -> Iterator[Tuple[int, int]]:
+    for start in range(0, size, chunk_size):
+        yield start, min(start + chunk_size, size)
+
+
+class TokenExtractor:
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        """
+        Pull every JWT out of logs, HAR files and proxy dumps, unique by signature
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.bytes_scanned = 0
+        self.found = 0
+        self.unique = 0
+        self._seen = set()
+
+    def extract(self, paths: Iterable[str]) -> Iterator[str]:
+        """
+        Yield the unique tokens of every file ('-' for stdin) in input order
+        """
+        for path in paths:
+            for token in self._extract_one(path):
+                self.found += 1
+                key = dedupe_key(token)
+                if key not in self._seen:
+                    self._seen.add(key)
+                    self.unique += 1
+                    yield token.decode('ascii')
+
+    def _extract_one(self, path: str) -> Iterator[bytes]:
+        if path == '-':
+            data = sys.stdin.buffer.read()
+            self.bytes_scanned += len(data)
+            yield from scan(data, 0, len(data))
+            return
+
+        size = os.path.getsize(path)
+        if size == 0:
+            return
+        if self.workers <= 1 or size <= self.chunk_size:
+            with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+                if hasattr(buffer, "madvise"):
+                    buffer.madvise(mmap.MADV_SEQUENTIAL)
+                for start, end in _ranges(size, self.chunk_size):
+                    yield from scan(buffer, start, end)
+                    self.bytes_scanned += end - start
+            return
+
+        # Each worker maps the file itself, so only the offsets and the tokens found
+        # cross process boundaries; a bounded window of ranges keeps results in order
+        max_pending = self.workers * 2
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            pending = deque()
+            for start, end in _ranges(size, self.chunk_size):
+                pending.append((pool.submit(_scan_file_range, path, start, end), end - start))
+                if len(pending) >= max_pending:
+                    yield from self._collect(pending.popleft())
+            while pending:
+                yield from self._collect(pending.popleft())
+
+    def _collect(self, item: Tuple[Any, int]) -> List[bytes]:
+        future, length = item
+        tokens = future.result()
+        self.bytes_scanned += length
+        return tokens
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Extract unique JWTs from logs, HAR exports and proxy dumps, one per line")
+    parser.add_argument("inputs", nargs="+", help="Files to scan ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="Output file (default: stdout)")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help="Bytes scanned per work unit")
+    parser.add_argument("--decode", action="store_true",
+                        help="Decode the tokens with the batch processor and write its NDJSON records instead")
+    parser.add_argument("-s", "--secret", help="With --decode: verify HS256/384/512 tokens with this secret")
+    parser.add_argument("-k", "--public-key", help="With --decode: verify RS256/384/512 tokens with this key file")
+    parser.add_argument("--jwks", metavar="PATH", help="With --decode: verify against a JWKS file or key directory")
+    args = parser.parse_args(argv)
+
+    extractor = TokenExtractor(args.workers, args.chunk_size)
+    tokens: Iterable[Any] = extractor.extract(args.inputs)
+    if args.decode:
+        from batch_processor import BatchProcessor
+        public_key = None
+        try:
+            if args.public_key:
+                with open(args.public_key, 'r') as f:
+                    public_key = f.read()
+            processor = BatchProcessor(args.secret, public_key, True, args.jwks)
+        except (OSError, ValueError) as e:
+            print(f"Error: {e}", file=sys.stderr)
+            return 2
+        # Numbered by position in the token stream, as if it had been piped into batch
+        tokens = (json.dumps(record, separators=(',', ':'))
+                  for record in processor.process_stream(enumerate(tokens, 1)))
+
+    start = time.perf_counter()
+    sink = sys.stdout if args.output == '-' else open(args.output, 'w')
+    try:
+        for line in tokens:
+            sink.write(line)
+            sink.write("\n")
+    except BrokenPipeError:
+        return 0
+    except OSError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+
+    elapsed = time.perf_counter() - start
+    rate = extractor.bytes_scanned / elapsed / 1e6 if elapsed > 0 else 0.0
+    print(f"{extractor.unique:,} unique of {extractor.found:,} tokens in "
+          f"{extractor.bytes_scanned / 1e6:,.1f} MB ({elapsed:.1f}s, {rate:,.0f} MB/s)", file=sys.stderr)
+    return 0 if extractor.unique else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,36 +1,65 @@
 #!/usr/bin/env python3
-import pyperclip
-from jwt_decoder import JWTDecoder
+import argparse
+import json
+import sys
+from jwt_decoder import JWTDecoder, is_asymmetric
 from jwt_encoder import JWTEncoder
 from input_handler import InputHandler
-from ui_formatter import UIFormatter
-import time
+from jwt_token import Token
+from typing import Any, List, Optional
+
+# rich and pyperclip are only imported for interactive mode, and PyJWT/cryptography
+# only once a signature has to be checked or produced, so scripted calls start fast
+
+# Subcommands implemented by the standalone tools, dispatched with their own arguments
+DELEGATED_COMMANDS = {
+    "crack": ("jwt_cracker", "Crack HS secrets with a wordlist"),
+    "mask": ("mask_attack", "Brute-force short HS secrets with a mask"),
+    "batch": ("batch_processor", "Decode/verify tokens in bulk as NDJSON"),
+    "extract": ("jwt_extractor", "Extract unique tokens from logs, HAR files and proxy dumps"),
+    "index": ("claim_index", "Index the claims of a token corpus and query them"),
+    "mint": ("bulk_mint", "Mint large sets of tokens from a template"),
+    "variants": ("variant_generator", "Generate attack variants of a token"),
+    "confusion": ("alg_confusion", "Re-sign RS/ES tokens as HS with public key encodings"),
+    "recover": ("rsa_recovery", "Recover an RSA public key from signed tokens"),
+    "replay": ("token_replay", "Send tokens to an HTTP endpoint and classify responses"),
+}
+
+# Options accepted before a delegated command, with the number of argv entries each takes
+# ('--cprofile=FILE' takes one)
+GLOBAL_OPTIONS = {"--interactive": 1, "--profile": 1, "--cprofile": 2}
 
 class JWTModifier:
     def __init__(self):
+        from ui_formatter import UIFormatter
         self.ui = UIFormatter()
         self.input_handler = InputHandler()
         self.decoder = JWTDecoder()
         self.encoder = JWTEncoder()
+        from results_store import open_store
+        self.store = open_store()
 
     def run(self):
         try:
-            self.ui.display_header("JWT MODIFIER")
+            self.ui.display_screen("JWT MODIFIER")
             
             # Get initial JWT input
             jwt_token = self.input_handler.get_jwt_input()
             
             # Decode and display JWT info
-            header, payload, algorithm = self.decoder.decode_without_verification(jwt_token)
-            self.ui.display_jwt_details(header, payload, jwt_token.split('.')[2])
+            token = self.decoder.parse_token(jwt_token)
+            header, payload, algorithm = token.header, token.payload, token.algorithm
+            self.ui.display_token(token)
+            if self.store is not None:
+                self.store.record_token(token)
             
             # Process based on algorithm
             if algorithm.lower() == 'none':
-                self.handle_none_algorithm(header, payload)
+                self.handle_none_algorithm(token, header, payload)
             elif algorithm.startswith('HS'):
-                self.handle_hs_algorithm(jwt_token, header, payload, algorithm)
-            elif algorithm.startswith('RS'):
-                self.handle_rs_algorithm(jwt_token, header, payload, algorithm)
+                self.handle_hs_algorithm(token, header, payload, algorithm)
+            elif is_asymmetric(algorithm):
+                self.handle_rs_algorithm(token, header, payload, algorithm)
             else:
                 self.ui.display_error(f"Algorithm {algorithm} not supported")
                 
@@ -39,22 +68,22 @@ class JWTModifier:
         except Exception as e:
             self.ui.display_error(str(e))
 
-    def show_main_menu(self, header: dict, payload: dict, key: str = None, algorithm: str = None):
-        current_header = header.copy()
-        current_payload = payload.copy()
+    def show_main_menu(self, token: Token, header: dict, payload: dict, key: str = None, algorithm: str = None):
+        # modify_json returns edited copies, so the decoded dicts can be used as-is
+        current_header = header
+        current_payload = payload
         
         while True:
-            self.ui.clear_screen()
             options = {
                 "1": "View JWT",
                 "2": "Modify Header",
                 "3": "Modify Payload",
                 "4": "Generate New JWT",
-                "5": "Exit"
+                "5": "Replay JWT Against Endpoint",
+                "6": "Exit"
             }
             
-            self.ui.display_header("MAIN MENU")
-            self.ui.display_menu(options)
+            self.ui.display_screen("MAIN MENU", "\n", self.ui.menu_table(options))
             
             choice = self.input_handler.get_menu_choice(options)
             
@@ -63,45 +92,92 @@ class JWTModifier:
                 # Pause to show details
                 input("\nPress Enter to continue...")
             elif choice == "2":
-                self.ui.clear_screen()
-                self.ui.display_header("MODIFY HEADER")
+                self.ui.display_screen("MODIFY HEADER")
                 new_header = self.input_handler.modify_json(current_header, "header")
                 if new_header != current_header:
                     current_header = new_header
                     algorithm = current_header.get('alg', algorithm)
-                    self.ui.display_success("Header updated!")
-                    time.sleep(1)  # Show success message briefly
+                    self.ui.set_status("Header updated!")
             elif choice == "3":
-                self.ui.clear_screen()
-                self.ui.display_header("MODIFY PAYLOAD")
+                self.ui.display_screen("MODIFY PAYLOAD")
                 new_payload = self.input_handler.modify_json(current_payload, "payload")
                 if new_payload != current_payload:
                     current_payload = new_payload
-                    self.ui.display_success("Payload updated!")
-                    time.sleep(1)  # Show success message briefly
+                    self.ui.set_status("Payload updated!")
             elif choice == "4":
-                new_jwt = self.encoder.update_token(None, current_header, current_payload, key, algorithm)
+                # Edits are applied to the original token's bytes, so untouched members keep their encoding
+                new_jwt = self.encoder.update_token(token, current_header, current_payload, key, algorithm)
                 self.ui.display_new_jwt(new_jwt)
+                import pyperclip
                 pyperclip.copy(new_jwt)
                 input("\nPress Enter to continue...")
+            elif choice == "5":
+                new_jwt = self.encoder.update_token(token, current_header, current_payload, key, algorithm)
+                self.replay_token(new_jwt)
+                input("\nPress Enter to continue...")
             else:  # Exit
                 break
 
-    def handle_none_algorithm(self, header: dict, payload: dict):
-        self.ui.display_success("'none' algorithm detected. Direct modification allowed.")
-        time.sleep(1)  # Show message briefly
-        self.show_main_menu(header, payload, None, 'none')
+    def replay_token(self, jwt_token: str):
+        import asyncio
+        from token_replay import TokenReplayer
+
+        url = self.input_handler.get_url("Enter target URL")
+        header_name = input("Header carrying the token (default 'Authorization', 'cookie:NAME' for a cookie): ").strip()
+        cookie = header_name[len("cookie:"):] if header_name.lower().startswith("cookie:") else None
+
+        async def send_once():
+            return [result async for result in replayer.replay([("current token", jwt_token)])]
+
+        try:
+            replayer = TokenReplayer(url, header_name or "Authorization", cookie=cookie, concurrency=1)
+            result = asyncio.run(send_once())[0]
+        except ValueError as e:
+            self.ui.display_error(str(e))
+            return
+
+        if "error" in result:
+            self.ui.display_error(f"Request failed: {result['error']}")
+        else:
+            self.ui.display_success(
+                f"HTTP {result['status']}, {result['length']} bytes (body {result['body_hash']}) "
+                f"in {result['elapsed_ms']} ms")
+
+    def handle_none_algorithm(self, token: Token, header: dict, payload: dict):
+        self.ui.set_status("'none' algorithm detected. Direct modification allowed.")
+        self.show_main_menu(token, header, payload, None, 'none')
+
+    def handle_hs_algorithm(self, token: Token, header: dict, payload: dict, algorithm: str):
+        known = self.decoder.lookup_known_key(token, self.store)
+        if known is not None:
+            secret_key = _secret_text(known)
+            self.ui.set_status(f"Secret known from an earlier run: {secret_key}")
+            self.show_main_menu(token, header, payload, secret_key, algorithm)
+            return
 
-    def handle_hs_algorithm(self, jwt_token: str, header: dict, payload: dict, algorithm: str):
         self.ui.display_warning(f"{algorithm} algorithm detected. Secret key required for verification.")
         
+        options = {
+            "1": "Enter secret key",
+            "2": "Crack secret with wordlist",
+            "3": "Brute-force secret with mask"
+        }
+        self.ui.display_menu(options)
+        choice = self.input_handler.get_menu_choice(options)
+        if choice in ("2", "3"):
+            secret_key = self.crack_hs_secret(token) if choice == "2" else self.mask_hs_secret(token)
+            if secret_key is not None:
+                self.show_main_menu(token, header, payload, secret_key, algorithm)
+                return
+
         while True:
             try:
                 secret_key = self.input_handler.get_secret_key()
-                if self.decoder.verify_hs_token(jwt_token, secret_key):
-                    self.ui.display_success("Verification Successful! Valid JWT.")
-                    time.sleep(1)  # Show success message briefly
-                    self.show_main_menu(header, payload, secret_key, algorithm)
+                if self.decoder.verify_signature(token, secret_key):
+                    self.ui.set_status("Verification Successful! Valid JWT.")
+                    if self.store is not None:
+                        self.store.record_secret(token, secret_key, "entered")
+                    self.show_main_menu(token, header, payload, secret_key, algorithm)
                     break
                 else:
                     self.ui.display_error("Invalid secret key. Verification failed.")
@@ -110,24 +186,103 @@ class JWTModifier:
             except KeyboardInterrupt:
                 break
 
-    def handle_rs_algorithm(self, jwt_token: str, header: dict, payload: dict, algorithm: str):
+    def crack_hs_secret(self, token: Token):
+        from jwt_cracker import JWTCracker, iter_wordlist, format_rate
+        wordlist_path = self.input_handler.get_file_path("Enter path to wordlist file")
+        rule_specs = input("Mangling rules (e.g. 'default', 'leet,years' or a .rule file, blank for none): ").strip()
+
+        def report(tested: int, elapsed: float) -> None:
+            print(f"\r{format_rate(tested, elapsed)}", end="", flush=True)
+
+        try:
+            candidates = iter_wordlist(wordlist_path)
+            if rule_specs:
+                from candidate_rules import RuleEngine, load_rules, parse_rule_specs
+                candidates = RuleEngine(load_rules(parse_rule_specs([rule_specs]))).candidates(candidates)
+            result = JWTCracker(token).crack(candidates, progress=report)
+        except FileNotFoundError:
+            self.ui.display_error("Wordlist file not found.")
+            return None
+        except ValueError as e:
+            self.ui.display_error(str(e))
+            return None
+        except KeyboardInterrupt:
+            self.ui.display_warning("Cracking interrupted")
+            return None
+        print()
+        return self._crack_outcome(token, result, "wordlist")
+
+    def mask_hs_secret(self, token: Token):
+        from jwt_cracker import JWTCracker
+        from mask_attack import MaskAttack, expand_masks, format_progress
+        mask = input("Mask (e.g. ?l?l?d?d?d; ?l ?u ?d ?h ?s ?a, other characters literal): ").strip()
+        increment = self.input_handler.confirm_action("Also try shorter lengths?")
+
+        try:
+            attack = MaskAttack(expand_masks(mask, min_length=1 if increment else None))
+            cracker = JWTCracker(token)
+        except ValueError as e:
+            self.ui.display_error(str(e))
+            return None
+
+        def report(tested: int, elapsed: float) -> None:
+            print(f"\r{format_progress(tested, attack.keyspace, elapsed)}", end="", flush=True)
+
+        try:
+            result = attack.crack(cracker, progress=report)
+        except KeyboardInterrupt:
+            self.ui.display_warning("Cracking interrupted")
+            return None
+        print()
+        return self._crack_outcome(token, result, "mask")
+
+    def _crack_outcome(self, token: Token, result, source: str):
+        from jwt_cracker import format_rate
+        if result.secret is None:
+            self.ui.display_error(f"Secret not found ({format_rate(result.tested, result.elapsed)})")
+            return None
+        if self.store is not None:
+            self.store.record_secret(token, result.secret, source)
+        secret_key = _secret_text(result.secret)
+        self.ui.set_status(f"Secret found: {secret_key} ({format_rate(result.tested, result.elapsed)})")
+        return secret_key
+
+    def handle_rs_algorithm(self, token: Token, header: dict, payload: dict, algorithm: str):
+        from jwks import load_key_set, make_entry
+        known = self.decoder.lookup_known_key(token, self.store)
+        if known is not None:
+            self.ui.display_success("Verified with a public key known from an earlier run.")
+            self.continue_rs_algorithm(make_entry(known, "results store"), token, header, payload, algorithm)
+            return
+
         self.ui.display_warning(f"{algorithm} algorithm detected. Public key required for verification.")
-        
+
+        recovered_path = None
+        # Key recovery works on PKCS#1 v1.5 signatures only
+        if algorithm.startswith('RS'):
+            options = {
+                "1": "Enter public key file",
+                "2": "Recover public key from other tokens signed with it"
+            }
+            self.ui.display_menu(options)
+            if self.input_handler.get_menu_choice(options) == "2":
+                recovered_path = self.recover_rs_public_key(token)
+
         while True:
             try:
-                public_key_path = self.input_handler.get_file_path("Enter path to public key file")
-                with open(public_key_path, 'r') as f:
-                    public_key = f.read()
-                
-                if self.decoder.verify_rs_token(jwt_token, public_key):
-                    self.ui.display_success("Verification Successful! Valid JWT.")
-                    time.sleep(1)  # Show success message briefly
-                    
-                    private_key_path = self.input_handler.get_file_path("Enter path to private key file")
-                    with open(private_key_path, 'r') as f:
-                        private_key = f.read()
-                    
-                    self.show_main_menu(header, payload, private_key, algorithm)
+                public_key_path = recovered_path or self.input_handler.get_file_path(
+                    "Enter path to public key, JWKS file or key directory")
+                recovered_path = None
+                key_set = load_key_set(public_key_path)
+                entry = key_set.find(token)
+
+                # find() has already checked the signature against the key it returns
+                if entry is not None:
+                    matched = f" (key {entry.kid})" if len(key_set) > 1 and entry.kid else ""
+                    self.ui.display_success(f"Verification Successful! Valid JWT.{matched}")
+                    if self.store is not None:
+                        self.store.record_key(token, entry.key)
+                    self.continue_rs_algorithm(entry, token, header, payload, algorithm)
                     break
                 else:
                     self.ui.display_error("Invalid public key. Verification failed.")
@@ -144,6 +299,275 @@ class JWTModifier:
                 if not self.input_handler.confirm_action("Try again?"):
                     break
 
+    def continue_rs_algorithm(self, entry: Any, token: Token, header: dict, payload: dict, algorithm: str):
+        from key_cache import key_registry
+        options = {
+            "1": "Enter private key to re-sign",
+            "2": "Algorithm confusion: sign as HS with the public key"
+        }
+        self.ui.display_menu(options)
+        if self.input_handler.get_menu_choice(options) == "2":
+            self.confuse_rs_algorithm(entry, token, header, payload)
+            return
+
+        while True:
+            try:
+                private_key_path = self.input_handler.get_file_path("Enter path to private key file")
+                private_key = key_registry.load_file(private_key_path)
+                break
+            except FileNotFoundError:
+                self.ui.display_error("Key file not found.")
+            except ValueError as e:
+                self.ui.display_error(f"Error: {str(e)}")
+            if not self.input_handler.confirm_action("Try again?"):
+                return
+        self.show_main_menu(token, header, payload, private_key, algorithm)
+
+    def recover_rs_public_key(self, token: Token):
+        from rsa_recovery import DEFAULT_OUTPUT, RSAKeyRecovery
+        others = input("Other tokens signed with the same key (space-separated): ").split()
+
+        def report(message: str, elapsed: float) -> None:
+            print(f"\r[{elapsed:6.1f}s] {message}\033[K", end="", flush=True)
+
+        try:
+            key = RSAKeyRecovery([token, *others]).recover(progress=report)
+        except ValueError as e:
+            print()
+            self.ui.display_error(str(e))
+            return None
+        except KeyboardInterrupt:
+            print()
+            self.ui.display_warning("Recovery interrupted")
+            return None
+        print()
+
+        import os
+        while True:
+            path = input(f"\nSave the public key to [{DEFAULT_OUTPUT}]: ").strip() or DEFAULT_OUTPUT
+            if os.path.exists(path) and not self.input_handler.confirm_action(f"{path} already exists. Overwrite it?"):
+                continue
+            try:
+                with open(path, 'wb') as f:
+                    f.write(key.to_pem())
+                break
+            except OSError as e:
+                self.ui.display_error(f"Error: {str(e)}")
+        self.ui.display_success(f"Recovered {key.n.bit_length()}-bit public key (e={key.e}) "
+                                f"in {key.elapsed:.1f}s, saved to {path}")
+        return path
+
+    def confuse_rs_algorithm(self, entry: Any, token: Token, header: dict, payload: dict):
+        from alg_confusion import key_variants, load_key_variants
+        try:
+            # Keeps the exact bytes of a single-key file as one of the variants
+            variants = load_key_variants(entry.source)
+        except (OSError, ValueError):
+            variants = key_variants(entry.key)
+        options = {str(number): variant.name for number, variant in enumerate(variants, 1)}
+        self.ui.display_screen("PUBLIC KEY ENCODINGS", "\n", self.ui.menu_table(options))
+        variant = variants[int(self.input_handler.get_menu_choice(options)) - 1]
+        self.ui.set_status(f"Signing with HS256 using the {variant.name} ({len(variant.secret)} bytes) as secret")
+        self.show_main_menu(token, {**header, "alg": "HS256"}, payload, variant.secret, "HS256")
+
+
+def _secret_text(secret: bytes) -> Any:
+    # Secrets that are not UTF-8 are kept as bytes so re-signing still uses the exact key
+    try:
+        return secret.decode('utf-8')
+    except UnicodeDecodeError:
+        return secret
+
+
+def _read_token(value: str) -> str:
+    return sys.stdin.readline().strip() if value == '-' else value.strip()
+
+
+def _load_key(args: argparse.Namespace) -> Any:
+    if args.secret is not None:
+        return args.secret
+    if args.key:
+        from key_cache import key_registry
+        return key_registry.load_file(args.key)
+    return None
+
+
+def _signing_key(args: argparse.Namespace, algorithm: str) -> Any:
+    if algorithm.lower() == 'none':
+        return None
+    key = _load_key(args)
+    if key is None:
+        raise ValueError(f"{algorithm} requires --secret or --key")
+    return key
+
+
+def _parse_assignments(assignments: List[str]) -> dict:
+    fields = {}
+    for assignment in assignments:
+        name, separator, value = assignment.partition('=')
+        if not separator or not name:
+            raise ValueError(f"Expected NAME=VALUE, got '{assignment}'")
+        fields[name] = InputHandler.parse_field_value(value)
+    return fields
+
+
+def cmd_decode(args: argparse.Namespace) -> int:
+    parsed = JWTDecoder.parse_token(_read_token(args.token))
+    print(json.dumps({
+        "header": parsed.header,
+        "payload": parsed.payload,
+        "signature": parsed.signature_segment.decode('ascii'),
+        # Straight from the header, so a malformed alg is shown rather than rejected
+        "alg": parsed.header.get('alg', 'none'),
+    }, indent=None if args.compact else 2))
+    return 0
+
+
+def cmd_verify(args: argparse.Namespace) -> int:
+    parsed = JWTDecoder.parse_token(_read_token(args.token))
+    if args.jwks:
+        entry = JWTDecoder.load_key_set(args.jwks).find(parsed)
+        print(f"valid (kid {entry.kid or '-'}, {entry.source})" if entry else "invalid")
+        return 0 if entry else 1
+    store = None
+    if not args.no_store:
+        from results_store import open_store
+        store = open_store()
+    key = _load_key(args)
+    if key is None:
+        if store is None:
+            raise ValueError("verify requires --secret, --key or --jwks")
+        if JWTDecoder.lookup_known_key(parsed, store) is None:
+            raise ValueError("verify requires --secret, --key or --jwks when the results store has no key for the token")
+        print("valid (key from the results store)")
+        return 0
+    valid = JWTDecoder.verify_signature(parsed, key)
+    if valid and store is not None:
+        if args.secret is not None:
+            store.record_secret(parsed, key, "verified")
+        else:
+            store.record_key(parsed, key, "verified")
+    print("valid" if valid else "invalid")
+    return 0 if valid else 1
+
+
+def cmd_sign(args: argparse.Namespace) -> int:
+    header = json.loads(args.header)
+    payload = json.loads(args.payload)
+    algorithm = args.algorithm or header.get('alg', 'HS256')
+    print(JWTEncoder.update_token(None, header, payload, _signing_key(args, algorithm), algorithm))
+    return 0
+
+
+def cmd_modify(args: argparse.Namespace) -> int:
+    token = JWTDecoder.parse_token(_read_token(args.token))
+    header = {**token.header, **_parse_assignments(args.header_set)}
+    payload = {**token.payload, **_parse_assignments(args.set)}
+    for name in args.unset:
+        payload.pop(name, None)
+    algorithm = args.algorithm or header.get('alg', token.algorithm)
+    # Passing the original token keeps its bytes wherever nothing changed
+    print(JWTEncoder.update_token(token, header, payload, _signing_key(args, algorithm), algorithm))
+    return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(description="Analyze and modify JWTs. Run without arguments for interactive mode.")
+    parser.add_argument("--interactive", action="store_true", help="Start the interactive menu")
+    parser.add_argument("--profile", action="store_true",
+                        help="Print per-phase timings, call counts and key-cache hit rates when done")
+    parser.add_argument("--cprofile", metavar="FILE", help="Save a cProfile capture of the run to FILE")
+    subparsers = parser.add_subparsers(dest="command", metavar="command")
+
+    def add_key_options(subparser: argparse.ArgumentParser) -> None:
+        subparser.add_argument("-s", "--secret", help="HMAC secret")
+        subparser.add_argument("-k", "--key", help="PEM/DER/JWK key file")
+
+    decode = subparsers.add_parser("decode", help="Print header, payload and signature as JSON")
+    decode.add_argument("token", help="JWT, or '-' to read it from stdin")
+    decode.add_argument("--compact", action="store_true", help="Single-line JSON output")
+    decode.set_defaults(handler=cmd_decode)
+
+    verify = subparsers.add_parser("verify", help="Check a token signature (exit status 1 if invalid)")
+    verify.add_argument("token", help="JWT, or '-' to read it from stdin")
+    add_key_options(verify)
+    verify.add_argument("--jwks", metavar="PATH", help="JWKS file or directory of keys; the key is picked by kid")
+    verify.add_argument("--no-store", action="store_true",
+                        help="Neither consult nor update the results store ($JWT_RESULTS_DB)")
+    verify.set_defaults(handler=cmd_verify)
+
+    sign = subparsers.add_parser("sign", help="Create a token from header and payload JSON")
+    sign.add_argument("--header", default="{}", help="Header JSON")
+    sign.add_argument("--payload", default="{}", help="Payload JSON")
+    sign.add_argument("-a", "--algorithm", help="Signing algorithm (default: header alg or HS256)")
+    add_key_options(sign)
+    sign.set_defaults(handler=cmd_sign)
+
+    modify = subparsers.add_parser("modify", help="Edit claims of a token and re-sign it")
+    modify.add_argument("token", help="JWT, or '-' to read it from stdin")
+    modify.add_argument("--set", action="append", default=[], metavar="NAME=VALUE", help="Set a payload claim")
+    modify.add_argument("--unset", action="append", default=[], metavar="NAME", help="Remove a payload claim")
+    modify.add_argument("--header-set", action="append", default=[], metavar="NAME=VALUE",
+                        help="Set a header field")
+    modify.add_argument("-a", "--algorithm", help="Re-sign with this algorithm (default: header alg)")
+    add_key_options(modify)
+    modify.set_defaults(handler=cmd_modify)
+
+    for name, (_, description) in DELEGATED_COMMANDS.items():
+        subparsers.add_parser(name, help=f"{description} (see '{name} --help')", add_help=False)
+
+    return parser
+
+
+def _report_profile(summary: dict, ui: Any = None) -> None:
+    if ui is not None:
+        ui.display_profile(summary)
+    else:
+        print(json.dumps({"profile": summary}), file=sys.stderr)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+
+    # Global options may precede a delegated command, e.g. '--profile batch tokens.txt'
+    position = 0
+    while position < len(argv):
+        name, separator, _ = argv[position].partition("=")
+        if name not in GLOBAL_OPTIONS:
+            break
+        position += 1 if separator else GLOBAL_OPTIONS[name]
+
+    parser = build_parser()
+    delegated = position < len(argv) and argv[position] in DELEGATED_COMMANDS
+    args = parser.parse_args(argv[:position] if delegated else argv)
+
+    from profiling import print_cprofile, profile_run
+    ui = None
+    with profile_run(args.profile, args.cprofile) as profiler:
+        if delegated:
+            import importlib
+            module = importlib.import_module(DELEGATED_COMMANDS[argv[position]][0])
+            status = module.main(argv[position + 1:])
+        elif args.interactive or args.command is None:
+            modifier = JWTModifier()
+            ui = modifier.ui
+            modifier.run()
+            status = 0
+        else:
+            try:
+                status = args.handler(args)
+            except (ValueError, OSError) as e:
+                print(f"Error: {str(e)}", file=sys.stderr)
+                status = 2
+
+    if args.profile:
+        _report_profile(profiler.summary(), ui)
+    if args.cprofile:
+        print_cprofile(args.cprofile)
+        print(f"cProfile stats written to {args.cprofile} (view with: python -m pstats {args.cprofile})",
+              file=sys.stderr)
+    return status
+
+
 if __name__ == "__main__":
-    modifier = JWTModifier()
-    modifier.run()
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,134 @@
+import binascii
+import json
+from typing import Any, Dict, Union
+from profiling import profiler
+
+# Map base64url alphabet onto the standard one for binascii
+_URLSAFE_TO_STD = bytes.maketrans(b'-_', b'+/')
+
+# Sentinel for segments that have not been decoded yet
+_PENDING = object()
+
+
+def b64url_decode(segment: Union[str, bytes]) -> bytes:
+    """
+    Decode an unpadded base64url segment
+    """
+    if isinstance(segment, str):
+        segment = segment.encode('ascii')
+    return binascii.a2b_base64(segment.translate(_URLSAFE_TO_STD) + b'=' * (-len(segment) % 4))
+
+
+class Token:
+    """
+    A compact JWT: the raw bytes plus the two dot offsets. The header, payload and
+    signature are decoded on first access and cached, so callers that only need
+    the algorithm or the signing input never decode the payload.
+    """
+    __slots__ = ("raw", "_first_dot", "_second_dot", "_header", "_payload", "_signature", "_signing_input")
+
+    def __init__(self, token: Union[str, bytes]):
+        try:
+            raw = (token.encode('ascii') if isinstance(token, str) else bytes(token)).strip()
+        except UnicodeEncodeError as e:
+            raise ValueError(f"Invalid JWT format: {str(e)}")
+        first_dot = raw.find(b'.')
+        second_dot = raw.find(b'.', first_dot + 1) if first_dot >= 0 else -1
+        if second_dot < 0 or raw.find(b'.', second_dot + 1) >= 0:
+            raise ValueError("Invalid JWT format: expected 3 dot-separated segments")
+
+        self.raw = raw
+        self._first_dot = first_dot
+        self._second_dot = second_dot
+        self._header = _PENDING
+        self._payload = _PENDING
+        self._signature = _PENDING
+        self._signing_input = None
+
+    @classmethod
+    def coerce(cls, token: Union["Token", str, bytes]) -> "Token":
+        """
+        Return token unchanged if it is already a Token, otherwise parse it
+        """
+        return token if isinstance(token, cls) else cls(token)
+
+    @property
+    def header_segment(self) -> bytes:
+        return self.raw[:self._first_dot]
+
+    @property
+    def payload_segment(self) -> bytes:
+        return self.raw[self._first_dot + 1:self._second_dot]
+
+    @property
+    def signature_segment(self) -> bytes:
+        return self.raw[self._second_dot + 1:]
+
+    @property
+    def signing_input(self) -> bytes:
+        if self._signing_input is None:
+            self._signing_input = self.raw[:self._second_dot]
+        return self._signing_input
+
+    @property
+    def header(self) -> Dict[str, Any]:
+        if self._header is _PENDING:
+            self._header = self._decode_json(self.header_segment, "Header")
+        return self._header
+
+    @property
+    def payload(self) -> Dict[str, Any]:
+        if self._payload is _PENDING:
+            self._payload = self._decode_json(self.payload_segment, "Payload")
+        return self._payload
+
+    @property
+    def signature(self) -> bytes:
+        if self._signature is _PENDING:
+            try:
+                with profiler.phase("decode.base64"):
+                    self._signature = b64url_decode(self.signature_segment)
+            except (ValueError, binascii.Error) as e:
+                raise ValueError(f"Invalid JWT format: {str(e)}")
+        return self._signature
+
+    @property
+    def algorithm(self) -> str:
+        algorithm = self.header.get('alg', 'none')
+        if not isinstance(algorithm, str):
+            raise ValueError(f"Invalid 'alg' header: expected a string, got {type(algorithm).__name__}")
+        return algorithm
+
+    def decode(self) -> "Token":
+        """
+        Decode every segment now, raising ValueError for a malformed token
+        """
+        self.header
+        self.payload
+        self.signature
+        return self
+
+    @staticmethod
+    def _decode_json(segment: bytes, name: str) -> Dict[str, Any]:
+        try:
+            with profiler.phase("decode.base64"):
+                data = b64url_decode(segment)
+            with profiler.phase("decode.json"):
+                value = json.loads(data)
+        except (ValueError, binascii.Error) as e:
+            raise ValueError(f"Invalid JWT format: {str(e)}")
+        if not isinstance(value, dict):
+            raise ValueError(f"Invalid JWT format: {name} must be a JSON object")
+        return value
+
+    def __str__(self) -> str:
+        return self.raw.decode('ascii')
+
+    def __repr__(self) -> str:
+        return f"Token({self.raw[:32].decode('ascii', errors='replace')}...)"
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Token) and self.raw == other.raw
+
+    def __hash__(self) -> int:
+        return hash(self.raw)
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Union
+from cryptography import x509
+from cryptography.hazmat.primitives import serialization
+from jwt import PyJWK
+from jwt.exceptions import PyJWKError
+
+DEFAULT_MAX_KEYS = 128
+
+KeySource = Union[str, bytes, Dict[str, Any]]
+
+
+class KeyRegistry:
+    def __init__(self, max_size: int = DEFAULT_MAX_KEYS):
+        """
+        LRU cache of parsed key objects, keyed by file identity or key content
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._keys: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def load_file(self, path: str) -> Any:
+        """
+        Load a PEM, DER or JWK key file, re-parsing only when the file changes
+        """
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        cache_key = ('file', path, stat.st_mtime_ns, stat.st_size)
+
+        key = self._get(cache_key)
+        if key is None:
+            with open(path, 'rb') as f:
+                key = self.parse_key(f.read())
+            self._put(cache_key, key)
+        return key
+
+    def load_key(self, source: KeySource) -> Any:
+        """
+        Load a key from PEM/DER bytes, PEM text or a JWK, parsing each distinct key once
+        """
+        if isinstance(source, dict):
+            cache_key = ('jwk', json.dumps(source, sort_keys=True))
+        else:
+            # str/bytes hashes are content hashes and are cached on the object
+            cache_key = ('data', source)
+
+        key = self._get(cache_key)
+        if key is None:
+            key = self.parse_key(source)
+            self._put(cache_key, key)
+        return key
+
+    def resolve(self, key: Any) -> Any:
+        """
+        Return a parsed key object, passing through keys that are already parsed
+        """
+        if isinstance(key, (str, bytes, dict)):
+            return self.load_key(key)
+        return key
+
+    @staticmethod
+    def parse_key(source: KeySource) -> Any:
+        """
+        Parse key material into a cryptography key object
+        """
+        if isinstance(source, dict):
+            return KeyRegistry._parse_jwk(source)
+
+        data = source.encode('utf-8') if isinstance(source, str) else source
+        stripped = data.strip()
+
+        if stripped.startswith(b'{'):
+            try:
+                return KeyRegistry._parse_jwk(json.loads(stripped))
+            except json.JSONDecodeError as e:
+                raise ValueError(f"Invalid JWK: {str(e)}")
+
+        if stripped.startswith(b'-----BEGIN'):
+            if b'CERTIFICATE' in stripped.split(b'\n', 1)[0]:
+                return x509.load_pem_x509_certificate(stripped).public_key()
+            if b'PRIVATE KEY' in stripped.split(b'\n', 1)[0]:
+                return serialization.load_pem_private_key(stripped, password=None)
+            return serialization.load_pem_public_key(stripped)
+
+        if stripped.startswith(b'ssh-'):
+            return serialization.load_ssh_public_key(stripped)
+
+        # Fall back to DER, trying the common containers in turn
+        for loader in (serialization.load_der_public_key,
+                       lambda der: serialization.load_der_private_key(der, password=None),
+                       lambda der: x509.load_der_x509_certificate(der).public_key()):
+            try:
+                return loader(data)
+            except (ValueError, TypeError):
+                continue
+        raise ValueError("Unrecognized key format (expected PEM, DER or JWK)")
+
+    @staticmethod
+    def _parse_jwk(jwk: Dict[str, Any]) -> Any:
+        try:
+            return PyJWK(jwk).key
+        except PyJWKError as e:
+            raise ValueError(f"Invalid JWK: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Cache size and hit statistics
+        """
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._keys),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            self._keys.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def _get(self, cache_key: Hashable) -> Any:
+        with self._lock:
+            key = self._keys.get(cache_key)
+            if key is None:
+                self.misses += 1
+                return None
+            self._keys.move_to_end(cache_key)
+            self.hits += 1
+            return key
+
+    def _put(self, cache_key: Hashable, key: Any) -> None:
+        with self._lock:
+            self._keys[cache_key] = key
+            self._keys.move_to_end(cache_key)
+            while len(self._keys) > self.max_size:
+                self._keys.popitem(last=False)
+
+
+# Process-wide registry shared by the decoder and encoder
+key_registry = KeyRegistry()
@@ -0,0 +1,255 @@
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# Key specs the pool can generate: (JWK key type, default JWT algorithm). An RSA key
+# signs any RS or PS algorithm, while an EC curve belongs to exactly one ES algorithm.
+KEY_SPECS = {
+    "rsa2048": ("RSA", "RS256"),
+    "rsa3072": ("RSA", "RS256"),
+    "rsa4096": ("RSA", "RS256"),
+    "p256": ("EC", "ES256"),
+    "p384": ("EC", "ES384"),
+    "p521": ("EC", "ES512"),
+    "ed25519": ("OKP", "EdDSA"),
+}
+
+# Algorithm families an RSA key can sign
+_RSA_FAMILIES = ("RS", "PS")
+
+DEFAULT_POOL_DIR = "keystore"
+INDEX_FILE = "index.json"
+
+# Members hashed for an RFC 7638 JWK thumbprint, per key type
+_THUMBPRINT_MEMBERS = {"RSA": ("e", "kty", "n"), "EC": ("crv", "kty", "x", "y"), "OKP": ("crv", "kty", "x")}
+
+
+def _b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def _int_b64url(value: int) -> str:
+    return _b64url(value.to_bytes((value.bit_length() + 7) // 8 or 1, 'big'))
+
+
+def public_jwk(public_key: Any) -> Dict[str, str]:
+    """
+    Public JWK members for an RSA, EC or Ed25519 public key
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if isinstance(public_key, rsa.RSAPublicKey):
+        numbers = public_key.public_numbers()
+        return {"kty": "RSA", "n": _int_b64url(numbers.n), "e": _int_b64url(numbers.e)}
+    if isinstance(public_key, ec.EllipticCurvePublicKey):
+        curve = {"secp256r1": "P-256", "secp384r1": "P-384", "secp521r1": "P-521"}[public_key.curve.name]
+        size = (public_key.curve.key_size + 7) // 8
+        numbers = public_key.public_numbers()
+        return {"kty": "EC", "crv": curve,
+                "x": _b64url(numbers.x.to_bytes(size, 'big')), "y": _b64url(numbers.y.to_bytes(size, 'big'))}
+    if isinstance(public_key, ed25519.Ed25519PublicKey):
+        raw = public_key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+        return {"kty": "OKP", "crv": "Ed25519", "x": _b64url(raw)}
+    raise ValueError(f"Unsupported key type: {type(public_key).__name__}")
+
+
+def jwk_thumbprint(jwk: Dict[str, Any]) -> str:
+    """
+    RFC 7638 SHA-256 thumbprint of a JWK, base64url encoded
+    """
+    members = _THUMBPRINT_MEMBERS.get(jwk.get("kty"))
+    if members is None:
+        raise ValueError(f"Unsupported JWK key type: {jwk.get('kty')}")
+    canonical = json.dumps({name: jwk[name] for name in members}, separators=(",", ":"), sort_keys=True)
+    return _b64url(hashlib.sha256(canonical.encode()).digest())
+
+
+def spki_fingerprint(public_key: Any) -> str:
+    """
+    SHA-256 fingerprint of the DER SubjectPublicKeyInfo, as colon-separated hex
+    """
+    from cryptography.hazmat.primitives import serialization
+    der = public_key.public_bytes(serialization.Encoding.DER, serialization.PublicFormat.SubjectPublicKeyInfo)
+    return ":".join(f"{b:02x}" for b in hashlib.sha256(der).digest())
+
+
+def key_type(entry: Dict[str, Any]) -> str:
+    """
+    JWK key type of a keystore entry; older indexes only record the spec
+    """
+    return entry.get("kty") or KEY_SPECS[entry["spec"]][0]
+
+
+def signs(entry: Dict[str, Any], alg: str) -> bool:
+    """
+    Whether a keystore entry can sign tokens of alg
+    """
+    if key_type(entry) == "RSA":
+        return isinstance(alg, str) and alg[:2] in _RSA_FAMILIES
+    return entry["alg"] == alg
+
+
+def _generate_key(spec: str) -> Tuple[str, bytes, bytes, str, str]:
+    """
+    Generate one key pair; runs in worker processes
+    Returns: (spec, private PEM, public PEM, kid, fingerprint)
+    """
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+    if spec.startswith("rsa"):
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=int(spec[3:]))
+    elif spec == "ed25519":
+        private_key = ed25519.Ed25519PrivateKey.generate()
+    else:
+        curve = {"p256": ec.SECP256R1, "p384": ec.SECP384R1, "p521": ec.SECP521R1}[spec]
+        private_key = ec.generate_private_key(curve())
+
+    public_key = private_key.public_key()
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption()
+    )
+    public_pem = public_key.public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    return spec, private_pem, public_pem, jwk_thumbprint(public_jwk(public_key)), spki_fingerprint(public_key)
+
+
+class KeyPool:
+    def __init__(self, directory: str = DEFAULT_POOL_DIR):
+        """
+        On-disk keystore of pre-generated key pairs, indexed by kid
+        """
+        self.directory = directory
+        self.index_path = os.path.join(directory, INDEX_FILE)
+        self.keys: List[Dict[str, Any]] = []
+        self._cursor: Dict[str, int] = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, 'r') as f:
+                self.keys = json.load(f).get("keys", [])
+
+    def generate(self, requests: Iterable[Tuple[str, int]], workers: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Generate (spec, count) key pairs in parallel and add them to the keystore
+        """
+        specs = []
+        for spec, count in requests:
+            if spec not in KEY_SPECS:
+                raise ValueError(f"Unknown key spec '{spec}', expected one of {', '.join(KEY_SPECS)}")
+            specs += [spec] * count
+        if not specs:
+            return []
+
+        # Largest keys first so the slowest jobs don't start last
+        specs.sort(key=lambda spec: int(spec[3:]) if spec.startswith("rsa") else 0, reverse=True)
+        workers = min(workers or os.cpu_count() or 1, len(specs))
+        if workers == 1:
+            generated = [_generate_key(spec) for spec in specs]
+        else:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                generated = list(pool.map(_generate_key, specs))
+
+        os.makedirs(self.directory, exist_ok=True)
+        added = []
+        for spec, private_pem, public_pem, kid, fingerprint in generated:
+            private_file = f"{kid}.key.pem"
+            public_file = f"{kid}.pub.pem"
+            self._write(private_file, private_pem, private=True)
+            self._write(public_file, public_pem)
+            entry = {
+                "kid": kid,
+                "spec": spec,
+                "kty": KEY_SPECS[spec][0],
+                "alg": KEY_SPECS[spec][1],
+                "fingerprint": fingerprint,
+                "private": private_file,
+                "public": public_file,
+                "created": int(time.time()),
+                "used": False,
+            }
+            self.keys.append(entry)
+            added.append(entry)
+        self.save()
+        return added
+
+    def find(self, kid: str) -> Optional[Dict[str, Any]]:
+        return next((entry for entry in self.keys if entry["kid"] == kid), None)
+
+    def select(self, alg: Optional[str] = None, spec: Optional[str] = None,
+               unused_only: bool = False) -> List[Dict[str, Any]]:
+        """
+        Keystore entries matching an algorithm and/or key spec
+        """
+        return [entry for entry in self.keys
+                if (alg is None or signs(entry, alg))
+                and (spec is None or entry["spec"] == spec)
+                and not (unused_only and entry["used"])]
+
+    def draw(self, alg: Optional[str] = None, spec: Optional[str] = None,
+             consume: bool = False) -> Dict[str, Any]:
+        """
+        Take a key from the pool: round-robin, or a never-used key when consume is set
+        """
+        candidates = self.select(alg, spec, unused_only=consume)
+        if not candidates:
+            wanted = " ".join(part for part in (alg, spec) if part) or "any"
+            raise ValueError(f"No {'unused ' if consume else ''}keys in pool for {wanted}; generate more first")
+
+        if consume:
+            entry = candidates[0]
+            entry["used"] = True
+            self.save()
+            return entry
+
+        cursor_key = f"{alg}/{spec}"
+        position = self._cursor.get(cursor_key, 0)
+        self._cursor[cursor_key] = position + 1
+        return candidates[position % len(candidates)]
+
+    def private_key(self, entry: Dict[str, Any]) -> Any:
+        """
+        Parsed private key for a keystore entry, via the shared key cache
+        """
+        from key_cache import key_registry
+        return key_registry.load_file(os.path.join(self.directory, entry["private"]))
+
+    def public_key(self, entry: Dict[str, Any]) -> Any:
+        from key_cache import key_registry
+        return key_registry.load_file(os.path.join(self.directory, entry["public"]))
+
+    def to_jwks(self) -> Dict[str, Any]:
+        """
+        Public keys of the pool as a JWKS document
+        """
+        keys = []
+        for entry in self.keys:
+            jwk = public_jwk(self.public_key(entry))
+            jwk.update({"kid": entry["kid"], "use": "sig"})
+            # Pinning an RSA key to one algorithm would hide it from tokens using the others
+            if key_type(entry) != "RSA":
+                jwk["alg"] = entry["alg"]
+            keys.append(jwk)
+        return {"keys": keys}
+
+    def save(self) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        # Write to a temporary file and rename so a crash never leaves a torn index
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, prefix=".index-")
+        with os.fdopen(fd, 'w') as f:
+            json.dump({"keys": self.keys}, f, indent=2)
+        os.replace(temp_path, self.index_path)
+
+    def _write(self, name: str, data: bytes, private: bool = False) -> None:
+        path = os.path.join(self.directory, name)
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600 if private else 0o644)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
@@ -0,0 +1,339 @@
+#!/usr/bin/env python3
+import argparse
+import hmac
+import os
+import string
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+import jwt_cracker
+from jwt_cracker import CrackResult, JWTCracker, format_rate
+
+# Candidates per work unit; a unit is just (mask, start, end) so it is cheap to send
+DEFAULT_RANGE_SIZE = 500_000
+
+# Built-in charsets, as in hashcat
+CHARSETS: Dict[str, bytes] = {
+    "l": string.ascii_lowercase.encode(),
+    "u": string.ascii_uppercase.encode(),
+    "d": string.digits.encode(),
+    "h": b"0123456789abcdef",
+    "H": b"0123456789ABCDEF",
+    "s": b" " + string.punctuation.encode(),
+    "b": bytes(range(256)),
+}
+CHARSETS["a"] = CHARSETS["l"] + CHARSETS["u"] + CHARSETS["d"] + CHARSETS["s"]
+
+# Placeholders for user-defined charsets (-1 .. -4)
+CUSTOM_CHARSETS = "1234"
+
+
+def _expand_charset(definition: str, custom: Dict[str, bytes]) -> bytes:
+    """
+    Expand a charset definition such as '?l?d_-' into its unique bytes, in order
+    """
+    charset = bytearray()
+    index = 0
+    while index < len(definition):
+        char = definition[index]
+        if char == "?":
+            if index + 1 >= len(definition):
+                raise ValueError(f"Charset '{definition}' ends with a bare '?'")
+            name = definition[index + 1]
+            if name == "?":
+                charset += b"?"
+            elif name in CHARSETS:
+                charset += CHARSETS[name]
+            elif name in custom:
+                charset += custom[name]
+            else:
+                raise ValueError(f"Unknown charset '?{name}' in '{definition}'")
+            index += 2
+        else:
+            charset += char.encode('latin-1')
+            index += 1
+    return bytes(dict.fromkeys(charset))
+
+
+def parse_mask(mask: str, custom: Optional[Dict[str, str]] = None) -> List[bytes]:
+    """
+    Parse a mask such as '?u?l?l?d?d' into one charset per position.
+    custom maps '1'-'4' to charset definitions for ?1 .. ?4.
+    """
+    expanded: Dict[str, bytes] = {}
+    for name, definition in sorted((custom or {}).items()):
+        if name not in CUSTOM_CHARSETS:
+            raise ValueError(f"Custom charsets are named 1-4, got '{name}'")
+        expanded[name] = _expand_charset(definition, expanded)
+        if not expanded[name]:
+            raise ValueError(f"Custom charset ?{name} is empty")
+
+    positions = []
+    index = 0
+    while index < len(mask):
+        if mask[index] == "?":
+            positions.append(_expand_charset(mask[index:index + 2], expanded))
+            index += 2
+        else:
+            positions.append(mask[index].encode('latin-1'))
+            index += 1
+    if not positions:
+        raise ValueError("Empty mask")
+    return positions
+
+
+def keyspace(charsets: Sequence[bytes]) -> int:
+    total = 1
+    for charset in charsets:
+        total *= len(charset)
+    return total
+
+
+def candidate_at(charsets: Sequence[bytes], index: int) -> bytes:
+    """
+    The candidate at a keyspace index; the last position changes fastest
+    """
+    return bytes(_seek(charsets, index)[0])
+
+
+def _seek(charsets: Sequence[bytes], index: int) -> Tuple[bytearray, List[int]]:
+    """
+    Candidate buffer and per-position digits for a keyspace index
+    """
+    digits = [0] * len(charsets)
+    for position in range(len(charsets) - 1, -1, -1):
+        index, digits[position] = divmod(index, len(charsets[position]))
+    return bytearray(charset[digit] for charset, digit in zip(charsets, digits)), digits
+
+
+def iter_range(charsets: Sequence[bytes], start: int, end: int) -> Iterator[bytearray]:
+    """
+    Walk keyspace indexes [start, end) like an odometer. The same buffer is
+    yielded every time with only the changed positions rewritten, so copy it
+    (bytes(buf)) to keep a candidate.
+    """
+    buf, digits = _seek(charsets, start)
+    last = charsets[-1]
+    column = digits[-1]
+    remaining = end - start
+    while remaining > 0:
+        row = last[column:column + remaining]
+        for char in row:
+            buf[-1] = char
+            yield buf
+        remaining -= len(row)
+        column = 0
+
+        # Carry into the earlier positions once the last one wraps
+        position = len(charsets) - 2
+        while position >= 0:
+            digits[position] += 1
+            charset = charsets[position]
+            if digits[position] < len(charset):
+                buf[position] = charset[digits[position]]
+                break
+            digits[position] = 0
+            buf[position] = charset[0]
+            position -= 1
+
+
+def _check_range(charsets: Sequence[bytes], start: int, end: int) -> Tuple[Optional[bytes], int]:
+    signing_input, signature, digest_name = jwt_cracker._worker_target
+    digest = hmac.digest
+    for candidate in iter_range(charsets, start, end):
+        if digest(candidate, signing_input, digest_name) == signature:
+            return bytes(candidate), end - start
+    return None, end - start
+
+
+def expand_masks(mask: str, custom: Optional[Dict[str, str]] = None,
+                 min_length: Optional[int] = None, max_length: Optional[int] = None) -> List[List[bytes]]:
+    """
+    The mask itself, or with a length range every prefix of it from min_length
+    to max_length positions (hashcat's --increment)
+    """
+    charsets = parse_mask(mask, custom)
+    if min_length is None and max_length is None:
+        return [charsets]
+    low = max(1, min_length or 1)
+    high = min(len(charsets), max_length or len(charsets))
+    if low > high:
+        raise ValueError(f"Length range {low}-{high} does not fit a mask of {len(charsets)} positions")
+    return [charsets[:length] for length in range(low, high + 1)]
+
+
+class MaskAttack:
+    def __init__(self, masks: Sequence[Sequence[bytes]]):
+        """
+        Brute-force the keyspace of one or more masks, tried in order, as one
+        index space that can be cut into ranges at any point
+        """
+        self.masks = [list(charsets) for charsets in masks]
+        self.sizes = [keyspace(charsets) for charsets in self.masks]
+        self.keyspace = sum(self.sizes)
+
+    def candidate_at(self, index: int) -> bytes:
+        for charsets, size in zip(self.masks, self.sizes):
+            if index < size:
+                return candidate_at(charsets, index)
+            index -= size
+        raise IndexError("keyspace index out of range")
+
+    def ranges(self, start: int = 0, end: Optional[int] = None,
+               range_size: int = DEFAULT_RANGE_SIZE) -> Iterator[Tuple[List[bytes], int, int]]:
+        """
+        Split global indexes [start, end) into (charsets, start, end) work units
+        that never straddle two masks
+        """
+        end = self.keyspace if end is None else min(end, self.keyspace)
+        offset = 0
+        for charsets, size in zip(self.masks, self.sizes):
+            low, high = max(start - offset, 0), min(end - offset, size)
+            for unit_start in range(low, high, range_size):
+                yield charsets, unit_start, min(unit_start + range_size, high)
+            offset += size
+
+    def crack(self, cracker: JWTCracker, workers: Optional[int] = None,
+              start: int = 0, end: Optional[int] = None, range_size: int = DEFAULT_RANGE_SIZE,
+              progress: Optional[Callable[[int, float], None]] = None) -> CrackResult:
+        """
+        Test the keyspace range [start, end) against the token across a process pool
+        """
+        workers = workers or os.cpu_count() or 1
+        target = (cracker.signing_input, cracker.signature, cracker.digest_name)
+        begin = time.perf_counter()
+        tested = 0
+
+        if workers == 1:
+            jwt_cracker._init_worker(*target)
+            for unit in self.ranges(start, end, range_size):
+                found, count = _check_range(*unit)
+                tested += count
+                if progress:
+                    progress(tested, time.perf_counter() - begin)
+                if found is not None:
+                    return CrackResult(found, tested, time.perf_counter() - begin)
+            return CrackResult(None, tested, time.perf_counter() - begin)
+
+        units = self.ranges(start, end, range_size)
+        max_pending = workers * 2
+        with ProcessPoolExecutor(max_workers=workers, initializer=jwt_cracker._init_worker,
+                                 initargs=target) as pool:
+            pending = set()
+            exhausted = False
+            while True:
+                while not exhausted and len(pending) < max_pending:
+                    unit = next(units, None)
+                    if unit is None:
+                        exhausted = True
+                        break
+                    pending.add(pool.submit(_check_range, *unit))
+                if not pending:
+                    break
+
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    found, count = future.result()
+                    tested += count
+                    if found is not None:
+                        for other in pending:
+                            other.cancel()
+                        return CrackResult(found, tested, time.perf_counter() - begin)
+                if progress:
+                    progress(tested, time.perf_counter() - begin)
+
+        return CrackResult(None, tested, time.perf_counter() - begin)
+
+
+def format_eta(seconds: float) -> str:
+    seconds = int(seconds)
+    if seconds >= 86400:
+        return f"{seconds // 86400}d{seconds % 86400 // 3600:02d}h"
+    return f"{seconds // 3600}:{seconds % 3600 // 60:02d}:{seconds % 60:02d}"
+
+
+def format_progress(tested: int, total: int, elapsed: float) -> str:
+    """
+    Throughput line with the share of the keyspace done and the time left
+    """
+    rate = tested / elapsed if elapsed > 0 else 0.0
+    percent = 100.0 * tested / total if total else 100.0
+    eta = format_eta((total - tested) / rate) if rate > 0 else "--:--:--"
+    return f"{format_rate(tested, elapsed)} {percent:5.1f}% ETA {eta}"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Brute-force the secret of an HS256/384/512 JWT with a mask such as '?l?l?d?d?d'",
+        epilog="Charsets: ?l lower, ?u upper, ?d digits, ?h/?H hex, ?s symbols, ?a all printable, "
+               "?b all bytes, ?1-?4 custom, ?? a literal '?'. Other characters are literal.")
+    parser.add_argument("token", help="JWT to crack")
+    parser.add_argument("mask", help="Mask with one charset or literal per position")
+    for name in CUSTOM_CHARSETS:
+        parser.add_argument(f"-{name}", f"--custom-charset{name}", dest=f"charset{name}", metavar="CHARS",
+                            help=f"Define ?{name}, e.g. '?l?d' or 'abc123'")
+    parser.add_argument("-i", "--increment", action="store_true",
+                        help="Also try every shorter prefix of the mask (see --min-length/--max-length)")
+    parser.add_argument("--min-length", type=int, default=None, help="Shortest candidate length to try")
+    parser.add_argument("--max-length", type=int, default=None, help="Longest candidate length to try")
+    parser.add_argument("-s", "--skip", type=int, default=0, help="Start at this keyspace index")
+    parser.add_argument("-l", "--limit", type=int, default=None, help="Test at most this many candidates")
+    parser.add_argument("--keyspace", action="store_true", help="Print the keyspace size and exit")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="Worker processes (default: all cores)")
+    parser.add_argument("--range-size", type=int, default=DEFAULT_RANGE_SIZE, help="Candidates per work unit")
+    parser.add_argument("--no-store", action="store_true",
+                        help="Neither consult nor update the results store ($JWT_RESULTS_DB)")
+    args = parser.parse_args(argv)
+
+    custom = {name: getattr(args, f"charset{name}") for name in CUSTOM_CHARSETS
+              if getattr(args, f"charset{name}") is not None}
+    min_length, max_length = args.min_length, args.max_length
+    if args.increment and min_length is None:
+        min_length = 1
+    try:
+        attack = MaskAttack(expand_masks(args.mask, custom, min_length, max_length))
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.keyspace:
+        print(attack.keyspace)
+        return 0
+
+    try:
+        cracker = JWTCracker(args.token)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    store = None
+    if not args.no_store:
+        from results_store import open_store
+        store = open_store()
+    known = store.known_secret(args.token) if store is not None else None
+    if known is not None:
+        print("Secret known from an earlier run", file=sys.stderr)
+        print(known.decode('utf-8', errors='replace'))
+        return 0
+
+    end = attack.keyspace if args.limit is None else min(attack.keyspace, args.skip + args.limit)
+    total = max(0, end - args.skip)
+    print(f"Keyspace {attack.keyspace:,} in {len(attack.masks)} mask(s), testing {total:,}", file=sys.stderr)
+
+    def report(tested: int, elapsed: float) -> None:
+        print(f"\r{format_progress(tested, total, elapsed)}", end="", file=sys.stderr, flush=True)
+
+    result = attack.crack(cracker, args.workers, args.skip, end, args.range_size, report)
+    print(f"\r{format_progress(result.tested, total, result.elapsed)}", file=sys.stderr)
+
+    if result.secret is None:
+        print("Secret not found", file=sys.stderr)
+        return 1
+    if store is not None:
+        store.record_secret(args.token, result.secret, "mask")
+    print(result.secret.decode('utf-8', errors='replace'))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+import sys
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from typing import Any, Dict, Iterator, Optional
+
+# Shared no-op context returned while profiling is disabled
+_DISABLED = nullcontext()
+
+
+class _PhaseTimer:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self.profiler = profiler
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.profiler.timings[self.name] += time.perf_counter() - self.start
+        self.profiler.calls[self.name] += 1
+
+
+class Profiler:
+    def __init__(self):
+        """
+        Opt-in per-phase timers and counters for the decoder and encoder hot paths
+        """
+        self.enabled = False
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.counters: Dict[str, int] = defaultdict(int)
+
+    def enable(self) -> None:
+        self.enabled = True
+
+    def disable(self) -> None:
+        self.enabled = False
+
+    def reset(self) -> None:
+        self.timings.clear()
+        self.calls.clear()
+        self.counters.clear()
+
+    def phase(self, name: str):
+        """
+        Context manager timing one phase; a shared no-op while disabled
+        """
+        if not self.enabled:
+            return _DISABLED
+        return _PhaseTimer(self, name)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if self.enabled:
+            self.counters[name] += amount
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Collected timings, counters and key-cache statistics as plain data
+        """
+        phases = {}
+        for name in sorted(self.timings, key=self.timings.get, reverse=True):
+            total = self.timings[name]
+            calls = self.calls[name]
+            phases[name] = {
+                "calls": calls,
+                "total_ms": total * 1000,
+                "mean_us": total / calls * 1e6 if calls else 0.0,
+            }
+
+        result: Dict[str, Any] = {"phases": phases, "counters": dict(self.counters)}
+        # Only report the key cache if something already loaded it
+        key_cache = sys.modules.get("key_cache")
+        if key_cache is not None:
+            result["key_cache"] = key_cache.key_registry.stats()
+        return result
+
+
+@contextmanager
+def profile_run(enabled: bool = True, cprofile_path: Optional[str] = None) -> Iterator[Profiler]:
+    """
+    Enable the shared profiler for a block, optionally capturing cProfile stats to a file
+    """
+    if enabled:
+        profiler.reset()
+        profiler.enable()
+    capture = None
+    if cprofile_path:
+        import cProfile
+        capture = cProfile.Profile()
+        capture.enable()
+    try:
+        yield profiler
+    finally:
+        if capture:
+            capture.disable()
+            capture.dump_stats(cprofile_path)
+        if enabled:
+            profiler.disable()
+
+
+def print_cprofile(path: str, limit: int = 25, stream=None) -> None:
+    """
+    Print the top functions by cumulative time from a saved cProfile capture
+    """
+    import pstats
+    stats = pstats.Stats(path, stream=stream or sys.stderr)
+    stats.sort_stats("cumulative").print_stats(limit)
+
+
+# Process-wide profiler shared by the decoder and encoder
+profiler = Profiler()
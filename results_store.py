@@ -0,0 +1,252 @@
+import hashlib
+import hmac
+import os
+import sqlite3
+import time
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+from jwt_decoder import HMAC_DIGESTS, JWTDecoder
+from jwt_token import Token
+
+# Set to a database path, or to 'off' to disable the store for every tool
+STORE_ENV = "JWT_RESULTS_DB"
+DEFAULT_STORE_PATH = os.path.join(os.path.expanduser("~"), ".jwt_modifier", "results.db")
+
+# Variants are inserted in batches while they stream past
+VARIANT_BATCH_SIZE = 1000
+
+# Known secrets tried against a token from an issuer the store has not seen
+MAX_SECRET_CANDIDATES = 100_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tokens (
+    hash BLOB PRIMARY KEY,
+    alg TEXT,
+    iss TEXT,
+    kid TEXT,
+    first_seen REAL,
+    last_seen REAL,
+    seen INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS tokens_iss ON tokens (iss);
+CREATE INDEX IF NOT EXISTS tokens_kid ON tokens (kid);
+CREATE TABLE IF NOT EXISTS secrets (
+    id INTEGER PRIMARY KEY,
+    secret BLOB UNIQUE NOT NULL,
+    source TEXT,
+    found REAL
+);
+CREATE TABLE IF NOT EXISTS keys (
+    fingerprint TEXT PRIMARY KEY,
+    pem BLOB NOT NULL,
+    source TEXT,
+    found REAL
+);
+CREATE TABLE IF NOT EXISTS solutions (
+    hash BLOB PRIMARY KEY,
+    secret_id INTEGER REFERENCES secrets (id),
+    key_fingerprint TEXT REFERENCES keys (fingerprint),
+    verified REAL
+);
+CREATE TABLE IF NOT EXISTS variants (
+    hash BLOB NOT NULL,
+    description TEXT,
+    token TEXT NOT NULL,
+    created REAL,
+    UNIQUE (hash, token)
+);
+"""
+
+
+def token_hash(token: Token) -> bytes:
+    """
+    SHA-256 of the signing input, which identifies a token regardless of its signature
+    """
+    return hashlib.sha256(token.signing_input).digest()
+
+
+def _issuer(token: Token) -> Tuple[Optional[str], Optional[str]]:
+    iss, kid = token.payload.get("iss"), token.header.get("kid")
+    return (iss if isinstance(iss, str) else None), (kid if isinstance(kid, str) else None)
+
+
+class ResultsStore:
+    def __init__(self, path: str = DEFAULT_STORE_PATH):
+        """
+        SQLite record of tokens seen, the secrets and keys that verified them,
+        and the attack variants generated from them
+        """
+        self.path = path
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._db = sqlite3.connect(path)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._db.close()
+
+    def __enter__(self) -> "ResultsStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def record_token(self, token: Any) -> bytes:
+        """
+        Note that a token was seen; returns its hash
+        """
+        token = Token.coerce(token)
+        digest = token_hash(token)
+        iss, kid = _issuer(token)
+        now = time.time()
+        with self._db:
+            self._db.execute(
+                "INSERT INTO tokens (hash, alg, iss, kid, first_seen, last_seen) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (hash) DO UPDATE SET last_seen = excluded.last_seen, seen = seen + 1",
+                (digest, token.algorithm, iss, kid, now, now))
+        return digest
+
+    def record_secret(self, token: Any, secret: Any, source: str = "entered") -> None:
+        """
+        Remember the HS secret that verified a token
+        """
+        token = Token.coerce(token)
+        secret = secret.encode('utf-8') if isinstance(secret, str) else bytes(secret)
+        digest = self.record_token(token)
+        now = time.time()
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO secrets (secret, source, found) VALUES (?, ?, ?)",
+                             (secret, source, now))
+            secret_id = self._db.execute("SELECT id FROM secrets WHERE secret = ?", (secret,)).fetchone()[0]
+            self._db.execute("INSERT OR REPLACE INTO solutions (hash, secret_id, key_fingerprint, verified) "
+                             "VALUES (?, ?, NULL, ?)", (digest, secret_id, now))
+
+    def record_key(self, token: Any, public_key: Any, source: str = "verified") -> None:
+        """
+        Remember the public key that verified a token
+        """
+        from cryptography.hazmat.primitives import serialization
+        from key_cache import key_registry
+        from key_pool import spki_fingerprint
+
+        token = Token.coerce(token)
+        public_key = key_registry.resolve(public_key)
+        if hasattr(public_key, "public_key"):
+            public_key = public_key.public_key()
+        pem = public_key.public_bytes(serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo)
+        fingerprint = spki_fingerprint(public_key)
+        digest = self.record_token(token)
+        now = time.time()
+        with self._db:
+            self._db.execute("INSERT OR IGNORE INTO keys (fingerprint, pem, source, found) VALUES (?, ?, ?, ?)",
+                             (fingerprint, pem, source, now))
+            self._db.execute("INSERT OR REPLACE INTO solutions (hash, secret_id, key_fingerprint, verified) "
+                             "VALUES (?, NULL, ?, ?)", (digest, fingerprint, now))
+
+    def record_variants(self, token: Any, variants: Iterable[Tuple[str, str]]) -> Iterator[Tuple[str, str]]:
+        """
+        Pass (description, token) variants through, storing them in batches
+        """
+        digest = self.record_token(token)
+        batch: List[Tuple[bytes, str, str, float]] = []
+        try:
+            for description, variant in variants:
+                batch.append((digest, description, variant, time.time()))
+                if len(batch) >= VARIANT_BATCH_SIZE:
+                    self._insert_variants(batch)
+                    batch = []
+                yield description, variant
+        finally:
+            if batch:
+                self._insert_variants(batch)
+
+    def _insert_variants(self, batch: List[Tuple[bytes, str, str, float]]) -> None:
+        with self._db:
+            self._db.executemany("INSERT OR IGNORE INTO variants (hash, description, token, created) "
+                                 "VALUES (?, ?, ?, ?)", batch)
+
+    def _candidates(self, token: Token, column: str, table_join: str) -> List[Any]:
+        """
+        Values recorded for this exact token first, then for its issuer or kid, most recent first
+        """
+        iss, kid = _issuer(token)
+        rows = self._db.execute(
+            f"SELECT {column} FROM solutions {table_join} JOIN tokens ON tokens.hash = solutions.hash "
+            f"WHERE solutions.hash = ? OR tokens.iss = ? OR tokens.kid = ? "
+            f"ORDER BY solutions.hash = ? DESC, solutions.verified DESC",
+            (token_hash(token), iss, kid, token_hash(token)))
+        return list(dict.fromkeys(row[0] for row in rows))
+
+    def known_secret(self, token: Any) -> Optional[bytes]:
+        """
+        A stored secret that verifies an HS token: those already linked to the token,
+        its issuer or kid first, then every other known secret
+        """
+        token = Token.coerce(token)
+        digest_name = HMAC_DIGESTS.get(token.algorithm)
+        if digest_name is None:
+            return None
+        signing_input, signature = token.signing_input, token.signature
+
+        candidates = self._candidates(token, "secrets.secret", "JOIN secrets ON secrets.id = solutions.secret_id")
+        tried = set(candidates)
+        rows = self._db.execute("SELECT secret FROM secrets ORDER BY found DESC LIMIT ?", (MAX_SECRET_CANDIDATES,))
+        candidates += [row[0] for row in rows if row[0] not in tried]
+
+        for secret in candidates:
+            if hmac.compare_digest(hmac.digest(secret, signing_input, digest_name), signature):
+                self.record_secret(token, secret, "store")
+                return secret
+        return None
+
+    def known_key(self, token: Any) -> Optional[Any]:
+        """
+        A stored public key that verifies an asymmetric token, tried like known_secret
+        """
+        from key_cache import key_registry
+        token = Token.coerce(token)
+        if token.algorithm in HMAC_DIGESTS or token.algorithm == 'none':
+            return None
+
+        candidates = self._candidates(token, "keys.pem", "JOIN keys ON keys.fingerprint = solutions.key_fingerprint")
+        tried = set(candidates)
+        candidates += [row[0] for row in self._db.execute("SELECT pem FROM keys ORDER BY found DESC")
+                       if row[0] not in tried]
+
+        for pem in candidates:
+            public_key = key_registry.load_key(pem)
+            try:
+                if JWTDecoder.verify_signature(token, public_key):
+                    self.record_key(token, public_key, "store")
+                    return public_key
+            except ValueError:
+                continue
+        return None
+
+    def secrets(self) -> List[bytes]:
+        """
+        Every known secret, most recently found first
+        """
+        return [row[0] for row in self._db.execute("SELECT secret FROM secrets ORDER BY found DESC")]
+
+    def solved(self, token: Any) -> bool:
+        """
+        Whether a secret or key is already recorded for this exact token
+        """
+        row = self._db.execute("SELECT 1 FROM solutions WHERE hash = ?", (token_hash(Token.coerce(token)),))
+        return row.fetchone() is not None
+
+
+def open_store(path: Optional[str] = None) -> Optional[ResultsStore]:
+    """
+    The results store at path, $JWT_RESULTS_DB or the default location;
+    None when disabled with 'off' or when the database cannot be opened
+    """
+    path = path or os.environ.get(STORE_ENV) or DEFAULT_STORE_PATH
+    if path.lower() == "off":
+        return None
+    try:
+        return ResultsStore(path)
+    except (OSError, sqlite3.Error):
+        return None
@@ -0,0 +1,262 @@
+#!/usr/bin/env python3
+import argparse
+import functools
+import hashlib
+import math
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+from jwt_token import Token
+
+# gmpy2 makes the big powers and the GCD orders of magnitude faster, but is optional
+try:
+    import gmpy2
+    _mpz: Callable[[int], Any] = gmpy2.mpz
+    _gcd: Callable[[Any, Any], Any] = gmpy2.gcd
+except ImportError:
+    gmpy2 = None
+    _mpz = int
+    _gcd = math.gcd
+
+# Public exponents tried; e=3 costs next to nothing, so it goes first
+DEFAULT_EXPONENTS = (3, 65537)
+
+# Larger exponents make s^e millions of bits long, which takes hours with Python integers
+MAX_EXPONENT_WITHOUT_GMPY2 = 257
+
+# Primes below this are divided out of the GCD to leave the modulus
+SMALL_PRIME_BOUND = 1 << 16
+
+# Where the interactive mode saves a recovered key
+DEFAULT_OUTPUT = "recovered_publ.pem"
+
+# DER DigestInfo prefixes for EMSA-PKCS1-v1_5 (RFC 8017, section 9.2)
+_DIGEST_INFO = {
+    "RS256": ("sha256", bytes.fromhex("3031300d060960864801650304020105000420")),
+    "RS384": ("sha384", bytes.fromhex("3041300d060960864801650304020205000430")),
+    "RS512": ("sha512", bytes.fromhex("3051300d060960864801650304020305000440")),
+}
+
+# Progress callback: (message, seconds since start)
+Progress = Callable[[str, float], None]
+
+# Seconds between progress callbacks while a worker is busy
+_TICK = 0.5
+
+
+class Sample(NamedTuple):
+    """
+    One RS-signed token reduced to integers: s^e = m (mod n)
+    """
+    signature: int
+    message: int
+    size: int
+
+
+class RecoveredKey(NamedTuple):
+    n: int
+    e: int
+    elapsed: float
+
+    def public_key(self) -> Any:
+        from cryptography.hazmat.primitives.asymmetric import rsa
+        return rsa.RSAPublicNumbers(self.e, self.n).public_key()
+
+    def to_pem(self) -> bytes:
+        from cryptography.hazmat.primitives import serialization
+        return self.public_key().public_bytes(serialization.Encoding.PEM,
+                                              serialization.PublicFormat.SubjectPublicKeyInfo)
+
+
+def pkcs1_v15_encode(signing_input: bytes, algorithm: str, size: int) -> int:
+    """
+    The padded message an RS signature of size bytes is computed over, as an integer
+    """
+    digest_name, prefix = _DIGEST_INFO[algorithm]
+    digest_info = prefix + hashlib.new(digest_name, signing_input).digest()
+    if size < len(digest_info) + 11:
+        raise ValueError(f"{size * 8}-bit signature is too short for {algorithm}")
+    return int.from_bytes(b"\x00\x01" + b"\xff" * (size - len(digest_info) - 3) + b"\x00" + digest_info, 'big')
+
+
+def sample(token: Any) -> Sample:
+    token = Token.coerce(token)
+    if token.algorithm not in _DIGEST_INFO:
+        raise ValueError(f"Cannot recover a key from {token.algorithm} tokens, expected one of "
+                         f"{', '.join(_DIGEST_INFO)}")
+    size = len(token.signature)
+    return Sample(int.from_bytes(token.signature, 'big'),
+                  pkcs1_v15_encode(token.signing_input, token.algorithm, size), size)
+
+
+def _residue(signature: int, exponent: int, message: int) -> Any:
+    """
+    s^e - m, a multiple of the modulus e times the size of s; runs in worker processes
+    """
+    return _mpz(signature) ** exponent - message
+
+
+def _gcd_job(a: Any, b: Any) -> Any:
+    return _gcd(a, b)
+
+
+@functools.lru_cache(maxsize=None)
+def _small_primes_product() -> Any:
+    """
+    Product of all primes below SMALL_PRIME_BOUND, multiplied as a balanced tree
+    """
+    sieve = bytearray([1]) * SMALL_PRIME_BOUND
+    sieve[:2] = b"\x00\x00"
+    for p in range(2, math.isqrt(SMALL_PRIME_BOUND) + 1):
+        if sieve[p]:
+            sieve[p * p::p] = bytes(len(range(p * p, SMALL_PRIME_BOUND, p)))
+    level = [_mpz(p) for p in range(SMALL_PRIME_BOUND) if sieve[p]]
+    while len(level) > 1:
+        level = [level[i] * level[i + 1] if i + 1 < len(level) else level[i] for i in range(0, len(level), 2)]
+    return level[0]
+
+
+def _strip_small_factors(g: Any, bits: int) -> Any:
+    """
+    Divide small primes out of g until it is no longer than the modulus
+    """
+    # One GCD with the product of all small primes finds every one that divides g;
+    # repeating it takes out higher powers
+    while g.bit_length() > bits:
+        common = _gcd(g, _small_primes_product())
+        if common == 1:
+            break
+        g //= common
+    return g
+
+
+class RSAKeyRecovery:
+    def __init__(self, tokens: Iterable[Any], exponents: Sequence[int] = DEFAULT_EXPONENTS):
+        """
+        Recover the modulus of the RSA key that signed two or more RS tokens
+        """
+        self.samples = []
+        seen = set()
+        for token in tokens:
+            entry = sample(token)
+            if (entry.signature, entry.message) not in seen:
+                seen.add((entry.signature, entry.message))
+                self.samples.append(entry)
+        if len(self.samples) < 2:
+            raise ValueError("Need at least two distinct RS tokens signed by the same key")
+        sizes = {entry.size for entry in self.samples}
+        if len(sizes) != 1:
+            raise ValueError("Tokens have signatures of different sizes, so they come from different keys")
+        self.size = sizes.pop()
+        self.exponents = list(exponents)
+
+    def recover(self, workers: Optional[int] = None, progress: Optional[Progress] = None) -> RecoveredKey:
+        """
+        For each candidate exponent: n divides s^e - m for every token, so the GCD of
+        two such values is n times a small cofactor; the remaining tokens are then
+        folded in with cheap modular powers to strip the cofactor and confirm n
+        """
+        start = time.perf_counter()
+        workers = max(1, min(workers or os.cpu_count() or 1, 2))
+        bits = self.size * 8
+
+        def report(message: str) -> None:
+            if progress:
+                progress(message, time.perf_counter() - start)
+
+        # The big integer work runs in worker processes so progress keeps ticking
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            for exponent in self.exponents:
+                if gmpy2 is None and exponent > MAX_EXPONENT_WITHOUT_GMPY2:
+                    raise ValueError(f"Recovering a key with e={exponent} needs gmpy2, which is not "
+                                     f"installed (pip install gmpy2)")
+                first, second = self.samples[0], self.samples[1]
+                report(f"e={exponent}: computing s^e for 2 tokens ({bits * exponent:,}-bit values)")
+                residues = self._run(pool, report, f"e={exponent}: computing s^e",
+                                     [(_residue, first.signature, exponent, first.message),
+                                      (_residue, second.signature, exponent, second.message)])
+
+                report(f"e={exponent}: GCD")
+                g = self._run(pool, report, f"e={exponent}: GCD", [(_gcd_job, *residues)])[0]
+                del residues
+
+                for entry in self.samples[2:]:
+                    if g.bit_length() <= bits:
+                        break
+                    g = _gcd(g, (pow(_mpz(entry.signature), exponent, g) - entry.message) % g)
+                g = int(_strip_small_factors(g, bits))
+
+                if self._verify(g, exponent):
+                    report(f"e={exponent}: recovered a {g.bit_length()}-bit modulus")
+                    return RecoveredKey(g, exponent, time.perf_counter() - start)
+                report(f"e={exponent}: no common modulus")
+
+        raise ValueError("Could not recover a modulus; the tokens may be signed by different keys "
+                         "or use an unusual public exponent (see --exponent)")
+
+    def _verify(self, n: int, exponent: int) -> bool:
+        if n.bit_length() < self.size * 8 - 8 or n.bit_length() > self.size * 8:
+            return False
+        return all(pow(entry.signature, exponent, n) == entry.message for entry in self.samples)
+
+    @staticmethod
+    def _run(pool: ProcessPoolExecutor, report: Callable[[str], None], message: str,
+             jobs: List[Tuple[Any, ...]]) -> List[Any]:
+        """
+        Run jobs in the pool, reporting progress until all are done; results in job order
+        """
+        futures = [pool.submit(*job) for job in jobs]
+        pending = set(futures)
+        while pending:
+            done, pending = wait(pending, timeout=_TICK, return_when=FIRST_COMPLETED)
+            report(f"{message} ({len(jobs) - len(pending)}/{len(jobs)} done)")
+        return [future.result() for future in futures]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Recover the RSA public key from two or more RS256/384/512 tokens signed with it")
+    parser.add_argument("tokens", nargs="*", help="Tokens signed by the same key")
+    parser.add_argument("-t", "--tokens-file", help="File with one token per line ('-' for stdin)")
+    parser.add_argument("-e", "--exponent", type=int, action="append",
+                        help="Public exponent to try, may be repeated (default: 3, then 65537)")
+    parser.add_argument("-o", "--output", help="Write the public key PEM here instead of stdout")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="Worker processes for the two big powers (default: up to 2)")
+    args = parser.parse_args(argv)
+
+    tokens = list(args.tokens)
+    if args.tokens_file:
+        from jwt_cracker import iter_tokens
+        tokens.extend(iter_tokens(args.tokens_file))
+
+    try:
+        recovery = RSAKeyRecovery(tokens, args.exponent or DEFAULT_EXPONENTS)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    def report(message: str, elapsed: float) -> None:
+        print(f"\r[{elapsed:6.1f}s] {message}\033[K", end="", file=sys.stderr, flush=True)
+
+    try:
+        key = recovery.recover(args.workers, report)
+    except ValueError as e:
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+    print(file=sys.stderr)
+
+    pem = key.to_pem()
+    if args.output:
+        with open(args.output, 'wb') as f:
+            f.write(pem)
+        print(f"Wrote {key.n.bit_length()}-bit key (e={key.e}) to {args.output}", file=sys.stderr)
+    else:
+        sys.stdout.write(pem.decode('ascii'))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from claim_index import ClaimIndex, Condition, parse_condition
+
+
+class ParseConditionTest(unittest.TestCase):
+    def test_comparisons(self):
+        self.assertEqual(parse_condition("admin=true"), Condition("payload.admin", "=", True))
+        self.assertEqual(parse_condition(" header.kid != k1 "), Condition("header.kid", "!=", "k1"))
+        self.assertEqual(parse_condition("exp>=1700000000"), Condition("payload.exp", ">=", 1700000000))
+        self.assertEqual(parse_condition("iat<5"), Condition("payload.iat", "<", 5))
+        self.assertEqual(parse_condition("iss~^https://").value.pattern, "^https://")
+
+    def test_now_expressions(self):
+        condition = parse_condition("exp<now+1h")
+        self.assertEqual(condition.op, "<")
+        self.assertIsInstance(condition.value, int)
+
+    def test_presence(self):
+        self.assertEqual(parse_condition("jti"), Condition("payload.jti", "exists"))
+        self.assertEqual(parse_condition("!jti"), Condition("payload.jti", "missing"))
+        self.assertEqual(parse_condition("! header.kid"), Condition("header.kid", "missing"))
+
+    def test_invalid(self):
+        for text in ["", "  ", "!", "!admin=true", "!exp<5", "!iss~x", "!a!=b", "=x", "a!b"]:
+            with self.subTest(text=text):
+                with self.assertRaises(ValueError):
+                    parse_condition(text)
+
+    def test_range_needs_number(self):
+        with self.assertRaises(ValueError):
+            parse_condition("exp<soon")
+        with self.assertRaises(ValueError):
+            parse_condition("iss~[")
+
+
+class SelectTest(unittest.TestCase):
+    def setUp(self):
+        self.index = ClaimIndex()
+        self.index.add({"alg": "HS256"}, {"sub": "a", "admin": True, "roles": ["admin"]})
+        self.index.add({"alg": "RS256", "kid": "k1"}, {"sub": "b", "admin": False, "jti": "1"})
+        self.index.add({"alg": "HS256"}, {"sub": "c", "roles": ["user", "admin"], "exp": 10})
+
+    def select(self, *conditions):
+        return self.index.select([parse_condition(text) for text in conditions])
+
+    def test_select(self):
+        self.assertEqual(self.select("admin=true"), [0])
+        self.assertEqual(self.select("!admin"), [2])
+        self.assertEqual(self.select("roles=admin"), [0, 2])
+        self.assertEqual(self.select("header.alg=HS256", "exp<100"), [2])
+        self.assertEqual(self.select("jti", "header.kid=k1"), [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,52 @@
+import json
+import os
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+from jwks import KeySet
+from jwt_token import Token
+from key_pool import public_jwk
+
+
+class MixedJWKSTest(unittest.TestCase):
+    def setUp(self):
+        self.private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        rsa_jwk = dict(public_jwk(self.private_key.public_key()), kid="rsa-1", use="sig")
+        self.document = {"keys": [
+            {"kty": "oct", "kid": "hmac-1", "k": "c2VjcmV0"},
+            rsa_jwk,
+            dict(rsa_jwk, kid="bad-x5c", x5c=["not base64!"]),
+            {"kty": "EC", "kid": "bad-ec", "crv": "P-256", "x": "AA", "y": "AA"},
+            {"use": "enc"},
+        ]}
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "jwks.json")
+        with open(self.path, 'w') as f:
+            json.dump(self.document, f)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_unusable_keys_are_skipped(self):
+        key_set = KeySet.from_path(self.path)
+
+        self.assertEqual([entry.kid for entry in key_set.entries], ["rsa-1"])
+        self.assertEqual(sorted(key_set.errors), [f"{self.path}#bad-ec", f"{self.path}#bad-x5c"])
+
+        token = jwt.encode({"sub": "user"}, self.private_key, algorithm="RS256", headers={"kid": "rsa-1"})
+        self.assertEqual(key_set.find(Token(token)).kid, "rsa-1")
+
+    def test_directory_records_per_key_errors(self):
+        key_set = KeySet.from_path(self.directory.name)
+
+        self.assertEqual(len(key_set.entries), 1)
+        self.assertEqual(len(key_set.errors), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,65 @@
+import base64
+import hmac
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import jwt
+from jwt_cracker import MultiTokenCracker, main
+
+
+def _b64(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+
+def hs_token(header: dict, payload: dict, secret: bytes) -> str:
+    signing_input = f"{_b64(json.dumps(header).encode())}.{_b64(json.dumps(payload).encode())}"
+    return f"{signing_input}.{_b64(hmac.digest(secret, signing_input.encode(), 'sha256'))}"
+
+
+GOOD = [jwt.encode({"sub": "a"}, "hello", algorithm="HS256"),
+        jwt.encode({"sub": "b"}, "letmein", algorithm="HS384")]
+MALFORMED = [hs_token({"alg": ["HS256"]}, {"sub": "c"}, b"hello"),
+             hs_token({"alg": 5}, {"sub": "d"}, b"hello"),
+             hs_token({"alg": "RS256"}, {"sub": "e"}, b"hello"),
+             "eyJhbGciOiJIUzI1NiJ9.e30.%%%",
+             "not-a-token"]
+WORDS = ["password", "letmein", "123456", "hello"]
+
+
+class MixedTokensFileTest(unittest.TestCase):
+    def test_malformed_tokens_are_rejected(self):
+        cracker = MultiTokenCracker(GOOD[:1] + MALFORMED + GOOD[1:])
+
+        self.assertEqual(sorted(cracker.rejected), sorted(MALFORMED))
+        self.assertEqual(cracker.tokens, [[GOOD[0]], [GOOD[1]]])
+        secrets, result = cracker.crack([word.encode() for word in WORDS], workers=1)
+        self.assertEqual(secrets, {GOOD[0]: b"hello", GOOD[1]: b"letmein"})
+
+    def test_tokens_file(self):
+        with tempfile.TemporaryDirectory() as directory:
+            tokens_path = os.path.join(directory, "tokens.txt")
+            words_path = os.path.join(directory, "words.txt")
+            with open(tokens_path, 'w') as f:
+                f.write("\n".join(MALFORMED[:2] + GOOD + MALFORMED[2:]) + "\n")
+            with open(words_path, 'w') as f:
+                f.write("\n".join(WORDS) + "\n")
+
+            stdout, stderr = io.StringIO(), io.StringIO()
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                status = main(["--tokens-file", tokens_path, words_path, "-w", "1", "--no-store"])
+
+        self.assertEqual(status, 0)
+        cracked = {record["token"]: record["secret"] for record in map(json.loads, stdout.getvalue().splitlines())}
+        self.assertEqual(cracked, {GOOD[0]: "hello", GOOD[1]: "letmein"})
+        self.assertEqual(stderr.getvalue().count("Skipping token"), len(MALFORMED))
+        self.assertIn("Cracked 2 of 2 tokens", stderr.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
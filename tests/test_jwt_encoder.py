@@ -0,0 +1,74 @@
+import hashlib
+import hmac
+import json
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from jwt_decoder import JWTDecoder
+from jwt_encoder import IncrementalEncoder, JWTEncoder, b64url_encode
+from jwt_token import Token, b64url_decode
+
+SECRET = "secret"
+HEADER = b'{"alg":"HS256","typ":"JWT"}'
+
+
+def make_token(payload: bytes) -> str:
+    signing_input = b64url_encode(HEADER) + b"." + b64url_encode(payload)
+    signature = hmac.new(SECRET.encode(), signing_input, hashlib.sha256).digest()
+    return (signing_input + b"." + b64url_encode(signature)).decode('ascii')
+
+
+def payload_bytes(token: str) -> bytes:
+    return b64url_decode(Token(token).payload_segment)
+
+
+class MemberNameTest(unittest.TestCase):
+    PAYLOADS = {
+        "escaped latin-1": b'{"\\u00e9":1,"b":2}',
+        "escaped CJK": b'{"\\u4e2d":1,"b":2}',
+        "escaped surrogate pair": b'{"\\ud83d\\ude00":1,"b":2}',
+        "raw UTF-8": '{"\u00e9":1,"\u4e2d\u6587":2,"b":3}'.encode('utf-8'),
+        "quoted": b'{"a\\"b":1,"c\\\\d":2,"b":3}',
+        "mixed": '{"\\u00e9\u00e9":1,"b":2}'.encode('utf-8'),
+    }
+
+    def test_edit_keeps_other_members(self):
+        for label, payload in self.PAYLOADS.items():
+            with self.subTest(label):
+                token = make_token(payload)
+                edited = IncrementalEncoder(token, SECRET).encode({"b": 42})
+
+                expected = json.loads(payload)
+                expected["b"] = 42
+                self.assertEqual(json.loads(payload_bytes(edited)), expected)
+                self.assertTrue(JWTDecoder.verify_signature(Token(edited), SECRET))
+                # Only the edited value changes; every other byte is kept as it was
+                value_start = payload.rindex(b'"b":') + 4
+                self.assertEqual(payload_bytes(edited), payload[:value_start] + b"42}")
+
+    def test_edit_non_ascii_names(self):
+        for label, payload in self.PAYLOADS.items():
+            with self.subTest(label):
+                token = make_token(payload)
+                name = next(iter(json.loads(payload)))
+                edited = IncrementalEncoder(token, SECRET).encode({name: "x"}, ["b"])
+
+                expected = json.loads(payload)
+                expected[name] = "x"
+                del expected["b"]
+                self.assertEqual(json.loads(payload_bytes(edited)), expected)
+
+    def test_update_token(self):
+        for label, payload in self.PAYLOADS.items():
+            with self.subTest(label):
+                token = make_token(payload)
+                new_payload = dict(json.loads(payload), b="changed")
+                updated = JWTEncoder.update_token(token, None, new_payload, SECRET)
+
+                self.assertEqual(JWTDecoder.decode_without_verification(updated)[1], new_payload)
+
+
+if __name__ == "__main__":
+    unittest.main()
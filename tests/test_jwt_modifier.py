@@ -0,0 +1,51 @@
+import io
+import os
+import sys
+import tempfile
+import unittest
+from contextlib import redirect_stderr, redirect_stdout
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+
+import jwt_modifier
+
+
+def run(*argv):
+    stdout, stderr = io.StringIO(), io.StringIO()
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        status = jwt_modifier.main(list(argv))
+    return status, stdout.getvalue(), stderr.getvalue()
+
+
+class VerifyCommandTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.TemporaryDirectory()
+        private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+        cls.public_path = os.path.join(cls.directory.name, "publ.pem")
+        with open(cls.public_path, 'wb') as f:
+            f.write(private_key.public_key().public_bytes(serialization.Encoding.PEM,
+                                                          serialization.PublicFormat.SubjectPublicKeyInfo))
+        cls.hs_token = jwt.encode({"sub": "user"}, "secret", algorithm="HS256")
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.directory.cleanup()
+
+    def test_hs_token_with_secret(self):
+        status, stdout, _ = run("verify", self.hs_token, "-s", "secret", "--no-store")
+        self.assertEqual((status, stdout.strip()), (0, "valid"))
+
+    def test_hs_token_with_public_key(self):
+        status, stdout, stderr = run("verify", self.hs_token, "-k", self.public_path, "--no-store")
+        self.assertEqual(status, 2)
+        self.assertEqual(stdout, "")
+        self.assertIn("Error: Invalid key", stderr)
+        self.assertNotIn("Traceback", stderr)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+import asyncio
+import io
+import os
+import sys
+import threading
+import time
+import unittest
+from contextlib import redirect_stderr
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from token_replay import TokenReplayer, iter_replayables
+
+DELAY = 0.05
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        server = self.server
+        with server.lock:
+            server.ports.add(self.client_address[1])
+            server.in_flight += 1
+            server.peak = max(server.peak, server.in_flight)
+            server.starts.append(time.monotonic())
+        time.sleep(DELAY)
+        with server.lock:
+            server.in_flight -= 1
+
+        token = self.headers.get("Authorization", "").partition(" ")[2]
+        if token == "admin":
+            status, body = 200, b'{"role": "admin"}'
+        elif token == "user":
+            status, body = 200, b'{"role": "user"}'
+        else:
+            status, body = 401, b"denied"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TokenReplayTest(unittest.TestCase):
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.ports = set()
+        self.server.in_flight = 0
+        self.server.peak = 0
+        self.server.starts = []
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/me"
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def replay(self, tokens, **options):
+        replayer = TokenReplayer(self.url, timeout=5, **options)
+
+        async def collect():
+            return [result async for result in replayer.replay(tokens)]
+
+        results = asyncio.run(asyncio.wait_for(collect(), 10))
+        return sorted(results, key=lambda result: result["index"])
+
+    def test_classification(self):
+        tokens = ["admin", "user", "bogus", "admin", "other"]
+        results = self.replay([(token, token) for token in tokens], concurrency=2)
+
+        self.assertEqual([result["status"] for result in results], [200, 200, 401, 200, 401])
+        self.assertEqual([result["length"] for result in results], [17, 16, 6, 17, 6])
+        classes = [result["class"] for result in results]
+        self.assertEqual(classes[0], classes[3])
+        self.assertEqual(classes[2], classes[4])
+        self.assertEqual(len(set(classes)), 3)
+        self.assertEqual(sum(result["new_class"] for result in results), 3)
+
+    def test_keep_alive_reuse(self):
+        results = self.replay([(str(i), "user") for i in range(20)], concurrency=3)
+
+        self.assertEqual(len(results), 20)
+        self.assertNotIn("error", results[0])
+        self.assertLessEqual(len(self.server.ports), 3)
+
+    def test_concurrency_limit(self):
+        self.replay([(str(i), "user") for i in range(12)], concurrency=3)
+
+        self.assertLessEqual(self.server.peak, 3)
+        self.assertGreater(self.server.peak, 1)
+
+    def test_rate_limit(self):
+        rate = 20.0
+        self.replay([(str(i), "user") for i in range(6)], concurrency=6, rate=rate)
+
+        starts = sorted(self.server.starts)
+        self.assertGreaterEqual(starts[-1] - starts[0], (len(starts) - 1) / rate * 0.9)
+
+    def test_malformed_input_is_skipped(self):
+        lines = ['user\n', '{"description":"x"}\n', '{not json\n', '{"token": 5}\n',
+                 '{"description":"ok","token":"admin"}\n', '\n']
+        stderr = io.StringIO()
+        with redirect_stderr(stderr):
+            results = self.replay(iter_replayables(lines), concurrency=2)
+
+        self.assertEqual([result["description"] for result in results], ["line 1", "ok"])
+        self.assertEqual(stderr.getvalue().count("Warning: skipping line"), 3)
+
+    def test_failing_token_source_does_not_hang(self):
+        def tokens():
+            yield "first", "user"
+            raise KeyError("token")
+
+        with self.assertRaises(KeyError):
+            self.replay(tokens(), concurrency=2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+import argparse
+import asyncio
+import hashlib
+import json
+import ssl
+import sys
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+DEFAULT_CONCURRENCY = 20
+DEFAULT_TIMEOUT = 10.0
+USER_AGENT = "jwt-modifier-replay"
+
+# (description, token) pairs, as produced by VariantGenerator
+Replayable = Tuple[str, str]
+
+
+class HTTPResponse:
+    __slots__ = ("status", "headers", "body", "reusable")
+
+    def __init__(self, status: int, headers: Dict[str, str], body: bytes, reusable: bool):
+        self.status = status
+        self.headers = headers
+        self.body = body
+        self.reusable = reusable
+
+
+class ConnectionPool:
+    def __init__(self, host: str, port: int, use_tls: bool, max_size: int):
+        """
+        Keep-alive connections to a single host, reused across requests
+        """
+        self.host = host
+        self.port = port
+        self.ssl_context = ssl.create_default_context() if use_tls else None
+        self.max_size = max_size
+        self.opened = 0
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+    async def acquire(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter, bool]:
+        """
+        Returns: (reader, writer, reused)
+        """
+        while self._idle:
+            reader, writer = self._idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer, True
+            writer.close()
+        reader, writer = await asyncio.open_connection(
+            self.host, self.port, ssl=self.ssl_context,
+            server_hostname=self.host if self.ssl_context else None)
+        self.opened += 1
+        return reader, writer, False
+
+    def release(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, reusable: bool) -> None:
+        if reusable and len(self._idle) < self.max_size and not writer.is_closing():
+            self._idle.append((reader, writer))
+        else:
+            writer.close()
+
+    async def close(self) -> None:
+        while self._idle:
+            _, writer = self._idle.pop()
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+
+
+class RateLimiter:
+    def __init__(self, rate: Optional[float]):
+        """
+        Spaces request starts evenly at no more than rate per second
+        """
+        self.interval = 1.0 / rate if rate else 0.0
+        self._next = 0.0
+        self._lock = asyncio.Lock()
+
+    async def wait(self) -> None:
+        if not self.interval:
+            return
+        async with self._lock:
+            now = time.monotonic()
+            delay = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+
+async def _read_response(reader: asyncio.StreamReader, method: str) -> HTTPResponse:
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode('latin-1').split("\r\n")
+    version, status_text = lines[0].split(" ", 2)[:2]
+    status = int(status_text)
+
+    headers: Dict[str, str] = {}
+    for line in lines[1:]:
+        if ":" in line:
+            name, value = line.split(":", 1)
+            headers[name.strip().lower()] = value.strip()
+
+    connection = headers.get("connection", "").lower()
+    reusable = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+
+    if method == "HEAD" or status in (204, 304) or 100 <= status < 200:
+        return HTTPResponse(status, headers, b"", reusable)
+
+    if "chunked" in headers.get("transfer-encoding", "").lower():
+        chunks = []
+        while True:
+            size_line = await reader.readuntil(b"\r\n")
+            size = int(size_line.split(b";", 1)[0].strip(), 16)
+            if size == 0:
+                # Skip trailers up to the terminating blank line
+                while (await reader.readuntil(b"\r\n")) != b"\r\n":
+                    pass
+                break
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        return HTTPResponse(status, headers, b"".join(chunks), reusable)
+
+    if "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+        return HTTPResponse(status, headers, body, reusable)
+
+    # No framing: the body runs until the server closes the connection
+    return HTTPResponse(status, headers, await reader.read(), False)
+
+
+class TokenReplayer:
+    def __init__(self, url: str, header: Optional[str] = "Authorization",
+                 header_format: str = "Bearer {token}", cookie: Optional[str] = None,
+                 method: str = "GET", extra_headers: Optional[Dict[str, str]] = None,
+                 body: Optional[bytes] = None, concurrency: int = DEFAULT_CONCURRENCY,
+                 rate: Optional[float] = None, timeout: float = DEFAULT_TIMEOUT):
+        """
+        Send tokens to an HTTP endpoint and classify the responses
+        """
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Unsupported URL: {url}")
+        self.host = parts.hostname
+        self.port = parts.port or (443 if parts.scheme == "https" else 80)
+        self.host_header = parts.netloc.rsplit("@", 1)[-1]
+        self.path = (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+        self.use_tls = parts.scheme == "https"
+
+        self.header = None if cookie else header
+        self.header_format = header_format
+        self.cookie = cookie
+        self.method = method.upper()
+        self.extra_headers = extra_headers or {}
+        self.body = body
+        self.concurrency = concurrency
+        self.rate = rate
+        self.timeout = timeout
+        self.classes: Dict[Tuple[int, int, str], int] = {}
+
+    def build_request(self, token: str) -> bytes:
+        lines = [f"{self.method} {self.path} HTTP/1.1",
+                 f"Host: {self.host_header}",
+                 f"User-Agent: {USER_AGENT}",
+                 "Accept: */*",
+                 "Connection: keep-alive"]
+        if self.cookie:
+            lines.append(f"Cookie: {self.cookie}={token}")
+        elif self.header:
+            lines.append(f"{self.header}: {self.header_format.format(token=token)}")
+        for name, value in self.extra_headers.items():
+            lines.append(f"{name}: {value}")
+        if self.body is not None:
+            lines.append(f"Content-Length: {len(self.body)}")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode('latin-1') + (self.body or b"")
+
+    def classify(self, response: HTTPResponse) -> Dict[str, Any]:
+        """
+        Group responses by status, body length and body hash
+        """
+        body_hash = hashlib.sha256(response.body).hexdigest()[:16]
+        signature = (response.status, len(response.body), body_hash)
+        new_class = signature not in self.classes
+        if new_class:
+            self.classes[signature] = len(self.classes)
+        return {
+            "status": response.status,
+            "length": len(response.body),
+            "body_hash": body_hash,
+            "class": self.classes[signature],
+            "new_class": new_class,
+        }
+
+    async def _send(self, pool: ConnectionPool, request: bytes) -> HTTPResponse:
+        # A reused keep-alive connection may have been closed by the server; retry once on a fresh one
+        for attempt in range(2):
+            reader, writer, reused = await pool.acquire()
+            try:
+                writer.write(request)
+                await writer.drain()
+                response = await _read_response(reader, self.method)
+            except (ConnectionError, asyncio.IncompleteReadError):
+                writer.close()
+                if reused and attempt == 0:
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+            pool.release(reader, writer, response.reusable)
+            return response
+        raise ConnectionError("Connection closed by server")
+
+    async def replay(self, tokens: Iterable[Replayable]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream one result per token as responses complete
+        """
+        pool = ConnectionPool(self.host, self.port, self.use_tls, self.concurrency)
+        limiter = RateLimiter(self.rate)
+        work: asyncio.Queue = asyncio.Queue(maxsize=self.concurrency * 2)
+        results: asyncio.Queue = asyncio.Queue()
+
+        async def produce() -> None:
+            # The sentinels go out even if the token source raises, so the consumers
+            # wind down and the error surfaces below instead of hanging the results loop
+            try:
+                for index, (description, token) in enumerate(tokens):
+                    await work.put((index, description, token))
+            finally:
+                for _ in range(self.concurrency):
+                    await work.put(None)
+
+        async def consume() -> None:
+            try:
+                while True:
+                    item = await work.get()
+                    if item is None:
+                        return
+                    index, description, token = item
+                    await limiter.wait()
+                    result: Dict[str, Any] = {"index": index, "description": description, "token": token}
+                    start = time.perf_counter()
+                    try:
+                        response = await asyncio.wait_for(self._send(pool, self.build_request(token)), self.timeout)
+                        result.update(self.classify(response))
+                    except (OSError, asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError) as e:
+                        result["error"] = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+                    result["elapsed_ms"] = round((time.perf_counter() - start) * 1000, 2)
+                    await results.put(result)
+            finally:
+                results.put_nowait(None)
+
+        producer = asyncio.create_task(produce())
+        consumers = [asyncio.create_task(consume()) for _ in range(self.concurrency)]
+        tasks = [producer] + consumers
+        try:
+            finished = 0
+            while finished < self.concurrency:
+                result = await results.get()
+                if result is None:
+                    finished += 1
+                    continue
+                yield result
+            # Consumers first: if they all failed, the producer may be stuck on a full queue
+            await asyncio.gather(*consumers)
+            await producer
+        finally:
+            for task in tasks:
+                task.cancel()
+            await pool.close()
+
+
+def iter_replayables(stream: Iterable[str]) -> Iterable[Replayable]:
+    """
+    Read bare tokens or variant_generator NDJSON lines
+    """
+    for line_number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        if not line.startswith("{"):
+            yield f"line {line_number}", line
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            print(f"Warning: skipping line {line_number}: {e}", file=sys.stderr)
+            continue
+        token = record.get("token") if isinstance(record, dict) else None
+        if not isinstance(token, str) or not token:
+            print(f"Warning: skipping line {line_number}: no token", file=sys.stderr)
+            continue
+        yield str(record.get("description", f"line {line_number}")), token
+
+
+async def replay_to_stream(replayer: TokenReplayer, tokens: Iterable[Replayable], sink) -> Dict[str, int]:
+    """
+    Write NDJSON results to sink; returns the number of responses per class
+    """
+    counts: Dict[str, int] = {}
+    async for result in replayer.replay(tokens):
+        sink.write(json.dumps(result) + "\n")
+        sink.flush()
+        label = str(result.get("class", "error"))
+        counts[label] = counts.get(label, 0) + 1
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Replay JWTs against an HTTP endpoint and classify responses")
+    parser.add_argument("url", help="Target URL (http or https)")
+    parser.add_argument("input", nargs="?", default="-",
+                        help="Tokens or variant_generator NDJSON, one per line (default: stdin)")
+    parser.add_argument("--header", default="Authorization", help="Header carrying the token")
+    parser.add_argument("--format", dest="header_format", default="Bearer {token}",
+                        help="Header value template (default: 'Bearer {token}')")
+    parser.add_argument("--cookie", help="Send the token in this cookie instead of a header")
+    parser.add_argument("-X", "--method", default="GET", help="HTTP method (default: GET)")
+    parser.add_argument("-H", "--extra-header", action="append", default=[], metavar="'NAME: VALUE'",
+                        help="Additional request header, may be repeated")
+    parser.add_argument("-d", "--data", help="Request body")
+    parser.add_argument("-c", "--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Requests in flight / pooled connections (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument("-r", "--rate", type=float, help="Maximum requests per second")
+    parser.add_argument("-t", "--timeout", type=float, default=DEFAULT_TIMEOUT, help="Per-request timeout in seconds")
+    args = parser.parse_args(argv)
+
+    extra_headers = {}
+    for item in args.extra_header:
+        name, separator, value = item.partition(":")
+        if not separator:
+            parser.error(f"invalid header '{item}', expected 'NAME: VALUE'")
+        extra_headers[name.strip()] = value.strip()
+
+    try:
+        replayer = TokenReplayer(args.url, args.header, args.header_format, args.cookie, args.method,
+                                 extra_headers, args.data.encode() if args.data is not None else None,
+                                 max(args.concurrency, 1), args.rate, args.timeout)
+    except ValueError as e:
+        parser.error(str(e))
+
+    source = sys.stdin if args.input == '-' else open(args.input, 'r')
+    try:
+        counts = asyncio.run(replay_to_stream(replayer, iter_replayables(source), sys.stdout))
+    except KeyboardInterrupt:
+        return 130
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    classes = {index: signature for signature, index in replayer.classes.items()}
+    for label, count in sorted(counts.items()):
+        if label == "error":
+            print(f"errors: {count}", file=sys.stderr)
+        else:
+            status, length, body_hash = classes[int(label)]
+            print(f"class {label}: {count} responses (status {status}, {length} bytes, {body_hash})", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
